@@ -1,17 +1,40 @@
+import functools
+import hashlib
 import json
 import os.path
 import re
-import urllib.request
-from typing import Optional, Dict, Tuple, List, Union
-
-import requests
+import sys
+import time
+from typing import TYPE_CHECKING, Callable, Optional, Dict, FrozenSet, Iterable, Iterator, Set, Tuple, List, Union
+
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.context import CompiledContext, ContextResolver, get_context_resolver
+from jsonschema2crateo.fetch import Mirror, get_mirror
+from jsonschema2crateo.graph_index import GraphIndex
+from jsonschema2crateo.merge import merge_profiles
+from jsonschema2crateo.model import CrateOClass, CrateOInput, TypeReference, plain
+from jsonschema2crateo.parallel import ClassBuilder, ClassSource
+from jsonschema2crateo.lookup import definition_lookup
+from jsonschema2crateo.incremental import (content_hash, manifest_path_for, read_manifest, without_definitions,
+                                           write_manifest)
+from jsonschema2crateo import serialization
+from jsonschema2crateo.artifacts import ArtifactStore, file_digest
+from jsonschema2crateo.resolver import (DEFAULT_PER_HOST_LIMIT, DEFAULT_PREFETCH_WORKERS, collect_identifiers,
+                                        new_session, probe_url, resolve_urls)
+from jsonschema2crateo.stats import TranslationStats
+from jsonschema2crateo.streaming import DEFAULT_CHUNK_SIZE, JSONLDStream, iter_graph
+from jsonschema2crateo.vocabulary import BIOSCHEMAS_URL, VocabularyStore, get_vocabulary
+
+if TYPE_CHECKING:  # requests is only imported once a URL is probed, to keep imports fast
+    import requests
+
+__version__ = '0.1.0'
 
 SCRIPT_DIR = os.path.dirname(__file__)
 
 EXPAND_CONTEXT = True
 
-BIOSCHEMAS_URL = "https://raw.githubusercontent.com/BioSchemas/bioschemas-dde/main/bioschemas.json"
-BIOSCHEMAS_SPEC_FILE = os.path.basename(BIOSCHEMAS_URL)
+PROBE_TIMEOUT = 10  # Seconds to wait for a response when probing a guessed URL
 
 TYPE_MAPPING = {
     "string": "Text",
@@ -26,12 +49,19 @@ CONTEXT_OVERRIDES = {
 #    "bioschemas": "https://bioschemas.org/ComputationalWorkflow#"
 }
 
-with open(os.path.join(SCRIPT_DIR, 'dataset_class.json'), 'r') as dataset_class_file:
-    DATASET_CLASS = json.load(dataset_class_file)
-
-# Define default input groups
-with open(os.path.join(SCRIPT_DIR, 'input_groups.json'), 'r') as input_groups_file:
-    INPUT_GROUPS = json.load(input_groups_file)
+# Patterns used on every identifier and property, compiled once
+URL_PATTERN = re.compile(r'http(s)?://')
+CURIE_PATTERN = re.compile(r'(\w+):(\w+)')
+SCHEMA_DOT_ORG_PATTERN = re.compile(r'http(s)?:schema.org')
+DEFINITION_REF_PATTERN = re.compile(r"#/definitions/(.*)")
+HTML_TAG_PATTERN = re.compile(r'\<.*?\>')
+CAMEL_CASE_PATTERN = re.compile(r'([a-z])([A-Z])')
+
+# Bundled resources, only read when first used: the compulsory Dataset class and the default input groups
+BUNDLED_RESOURCES = {
+    "DATASET_CLASS": 'dataset_class.json',
+    "INPUT_GROUPS": 'input_groups.json',
+}
 
 ENABLED_CLASSES = [
     "Dataset",
@@ -63,24 +93,75 @@ def property_is_multiple(property_values: Dict,
         (
                 (type_definition_list := property_values.get("oneOf") or property_values.get("anyOf")) and
                 any(
-                    [(type_definition_type := type_definition.get("type")) and (type_definition_type == "array")
-                     for type_definition in type_definition_list]
+                    type_definition.get("type") == "array"
+                    for type_definition in type_definition_list
                 )
         )
     )
 
-def get_bioschemas() -> Dict:
-    """Return a dict of BioSchemas """
-    bioschemas_json = None
-    if os.path.isfile(BIOSCHEMAS_SPEC_FILE):
-        with open(BIOSCHEMAS_SPEC_FILE, 'r') as bioschemas_spec_file:
-            bioschemas_json = bioschemas_spec_file.read()
-    else:
-        bioschemas_json = urllib.request.urlopen(BIOSCHEMAS_URL).read().decode('utf8')
-        with open(BIOSCHEMAS_SPEC_FILE, 'w') as bioschemas_spec_file:
-            bioschemas_spec_file.write(bioschemas_json)
 
-    return json.loads(bioschemas_json)
+def definition_key(definition: Union[Dict, List[Dict]]) -> Optional[str]:
+    """
+    Return a key identifying a JSONschema definition by content, for memoizing conversions of identical definitions.
+    Uses the default encoder settings, which are much faster than a cryptographic hash for small definitions.
+    None for definitions too deeply nested to encode, or circular, which are converted without memoization
+    """
+    try:
+        return json.dumps(definition)
+    except (RecursionError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def strip_html(text: str) -> str:
+    """
+    Return text with HTML tags removed. Memoized because the same descriptions are stripped repeatedly
+    """
+    return HTML_TAG_PATTERN.sub('', text)
+
+
+@functools.lru_cache(maxsize=16384)
+def split_curie(identifier: str) -> Optional[Tuple[str, str]]:
+    """
+    Return the (prefix, suffix) of a compact IRI, e.g. ("schema", "name") for "schema:name", or None. Memoized so that
+    each identifier is only matched once per process
+    """
+    if curie_match := CURIE_PATTERN.match(identifier):
+        return curie_match.group(1), curie_match.group(2)
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def property_label(property_name: str) -> str:
+    """
+    Return a human-readable label for a camel case property name, e.g. "codeRepository" -> "Code Repository"
+    """
+    return CAMEL_CASE_PATTERN.sub(r'\g<1> \g<2>', property_name).title()  # Expand camel case to spaces
+
+
+@functools.lru_cache(maxsize=None)
+def bundled_resource(name: str) -> Dict:
+    """
+    Return a bundled JSON resource, read on first use
+    :param name: str, one of BUNDLED_RESOURCES, e.g. "DATASET_CLASS"
+    """
+    with open(os.path.join(SCRIPT_DIR, BUNDLED_RESOURCES[name]), 'r') as resource_file:
+        return json.load(resource_file)
+
+
+def __getattr__(name: str):
+    # Module attributes DATASET_CLASS and INPUT_GROUPS are read when first accessed rather than at import
+    if name in BUNDLED_RESOURCES:
+        return bundled_resource(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def get_bioschemas(offline: bool = False) -> Dict:
+    """
+    Return a dict of BioSchemas from the shared vocabulary store
+    :param offline: bool, only use a local copy of the BioSchemas spec. Raise FileNotFoundError if there isn't one
+    """
+    return get_vocabulary().load(offline)[0]
 
 class JSONSchema2CrateO:
     """
@@ -91,24 +172,118 @@ class JSONSchema2CrateO:
                  input_json_schema_path: Optional[str] = None,
                  output_crateo_profile_path: Optional[str] = None,
                  version: Optional[str] = None,
+                 bioschemas: Optional[Dict] = None,
+                 vocabulary: Optional[VocabularyStore] = None,
+                 resolution_cache: Optional[ResolutionCache] = None,
+                 offline: bool = False,
+                 prefetch_workers: int = DEFAULT_PREFETCH_WORKERS,
+                 session: Optional['requests.Session'] = None,
+                 incremental: bool = False,
+                 stream: bool = False,
+                 compact: bool = False,
+                 artifact_store: Optional[ArtifactStore] = None,
+                 mirror: Optional[Mirror] = None,
+                 class_workers: int = 0,
+                 class_processes: bool = False,
+                 lookup_url: Optional[str] = None,
                  ) -> None:
+        """
+        :param input_json_schema_path: Optional[str], path or URL of input JSONschema
+        :param output_crateo_profile_path: Optional[str], path of output Crate-O profile
+        :param version: Optional[str], profile version
+        :param bioschemas: Optional[Dict], pre-loaded BioSchemas graph. Overrides vocabulary
+        :param vocabulary: Optional[VocabularyStore], store the BioSchemas graph is loaded from on first use.
+            Defaults to the process-wide store for BIOSCHEMAS_URL
+        :param resolution_cache: Optional[ResolutionCache], cache of URL probe results to share between instances
+            and runs. Defaults to a new in-memory cache
+        :param offline: bool, never access the network. Unresolved identifiers are only looked up in the resolution
+            cache and the local BioSchemas graph
+        :param prefetch_workers: int, number of concurrent URL probes made after loading input_json_schema_path.
+            0 to disable the prefetch and probe URLs one at a time during translation
+        :param session: Optional[requests.Session], HTTP session to share between instances for URL probes
+        :param incremental: bool, reuse classes whose source definitions haven't changed since the last translation,
+            as recorded in a manifest alongside the output profile
+        :param stream: bool, parse the input @graph incrementally rather than loading the whole document, so that
+            memory use is proportional to the largest @graph entry plus the output
+        :param compact: bool, write the output profile without indentation, for machine consumers
+        :param artifact_store: Optional[ArtifactStore], store of previously generated profiles. If the same input
+            has been converted with the same settings before, the stored profile is copied to
+            output_crateo_profile_path without translating, self.artifact_hit is set and self.output_crateo_profile
+            is left empty. Remote inputs are only looked up when not streamed
+        :param mirror: Optional[Mirror], local mirror remote inputs are fetched through, revalidated with
+            conditional requests. Defaults to the process-wide mirror in DEFAULT_MIRROR_DIR. In offline mode, remote
+            inputs are read from the mirror
+        :param class_workers: int, number of pool workers building the classes of a document concurrently, e.g. to
+            overlap URL probes made during translation when prefetching is disabled. 0 to build them one at a time.
+            Classes are in the same order either way
+        :param class_processes: bool, build classes in a process pool rather than a thread pool, for documents with
+            many definitions whose translation is CPU-bound
+        :param lookup_url: Optional[str], URL of a /lookup endpoint (see server.py). If given, classes of
+            definitions taking their values from an ontology, e.g. EdamOperation, are looked up there by Crate-O
+        """
         self.input_json_schema_path: Optional[str] = input_json_schema_path
         self.output_crateo_profile_path: Optional[str] = output_crateo_profile_path
         self.version: str = version or "0.0.0"
 
         self.input_json_schema: Dict = {}
         self.output_crateo_profile: Dict = {}
-        self.context = {}
+        self.context = {}  # Prefixes of the input @context
+        self.compiled_context: CompiledContext = CompiledContext()
         self.expanded_ids = {}
-        self.schema_org_context = ""
-        self.bioschemas = get_bioschemas()
-
-        if input_json_schema_path:
-            self.load(version)
+        self.type_definition_cache: Dict[str, List[Dict]] = {}  # Converted type definitions by content hash
+        self.input_type_cache: Dict[str, Tuple[Tuple[str, ...], str, bool]] = {}  # Input types by content hash
+        self.reference_types: Dict[str, TypeReference] = {}  # Types referenced by $ref
+        self.schema_org_context: FrozenSet[str] = frozenset()  # Prefixes of schema.org, not expanded by default
+        self.offline: bool = offline
+        self.vocabulary: VocabularyStore = vocabulary if vocabulary is not None else get_vocabulary()
+        self._bioschemas: Optional[Dict] = bioschemas
+        self._bioschemas_index: Optional[GraphIndex] = None
+        self.resolution_cache: ResolutionCache = resolution_cache if resolution_cache is not None else ResolutionCache()
+        self._session: Optional['requests.Session'] = session
+        self.probe_errors: Set[str] = set()  # URLs whose probes failed with a network error, so weren't cached
+
+        self.incremental: bool = incremental
+        self.compact: bool = compact
+        self.class_cache: Dict[str, Tuple[str, Dict]] = {}
+        self.class_cache_environment: Optional[str] = None
+        self.reused_classes: int = 0
+        self.rebuilt_classes: int = 0
+        self.shared_classes: int = 0  # Classes built once for several merged specs
+        self.unverified_classes: Set[str] = set()  # Keys of classes built after a probe error, not reused by later runs
+
+        self.prefetch_workers: int = prefetch_workers
+        self.class_workers: int = class_workers
+        self.class_processes: bool = class_processes
+        self.lookup_url: Optional[str] = lookup_url
+        self.stats: TranslationStats = TranslationStats()  # Phase timers and counters for this converter
+
+        self.mirror: Mirror = mirror if mirror is not None else get_mirror()
+        self.context_resolver: ContextResolver = get_context_resolver(self.mirror)
+        self.artifact_store: Optional[ArtifactStore] = artifact_store
+        self.artifact_hit: bool = False
+        self.input_digest: Optional[str] = None  # sha256 of the input file content
+
+        if input_json_schema_path and not stream:
+            self.load(version=version)
+        elif input_json_schema_path and artifact_store and not URL_PATTERN.match(input_json_schema_path):
+            self.input_digest = file_digest(input_json_schema_path)
+
+        if output_crateo_profile_path and self.fetch_artifact():
+            return
+
+        if input_json_schema_path and not stream and prefetch_workers:
+            self.prefetch(max_workers=prefetch_workers)
 
         if output_crateo_profile_path:
-            self.output_crateo_profile = self.translate(self.input_json_schema)
+            if incremental:
+                self.load_manifest()
+            # The profile is only written, so is kept in the compact model rather than copied into dicts
+            if stream:
+                self.output_crateo_profile = self._translate_stream()
+            else:
+                self.output_crateo_profile = self._translate(self.input_json_schema)
             self.write()
+            self.store_artifact()
 
     def load(self,
              input_json_schema_path: Optional[str] = None,
@@ -123,201 +298,462 @@ class JSONSchema2CrateO:
 
         assert self.input_json_schema_path, 'No input_json_schema_path provided'
 
-        if re.match(r'http(s)?://', self.input_json_schema_path):
-            # Web source
-            self.input_json_schema = json.loads(
-                urllib.request.urlopen(self.input_json_schema_path).read().decode('utf8'))
-        else:
-            # File source
-            with open(self.input_json_schema_path, 'r') as input_json_schema_file:
-                self.input_json_schema = json.loads(input_json_schema_file.read())
+        with self.stats.phase('load'):
+            if URL_PATTERN.match(self.input_json_schema_path):
+                # Web source
+                input_content = self.mirror.read(self.input_json_schema_path, offline=self.offline)
+            else:
+                # File source
+                with open(self.input_json_schema_path, 'rb') as input_json_schema_file:
+                    input_content = input_json_schema_file.read()
+
+            self.input_json_schema = serialization.loads(input_content)
 
-        self.context = self.input_json_schema.get("@context", {})
+        self.set_input_json_schema(self.input_json_schema)
+        self.input_digest = hashlib.sha256(input_content).hexdigest()
+
+    def set_input_json_schema(self, input_json_schema: Dict) -> None:
+        """
+        Use an already parsed JSONschema as input
+        :param input_json_schema: Dict, JSONschema document
+        """
+        self.input_json_schema = input_json_schema
+        self.input_digest = None  # Not known for an already parsed input
+        base_url = self.input_json_schema_path if URL_PATTERN.match(self.input_json_schema_path or '') else None
+        self.set_context(self.context_resolver.compile(self.input_json_schema.get("@context", {}),
+                                                       offline=self.offline,
+                                                       base_url=base_url))
+
+    def set_context(self, compiled_context: CompiledContext) -> None:
+        """
+        Use the prefixes and terms of a resolved @context to expand identifiers
+        :param compiled_context: CompiledContext, from self.context_resolver
+        """
+        self.compiled_context = compiled_context
+        self.context = dict(compiled_context.prefixes)  # Copied, since compiled contexts are shared
 
-        self.schema_org_context = [context_name
-                                   for context_name, context_prefix in self.context.items()
-                                   if re.match(r'http(s)?:schema.org', context_prefix)
-                                   ]
+        self.schema_org_context = frozenset(context_name
+                                            for context_name, context_prefix in self.context.items()
+                                            if SCHEMA_DOT_ORG_PATTERN.match(context_prefix)
+                                            )
 
     def expand_context(self, plain_id: str,
-                       lookup_graph: List[Dict] = [],
+                       lookup_graph: Union[GraphIndex, List[Dict]] = [],
                        expand_schema_dot_org: bool = False,
                        ) -> str:
         """
         Convert plain identifier to full URL
+        :param plain_id: str, identifier to expand
+        :param lookup_graph: Union[GraphIndex, List[Dict]], graph to search for rdfs:label matches.
+            Pass a GraphIndex to avoid re-indexing a list on every call
+        :param expand_schema_dot_org: bool, expand schema.org identifiers
         """
         # Don't process URL
-        if not re.match(r'http(s)?://', plain_id):
+        if not URL_PATTERN.match(plain_id):
 
             # Check cache
             if new_id := self.expanded_ids.get(plain_id):
+                self.stats.count('cache_hit')
                 return new_id
 
             new_id = plain_id
 
             # Check lookup graph for @id with context
-            if not re.match(r'(\w+):(\w+)', new_id):  # No context to expand
-                for graph in lookup_graph:
-                    if graph["rdfs:label"] == new_id:
-                        new_id = graph["@id"]
-                        break
+            if not (curie := split_curie(new_id)):  # No context to expand
+                new_id = GraphIndex.of(lookup_graph).id_for_label(new_id) or new_id
+                curie = split_curie(new_id)
 
             # Expand context if provided
-            if context_match := re.match(r'(\w+):(\w+)', new_id):
+            if curie:
+                self.stats.count('label_hit' if new_id != plain_id else 'prefix_expansion')
+                prefix, suffix = curie
+
                 # Try overrides first
-                if prefix_override := CONTEXT_OVERRIDES.get(context_match.group(1)):
-                    return f'{prefix_override}{context_match.group(2)}'
+                if prefix_override := CONTEXT_OVERRIDES.get(prefix):
+                    return f'{prefix_override}{suffix}'
 
                 # Don't expand schema.org unless forced
-                if context_match.group(1) == self.schema_org_context and not expand_schema_dot_org:
-                    new_id = context_match.group(2)
-                else:
-                    new_id = f'{self.context[context_match.group(1)]}{context_match.group(2)}'
+                if prefix in self.schema_org_context and not expand_schema_dot_org:
+                    new_id = suffix
+                elif prefix in self.context:
+                    new_id = f'{self.context[prefix]}{suffix}'
+                else:  # Terms can be used as prefixes too (JSON-LD 1.0)
+                    new_id = f'{self.compiled_context.terms[prefix]}{suffix}'
 
                 self.expanded_ids[plain_id] = new_id
                 return new_id
 
-            # Try to guess context as a last resort (Risky?)
-            for context_name, context_prefix in self.context.items():
-
-                # Ignore any prefix ending with "#". These will always return status_code = 200 even on lookup failure
-                if context_prefix[-1] == '#':
-                    continue
-
-                new_id = f'{context_prefix}{plain_id}'
+            # Expand terms defined by the context, or relative to its @vocab
+            if (new_id := self.compiled_context.expand_term(plain_id)) is not None:
+                self.stats.count('context_term')
+                self.expanded_ids[plain_id] = new_id
+                return new_id
 
+            # Try to guess context as a last resort (Risky?)
+            probe_failed = False
+            for context_name, new_id in self.guess_candidates(plain_id):
                 # Special case for bioschemas because a failed lookup will still return a 200 response
                 if context_name == 'bioschemas':
-                    for bioschemas_class in self.bioschemas["@graph"]:
-                        if bioschemas_class["@id"] == f"{context_name}:{plain_id}":
-                            return new_id
-                else:
-                    response = requests.get(new_id, allow_redirects=True)
-                    if response.status_code == 200:
+                    if self.in_bioschemas(plain_id):
+                        self.stats.count('bioschemas_hit')
                         self.expanded_ids[plain_id] = new_id
                         return new_id
+                elif self.url_exists(new_id):
+                    self.stats.count('guess_resolved')
+                    self.expanded_ids[plain_id] = new_id
+                    return new_id
+                elif new_id in self.probe_errors:
+                    probe_failed = True
+
+            self.stats.count('unresolved')
+            if probe_failed:  # Not memoized, so that it's guessed again once the network is back
+                return plain_id
+        else:
+            self.stats.count('url')
 
         # No change
         self.expanded_ids[plain_id] = plain_id
         return plain_id
 
+    def forget_probe_errors(self) -> None:
+        """
+        Forget URL probe errors, the classes built after them and the identifiers left unexpanded, so that a resident
+        converter, e.g. in watch mode, tries to expand them again in its next translation
+        """
+        self.probe_errors.clear()
+        self.unverified_classes.clear()
+        self.expanded_ids = {plain_id: new_id for plain_id, new_id in self.expanded_ids.items() if new_id != plain_id}
+
+    def guess_candidates(self, plain_id: str) -> Iterator[Tuple[str, str]]:
+        """
+        Generate (context_name, candidate_url) pairs to try when guessing the context of a plain identifier
+        """
+        for context_name, context_prefix in self.context.items():
+            # Ignore any prefix ending with "#". These will always return status_code = 200 even on lookup failure
+            if context_prefix[-1] == '#':
+                continue
+
+            yield context_name, f'{context_prefix}{plain_id}'
+
+    def in_bioschemas(self, plain_id: str) -> bool:
+        """
+        Return True if plain_id is defined in the BioSchemas graph
+        """
+        return plain_id in self.bioschemas_index.terms('bioschemas')
+
+    @property
+    def bioschemas(self) -> Dict:
+        """BioSchemas graph, loaded on first use"""
+        if self._bioschemas is not None:
+            return self._bioschemas
+        return self.vocabulary.load(self.offline)[0]
+
+    @property
+    def bioschemas_index(self) -> GraphIndex:
+        """Index of the BioSchemas graph, built on first use"""
+        if self._bioschemas is None:
+            if self.vocabulary.version_key is None:  # Not loaded yet
+                with self.stats.phase('bioschemas'):
+                    return self.vocabulary.load(self.offline)[1]
+            return self.vocabulary.load(self.offline)[1]
+
+        if self._bioschemas_index is None:
+            with self.stats.phase('bioschemas'):
+                self._bioschemas_index = GraphIndex(self._bioschemas["@graph"])
+        return self._bioschemas_index
+
+    def needs_guess(self,
+                    plain_id: str,
+                    lookup_graph: Union[GraphIndex, List[Dict]] = [],
+                    ) -> bool:
+        """
+        Return True if expand_context would have to guess the context of plain_id
+        """
+        if URL_PATTERN.match(plain_id) or plain_id in self.expanded_ids:
+            return False
+
+        if split_curie(plain_id) or self.compiled_context.expand_term(plain_id) is not None:
+            return False
+
+        return GraphIndex.of(lookup_graph).id_for_label(plain_id) is None
+
+    def prefetch(self,
+                 input_json_schema: Optional[Dict] = None,
+                 max_workers: int = DEFAULT_PREFETCH_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 ) -> Dict[str, Optional[bool]]:
+        """
+        Concurrently probe every candidate URL translate() may need to guess, storing results in
+        self.resolution_cache so that translation itself doesn't wait on the network
+        :param input_json_schema: Optional[Dict], defaults to self.input_json_schema
+        :param max_workers: int, maximum number of concurrent probes
+        :param per_host_limit: int, maximum number of concurrent probes per host
+        :return: Dict[str, Optional[bool]], probe results by URL. None for network errors
+        """
+        if self.offline:
+            return {}
+
+        if input_json_schema is None:
+            input_json_schema = self.input_json_schema
+
+        return self.prefetch_identifiers(collect_identifiers(input_json_schema, PROPERTY_MAPPING),
+                                         GraphIndex(input_json_schema.get("@graph", [])),
+                                         max_workers=max_workers,
+                                         per_host_limit=per_host_limit,
+                                         )
+
+    def prefetch_identifiers(self,
+                             identifiers: Iterable[str],
+                             lookup_graph: Union[GraphIndex, List[Dict]],
+                             max_workers: int = DEFAULT_PREFETCH_WORKERS,
+                             per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                             ) -> Dict[str, Optional[bool]]:
+        """
+        Concurrently probe the candidate URLs for those identifiers whose context would have to be guessed
+        :param identifiers: Iterable[str], identifiers to be expanded
+        :param lookup_graph: Union[GraphIndex, List[Dict]], graph searched for rdfs:label matches
+        :param max_workers: int, maximum number of concurrent probes
+        :param per_host_limit: int, maximum number of concurrent probes per host
+        :return: Dict[str, Optional[bool]], probe results by URL. None for network errors
+        """
+        if self.offline:
+            return {}
+
+        lookup_graph = GraphIndex.of(lookup_graph)
+        candidate_urls = []
+        for plain_id in identifiers:
+            if not self.needs_guess(plain_id, lookup_graph):
+                continue
+
+            for context_name, candidate_url in self.guess_candidates(plain_id):
+                if context_name == 'bioschemas':
+                    if self.in_bioschemas(plain_id):
+                        break  # Found without probing any further candidates
+                elif candidate_url not in candidate_urls:
+                    candidate_urls.append(candidate_url)
+
+        with self.stats.phase('prefetch'):
+            results = resolve_urls(self.resolution_cache.missing(candidate_urls),
+                                   self.resolution_cache,
+                                   session=self.session,
+                                   max_workers=max_workers,
+                                   per_host_limit=per_host_limit,
+                                   timeout=PROBE_TIMEOUT,
+                                   stats=self.stats,
+                                   )
+        # Probes made again by class pool processes aren't seen here, so count their likely errors now
+        self.probe_errors.update(url for url, exists in results.items() if exists is None)
+        return results
+
+    @property
+    def session(self) -> 'requests.Session':
+        """Pooled HTTP session reused for all URL probes"""
+        if self._session is None:
+            self._session = new_session()
+        return self._session
+
+    def url_exists(self, url: str) -> bool:
+        """
+        Return True if URL resolves with a 200 response. Results are cached in self.resolution_cache.
+        In offline mode, uncached URLs are assumed not to resolve.
+        Network errors are treated as a failed lookup but not cached.
+        """
+        if (exists := self.resolution_cache.get(url)) is not None:
+            return exists
+
+        if self.offline:
+            return False
+
+        start_time = time.perf_counter()
+        exists = probe_url(self.session, url, PROBE_TIMEOUT)
+        self.stats.record_probe(exists, time.perf_counter() - start_time)
+        if exists is None:
+            self.probe_errors.add(url)
+            return False
+
+        self.resolution_cache.put(url, exists)
+        return exists
+
     def convert_type_def(self,
                          type_definitions: Union[Dict, List[Dict]],
-                         lookup_graph: List[Dict],
+                         lookup_graph: Union[GraphIndex, List[Dict]],
                          ) -> List[Dict]:
         """
-        Convert JSONschema type definition into a Crate-O type definition
+        Convert JSONschema type definition into a Crate-O type definition. Identical type definitions are only
+        converted once, and copies of the first result returned for the rest
+        """
+        type_key = definition_key(type_definitions)
+        if (result_list := self.type_definition_cache.get(type_key)) is None:
+            with self.stats.phase('convert_type_def'):
+                result_list = [type_reference.to_dict()
+                               for type_reference in self._convert_type_def(type_definitions, lookup_graph)]
+            if type_key is not None:
+                self.type_definition_cache[type_key] = result_list
+        return [dict(result) for result in result_list]
+
+    def _convert_type_def(self,
+                          type_definitions: Union[Dict, List[Dict]],
+                          lookup_graph: Union[GraphIndex, List[Dict]],
+                          ) -> List[TypeReference]:
+        """
+        Convert JSONschema type definition into Crate-O types without memoization or copying definitions.
+        Nested definitions (array items, @type dicts and oneOf/anyOf subtypes) are walked with an explicit stack
+        rather than recursively, so deeply nested definitions can't exceed the recursion limit, and definitions are
+        never modified. The description of a oneOf/anyOf definition replaces those of its subtypes, as if it had been
+        copied into each of them
         """
         result_list = []
 
-        # Allow for multiple type definitions
-        if type(type_definitions) == dict:
-            type_definitions = [type_definitions]
+        # Definitions still to convert, as (type_definition, inherited_description, None), and markers
+        # (None, None, definition_id) leaving a definition once its nested definitions have been converted. Popped
+        # from the end, so nested definitions are pushed in reverse to convert them in order
+        stack: List[Tuple[Union[Dict, List[Dict], None], Optional[str], Optional[int]]] = [
+            (type_definitions, None, None)]
+        path = set()  # ids of the definitions containing the current one, to detect cycles
+
+        while stack:
+            type_definition, inherited_description, leaving_id = stack.pop()
+            if leaving_id is not None:
+                path.discard(leaving_id)
+                continue
+
+            # Allow for multiple type definitions
+            if type(type_definition) != dict:
+                nested = [(list_definition, None) for list_definition in type_definition]
 
-        for type_definition in type_definitions:
-            if type_ref := type_definition.get("$ref"):  # Reference to class
-                type_value = re.match(
-                    r"#/definitions/(.*)",
-                    type_ref
-                ).group(1)
-                # Capitalise first letter without changing camel case
-                type_value = f'{type_value[0].upper()}{type_value[1:]}'
-                result_list.append({"type": type_value})
+            elif type_ref := type_definition.get("$ref"):  # Reference to class
+                result_list.append(self.reference_type(type_ref))
+                continue
 
             elif type_value := type_definition.get("@type", type_definition.get("type")):
                 if type(type_value) == str:
                     if type_value == "array":
-                        # Recursive call to process array type
-                        result_list += self.convert_type_def(type_definition["items"], lookup_graph)
+                        nested = [(type_definition["items"], None)]
                     else:  # Simple type, e.g. "string"
-                        result = dict(type_definition)
-
                         # Check for two type definitions as found in computationalWorkflow
-                        if set(["@type", "type"]).issubset(set(result.keys())):
-                            result["type"] = result["@type"]
-                            del result["@type"]
+                        if "@type" in type_definition and "type" in type_definition:
+                            type_value = type_definition["@type"]
+                        else:
+                            type_value = type_definition["type"]
 
                         # Map type name if required
-                        result["type"] = TYPE_MAPPING.get(result["type"], result["type"])
-                        result_list.append(result)
+                        result_list.append(TypeReference(TYPE_MAPPING.get(type_value, type_value),
+                                                         type_definition,
+                                                         description=inherited_description))
+                        continue
                 elif type(type_value) == dict:
-                    result_list += self.convert_type_def(type_value, lookup_graph)
+                    nested = [(type_value, None)]
+                else:
+                    continue
 
             # "oneOf" and "anyOf" both contain list of type definitions. Only differ in cardinality
             elif subtype_list := type_definition.get("oneOf") or type_definition.get("anyOf"):
-                for subtype_definition in subtype_list:
-                    if description := type_definition.get("description"):
-                        subtype_definition["description"] = re.sub(r'\<.*?\>', '', description)  # Strip HTML tags
-                    result_list += self.convert_type_def(subtype_definition, lookup_graph)
+                if inherited_description is None:
+                    inherited_description = type_definition.get("description")
+                subtype_description = strip_html(inherited_description) if inherited_description else None
+                nested = [(subtype_definition, subtype_description) for subtype_definition in subtype_list]
 
             else:
                 raise Exception(f"Unrecognised type_definition {type_definition}")
 
+            definition_id = id(type_definition)
+            if definition_id in path:
+                raise Exception(f"Circular type_definition {type_definition}")
+            path.add(definition_id)
+            stack.append((None, None, definition_id))
+            stack += [(nested_definition, nested_description, None)
+                      for nested_definition, nested_description in reversed(nested)]
+
         return result_list
 
+    def reference_type(self, type_ref: str) -> TypeReference:
+        """
+        Return the Crate-O type referenced by a JSONschema $ref: the class translated from the referenced
+        definition, named after it. Memoized, since the same references are found in many properties
+        """
+        if (type_reference := self.reference_types.get(type_ref)) is None:
+            if not (ref_match := DEFINITION_REF_PATTERN.match(type_ref)):
+                raise Exception(f"Unrecognised $ref {type_ref}")
+            type_value = ref_match.group(1)
+            # Capitalise first letter without changing camel case
+            type_reference = self.reference_types[type_ref] = TypeReference(
+                f'{type_value[0].upper()}{type_value[1:]}')
+        return type_reference
+
     def property2input(self,
                        property_name: str,
                        property_values: Dict,
-                       lookup_graph: List[Dict],
+                       lookup_graph: Union[GraphIndex, List[Dict]],
                        input_required: bool = False,
-                       ) -> Dict:
+                       ) -> CrateOInput:
         """
         Convert a BioSchemas definition into a Crate-O class definition
         :param property_name: str, Name of property
         :param property_values: Dict,
-        :param lookup_graph: List[Dict],
+        :param lookup_graph: Union[GraphIndex, List[Dict]],
         :param input_required: bool = False,
         :return: crateo_input
         """
-        type_dict_list = self.convert_type_def(property_values, lookup_graph)
-        type_list = list(set([type_dict["type"] for type_dict in type_dict_list]))
-        type_list = sorted([type_value.split(':')[-1] for type_value in type_list])  # Strip context prefixes
-        # Strip HTML tags
-        help_value = re.sub(r'\<.*?\>', '',
-                            (
-                                    ', '.join(
-                                        sorted(set([
-                                            type_dict.get("description")
-                                            for type_dict in type_dict_list
-                                            if type_dict.get("description")
-                                        ]))
-                                    )
-                                    or
-                                    ', '.join(
-                                        sorted(set([
-                                            type_dict.get("format")
-                                            for type_dict in type_dict_list
-                                            if type_dict.get("format")
-                                        ]))
-                                    )
-                            )
-                            )
-
-        crateo_input = {
-            "id": self.expand_context(PROPERTY_MAPPING.get(property_name, property_name),
-                                      lookup_graph,
-                                      expand_schema_dot_org=True),  # Force expansion of schema.org identifier
-            "name": PROPERTY_MAPPING.get(property_name, property_name),
-            "label": re.sub("([a-z])([A-Z])", "\g<1> \g<2>", property_name).title(),  # Expand camel case to spaces
-            "help": help_value,
-            "required": input_required,
-            "multiple": property_is_multiple(property_values),
-            "type": type_list,
-        }
+        type_list, help_value, multiple = self.input_types(property_values, lookup_graph)
+
+        crateo_input = CrateOInput(
+            id=self.expand_context(PROPERTY_MAPPING.get(property_name, property_name),
+                                   lookup_graph,
+                                   expand_schema_dot_org=True),  # Force expansion of schema.org identifier
+            name=PROPERTY_MAPPING.get(property_name, property_name),
+            label=property_label(property_name),
+            help=help_value,
+            required=input_required,
+            multiple=multiple,
+            type=type_list,  # Shared by all inputs with the same property definition
+        )
 
         return crateo_input
 
+    def input_types(self,
+                    property_values: Dict,
+                    lookup_graph: Union[GraphIndex, List[Dict]],
+                    ) -> Tuple[Tuple[str, ...], str, bool]:
+        """
+        Return the Crate-O types, help text and multiplicity of a property definition. Computed once for each
+        distinct definition, e.g. {"$ref": "#/definitions/organization"} shared by many properties
+        :param property_values: Dict, JSONschema property definition
+        :param lookup_graph: Union[GraphIndex, List[Dict]]
+        :return: Tuple[Tuple[str, ...], str, bool], sorted type names, help text, True if property can hold multiple
+            values
+        """
+        property_key = definition_key(property_values)
+        if input_types := self.input_type_cache.get(property_key):
+            return input_types
+
+        with self.stats.phase('convert_type_def'):
+            type_references = self._convert_type_def(property_values, lookup_graph)
+        type_list = tuple(sorted([sys.intern(type_value.split(':')[-1])  # Strip context prefixes
+                                  for type_value in set(type_reference.type for type_reference in type_references)]))
+        help_value = strip_html(
+            ', '.join(sorted(set(type_reference.description
+                                 for type_reference in type_references if type_reference.description)))
+            or
+            ', '.join(sorted(set(type_reference.format
+                                 for type_reference in type_references if type_reference.format)))
+        )
+
+        input_types = (type_list, help_value, property_is_multiple(property_values))
+        if property_key is not None:
+            self.input_type_cache[property_key] = input_types
+        return input_types
+
     def definition2class(self,
                          definition_name: str,
                          definition_values: Dict,
-                         lookup_graph: List[Dict],
-                         ) -> Tuple[str, Dict]:
+                         lookup_graph: Union[GraphIndex, List[Dict]],
+                         ) -> Tuple[str, CrateOClass]:
         """
         Convert a BioSchemas definition into a Crate-O class definition
         :param definition_name: str
         :param definition_values: Dict
-        :param lookup_graph: List[Dict]
-        :return: Tuple[str, Dict], crateo_class_name, crateo_class
+        :param lookup_graph: Union[GraphIndex, List[Dict]]
+        :return: Tuple[str, CrateOClass], crateo_class_name, crateo_class
         """
         class_name = f'{definition_name[0].upper()}{definition_name[1:]}'  # Capitalised short id
 
@@ -336,11 +772,10 @@ class JSONSchema2CrateO:
         if type(superclasses) == str:
             superclasses = [superclasses]
 
-        crateo_class = {
-            "definition": "override",
-            # "id": class_type,  #TODO: Check if this is valid
-            "subClassOf": [self.expand_context(superclass, lookup_graph) for superclass in superclasses],
-            "inputs": [
+        crateo_class = CrateOClass(
+            # id=class_type,  #TODO: Check if this is valid
+            subClassOf=[self.expand_context(superclass, lookup_graph) for superclass in superclasses],
+            inputs=[
                 self.property2input(property_name,
                                     property_values,
                                     lookup_graph,
@@ -349,80 +784,358 @@ class JSONSchema2CrateO:
                 for property_name, property_values in properties.items()
                 if property_name not in ['identifier', '@id']
             ]
-        }
+        )
+
+        return sys.intern(class_name), crateo_class
+
+    def subgraph2class(self,
+                       subgraph: Dict,
+                       lookup_graph: Union[GraphIndex, List[Dict]],
+                       ) -> Tuple[str, CrateOClass]:
+        """
+        Convert a BioSchemas @graph entry with $validation into a Crate-O class definition
+        :param subgraph: Dict
+        :param lookup_graph: Union[GraphIndex, List[Dict]]
+        :return: Tuple[str, CrateOClass], crateo_class_name, crateo_class
+        """
+        class_id = f'{subgraph["rdfs:label"][0].upper()}{subgraph["rdfs:label"][1:]}'  # Capitalised short id
+        input_validation = subgraph["$validation"]
+
+        superclasses = None  # Left out of the class definition if there are none
+        if rdfs_superclasses := subgraph.get("rdfs:subClassOf"):
+            if type(rdfs_superclasses) == dict:
+                rdfs_superclasses = [rdfs_superclasses]
+            superclasses = [self.expand_context(rdfs_superclass["@id"], lookup_graph)
+                            for rdfs_superclass in rdfs_superclasses]
+
+        inputs = [
+            self.property2input(property_name,
+                                property_values,
+                                lookup_graph,
+                                (property_name in input_validation.get("required", [])),
+                                )
+            for property_name, property_values in input_validation["properties"].items()
+            if property_name not in ['identifier', '@id']
+        ]
+
+        return sys.intern(class_id), CrateOClass(subClassOf=superclasses, inputs=inputs)
+
+    def environment_hash(self, lookup_graph: GraphIndex) -> str:
+        """
+        Hash of everything other than the class source definitions which affects translated classes
+        """
+        return content_hash(
+            __version__,
+            self.bioschemas_version(),
+            self.context,
+            self.compiled_context.terms,
+            self.compiled_context.vocab,
+            sorted((label, node.get("@id")) for label, node in lookup_graph.by_label.items()),
+            TYPE_MAPPING,
+            PROPERTY_MAPPING,
+            CONTEXT_OVERRIDES,
+        )
+
+    def cached_class(self,
+                     class_key: str,
+                     class_manifest: Dict[str, Tuple[str, Dict]],
+                     build_class: Callable[[], Tuple[str, Dict]],
+                     ) -> Tuple[str, Dict]:
+        """
+        Reuse the class built from identical source content earlier in the current run, e.g. a definition shared by
+        merged specs, or by a previous run if incremental, otherwise build it
+        :param class_key: str, content hash of the class source definition
+        :param class_manifest: Dict[str, Tuple[str, Dict]], classes built by the current run
+        :param build_class: Callable[[], Tuple[str, Dict]], function building (crateo_class_name, crateo_class)
+        :return: Tuple[str, Dict], crateo_class_name, crateo_class
+        """
+        if cached := class_manifest.get(class_key):
+            self.shared_classes += 1
+            return cached
+
+        if self.incremental and (cached := self.class_cache.get(class_key)):
+            self.reused_classes += 1
+            class_manifest[class_key] = cached
+            return cached
+
+        self.rebuilt_classes += 1
+        class_manifest[class_key] = build_class()
+        if self.probe_errors:  # Identifiers may have been left unexpanded which resolve once the network is back
+            self.unverified_classes.add(class_key)
+        return class_manifest[class_key]
+
+    def build_classes(self,
+                      class_builder: ClassBuilder,
+                      class_sources: List[ClassSource],
+                      class_manifest: Dict[str, Tuple[str, Dict]],
+                      ) -> Dict[str, Tuple[str, CrateOClass]]:
+        """
+        Concurrently build the classes cached_class() would build for class_sources, i.e. those with distinct keys
+        which haven't been built by this run or, if incremental, by the previous one
+        :param class_builder: ClassBuilder, pool building the classes
+        :param class_sources: List[ClassSource], sources of the classes of an @graph entry
+        :param class_manifest: Dict[str, Tuple[str, Dict]], classes built by the current run
+        :return: Dict[str, Tuple[str, CrateOClass]], (crateo_class_name, crateo_class) by class key
+        """
+        pending_sources = {}
+        for class_source in class_sources:
+            if class_source.key not in class_manifest and not (self.incremental and
+                                                               class_source.key in self.class_cache):
+                pending_sources.setdefault(class_source.key, class_source)
+
+        return dict(zip(pending_sources, class_builder.map(list(pending_sources.values()))))
+
+    def load_manifest(self, manifest_path: Optional[str] = None) -> None:
+        """
+        Load classes built by a previous run for reuse by an incremental translation
+        :param manifest_path: Optional[str], defaults to the manifest alongside the output profile
+        """
+        manifest_path = manifest_path or manifest_path_for(self.output_crateo_profile_path)
+        # Classes are discarded by translate() if built in a different environment
+        self.class_cache_environment, self.class_cache = read_manifest(manifest_path)
 
-        return class_name, crateo_class
+    def bioschemas_version(self) -> Optional[str]:
+        """
+        Identify the BioSchemas vocabulary version without loading it, so that a profile can be found in the artifact
+        store without the vocabulary being available
+        :return: Optional[str], None if no copy of the vocabulary has been downloaded yet
+        """
+        if self._bioschemas is not None:
+            return content_hash(self._bioschemas)
+        return self.vocabulary.local_version_key()
+
+    def artifact_key(self) -> Optional[str]:
+        """
+        Key of the output profile in the artifact store: a hash of the input content, package version, mapping tables,
+        the Dataset class and default input groups, the BioSchemas vocabulary version, and the settings which change
+        the output. URL probe results are not part of the key, so stored profiles are reused even if they have changed.
+        Clear the artifact store to pick up such changes
+        :return: Optional[str], None if the input content is unknown because it was supplied already parsed
+        """
+        if not self.input_digest:
+            return None
+
+        return content_hash(
+            __version__,
+            self.input_digest,
+            TYPE_MAPPING,
+            PROPERTY_MAPPING,
+            CONTEXT_OVERRIDES,
+            ENABLED_CLASSES,
+            *[file_digest(os.path.join(SCRIPT_DIR, file_name)) for file_name in BUNDLED_RESOURCES.values()],
+            self.bioschemas_version(),
+            self.offline,
+            self.compact,
+            self.lookup_url,
+        )
+
+    def fetch_artifact(self) -> bool:
+        """
+        Copy a previously generated profile for the same input and settings to self.output_crateo_profile_path
+        :return: bool, True if found
+        """
+        if not (self.artifact_store and (artifact_key := self.artifact_key())):
+            return False
+
+        self.artifact_hit = self.artifact_store.fetch(artifact_key, self.output_crateo_profile_path)
+        return self.artifact_hit
+
+    def store_artifact(self) -> None:
+        """
+        Keep the profile written to self.output_crateo_profile_path for reuse by later conversions, unless URL probes
+        failed with network errors, after which a later conversion might expand more identifiers. Identifiers left
+        unexpanded because their probes found nothing are kept, as a later conversion would come to the same result
+        """
+        if self.probe_errors or self.stats.http_probes["error"]:
+            return
+
+        if self.artifact_store and (artifact_key := self.artifact_key()):
+            self.artifact_store.put(artifact_key, self.output_crateo_profile_path)
 
     def translate(self, input_json_schema: Dict) -> Dict:
         """
         Function to translate input JSON schema to an output Crate-O profile
         :param input_json_schema:
-        :return: output_crateo_profile
+        :return: output_crateo_profile, made of dicts and lists
+        """
+        return plain(self._translate(input_json_schema))
+
+    def _translate(self, input_json_schema: Dict) -> Dict:
+        """Translate input_json_schema, returning the profile with its classes and inputs in the compact model"""
+        with self.stats.phase('translate'):
+            input_graph = GraphIndex(input_json_schema["@graph"])  # Index once for all lookups
+            return self.translate_graph(input_graph, input_graph)
+
+    def translate_stream(self,
+                         input_json_schema_path: Optional[str] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         ) -> Dict:
+        """
+        Translate a JSONschema file or URL without loading the whole document. The @graph is streamed twice: once
+        to read the @context and index the "@id" and "rdfs:label" of every entry, then again to translate each
+        entry as it is parsed. Remote documents are streamed from their local mirror copy.
+        :param input_json_schema_path: Optional[str], defaults to self.input_json_schema_path
+        :param chunk_size: int, characters read at a time
+        :return: output_crateo_profile, made of dicts and lists
+        """
+        return plain(self._translate_stream(input_json_schema_path, chunk_size))
+
+    def _translate_stream(self,
+                          input_json_schema_path: Optional[str] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          ) -> Dict:
+        """Stream and translate a JSONschema, returning the profile with its classes and inputs in the compact model"""
+        if input_json_schema_path:
+            self.input_json_schema_path = input_json_schema_path
+
+        assert self.input_json_schema_path, 'No input_json_schema_path provided'
+
+        if URL_PATTERN.match(self.input_json_schema_path):
+            input_file = open(self.mirror.fetch(self.input_json_schema_path, offline=self.offline).path, 'r',
+                              encoding='utf8')
+        else:
+            input_file = open(self.input_json_schema_path, 'r')
+
+        with input_file:
+            with self.stats.phase('load'):
+                input_stream = JSONLDStream(input_file, chunk_size)
+                input_graph = GraphIndex()
+                identifiers = {}  # Ordered set
+                for subgraph in input_stream.nodes():
+                    input_graph.add({key: subgraph[key] for key in ["@id", "rdfs:label"] if key in subgraph})
+                    identifiers.update(dict.fromkeys(collect_identifiers({"@graph": [subgraph]},
+                                                                         PROPERTY_MAPPING)))
+
+            self.set_input_json_schema(input_stream.header)
+            if self.prefetch_workers:
+                self.prefetch_identifiers(identifiers, input_graph, max_workers=self.prefetch_workers)
+
+            input_file.seek(0)
+            with self.stats.phase('translate'):
+                return self.translate_graph(iter_graph(input_file, chunk_size), input_graph)
+
+    def translate_merged(self, input_json_schemas: List[Dict]) -> Dict:
+        """
+        Translate several JSONschemas into a single Crate-O profile, e.g. ComputationalTool and Dataset specs for one
+        Crate-O deployment. Identifiers are looked up in the @graph of every spec, and definitions shared by the specs
+        (e.g. organization, person) are only converted once. Classes are merged by merge_profiles()
+        :param input_json_schemas: List[Dict], JSONschema documents
+        :return: output_crateo_profile, made of dicts and lists
+        """
+        assert input_json_schemas, 'No input_json_schemas provided'
+
+        with self.stats.phase('translate'):
+            input_graph = GraphIndex(node  # Index once for all lookups
+                                     for input_json_schema in input_json_schemas
+                                     for node in input_json_schema["@graph"])
+
+            # Expansions and classes built for one spec are only reused by specs with the same @context
+            expanded_ids = {}
+            class_manifests = {}
+            crateo_profiles = []
+            for input_json_schema in input_json_schemas:
+                self.set_input_json_schema(input_json_schema)
+                self.expanded_ids = expanded_ids.setdefault(
+                    content_hash(self.context, self.compiled_context.terms, self.compiled_context.vocab), {})
+                class_manifest = class_manifests.setdefault(self.environment_hash(input_graph), {})
+                crateo_profiles.append(self.translate_graph(input_json_schema["@graph"], input_graph, class_manifest))
+
+            crateo_profile = merge_profiles(crateo_profiles)
+        return plain(crateo_profile)
+
+    def translate_graph(self,
+                        subgraphs: Iterable[Dict],
+                        input_graph: GraphIndex,
+                        class_manifest: Optional[Dict[str, Tuple[str, Dict]]] = None,
+                        ) -> Dict:
+        """
+        Translate @graph entries to an output Crate-O profile. Entries are processed one at a time, so subgraphs may
+        be a generator producing them as they are parsed
+        :param subgraphs: Iterable[Dict], @graph entries
+        :param input_graph: GraphIndex, index of the whole @graph used for rdfs:label lookups. Only the "@id" and
+            "rdfs:label" of each entry are needed
+        :param class_manifest: Optional[Dict[str, Tuple[str, Dict]]], classes already built in the same environment
+            by this run, which are reused rather than rebuilt. Updated with the classes built
+        :return: output_crateo_profile, with its classes and inputs in the compact model (see model.py)
         """
         crateo_profile = {}
         root_dataset_id = None
 
-        input_graph = input_json_schema["@graph"]
-
         # Add compulsory Dataset class
         dataset_class_id = "Dataset"  # Use short name
         # dataset_class_id = self.expand_context('Dataset', input_graph)  # Expand full URL
-        crateo_classes = {dataset_class_id: DATASET_CLASS}
+        crateo_classes = {dataset_class_id: bundled_resource("DATASET_CLASS")}
+        lookups = {}  # Crate-O lookup configuration by class name
 
         # # Expand type identifiers
         # for input_dict in DATASET_CLASS["inputs"]:
         #     input_dict["type"] = [self.expand_context(input_type, input_graph)
         #                           for input_type in input_dict["type"]]
 
-        for subgraph in input_graph:
-            class_dict = {
-                "definition": "override",
-            }
-            class_id = f'{subgraph["rdfs:label"][0].upper()}{subgraph["rdfs:label"][1:]}'  # Capitalised short id
-            # class_id = self.expand_context(subgraph["@id"], input_graph)  # Full URL
-
-            if rdfs_superclasses := subgraph.get("rdfs:subClassOf"):
-                if type(rdfs_superclasses) == dict:
-                    rdfs_superclasses = [rdfs_superclasses]
-                class_dict["subClassOf"] = [self.expand_context(rdfs_superclass["@id"], input_graph)
-                                            for rdfs_superclass in rdfs_superclasses]
-
-            if input_validation := subgraph.get("$validation"):
-                properties = input_validation["properties"]
-
-                # Only add classes for definitions with properties
-                # Assume first class in spec is the root dataset
-                if not root_dataset_id:
-                    root_dataset_id = class_id
-                    root_dataset_label = subgraph["rdfs:label"]
-
-                    crateo_profile["metadata"] = {
-                        "name": subgraph["rdfs:label"],
-                        "description": re.sub(r'\<.*?\>', '', subgraph["rdfs:comment"]),  # Strip HTML tags
-                        "version": "0.0.0"
-                    }
-
-                crateo_classes[class_id] = class_dict
-
-                class_dict["inputs"] = [
-                    self.property2input(property_name,
-                                        property_values,
-                                        input_graph,
-                                        (property_name in input_validation.get("required", [])),
-                                        )
-                    for property_name, property_values in properties.items()
-                    if property_name not in ['identifier', '@id']
-                ]
-
-                input_definitions = input_validation["definitions"]
-
-                # Create a class for every definition
-                for definition_name, definition_values in input_definitions.items():
-                    definition_class_name, definition_class = self.definition2class(definition_name, definition_values,
-                                                                                    input_graph)
-                    if definition_class:
-                        crateo_classes[definition_class_name] = definition_class
-                        # crateo_classes[self.expand_context(definition_class_name, input_graph)] = definition_class
+        environment_hash = self.environment_hash(input_graph)
+        if environment_hash != self.class_cache_environment:
+            self.class_cache = {}
+        if class_manifest is None:
+            class_manifest = {}
+
+        class_builder = None
+        if self.class_workers:
+            class_builder = ClassBuilder(self, input_graph, self.class_workers, self.class_processes)
+
+        try:
+            for subgraph in subgraphs:
+                class_id = f'{subgraph["rdfs:label"][0].upper()}{subgraph["rdfs:label"][1:]}'  # Capitalised short id
+                # class_id = self.expand_context(subgraph["@id"], input_graph)  # Full URL
+
+                if input_validation := subgraph.get("$validation"):
+                    # Only add classes for definitions with properties
+                    # Assume first class in spec is the root dataset
+                    if not root_dataset_id:
+                        root_dataset_id = class_id
+                        root_dataset_label = subgraph["rdfs:label"]
+
+                        crateo_profile["metadata"] = {
+                            "name": subgraph["rdfs:label"],
+                            "description": strip_html(subgraph["rdfs:comment"]),  # Strip HTML tags
+                            "version": "0.0.0"
+                        }
+
+                    # Hash the subgraph without its definitions, which are hashed separately
+                    class_sources = [ClassSource(content_hash('subgraph', without_definitions(subgraph)), None,
+                                                 subgraph)]
+                    class_sources += [ClassSource(content_hash('definition', definition_name, definition_values),
+                                                  definition_name, definition_values)
+                                      for definition_name, definition_values
+                                      in input_validation["definitions"].items()]
+
+                    built_classes = {}
+                    if class_builder:
+                        built_classes = self.build_classes(class_builder, class_sources, class_manifest)
+
+                    _class_id, crateo_classes[class_id] = self.cached_class(
+                        class_sources[0].key, class_manifest,
+                        lambda: built_classes.get(class_sources[0].key) or self.subgraph2class(subgraph, input_graph))
+
+                    # Create a class for every definition
+                    for class_source in class_sources[1:]:
+                        definition_class_name, definition_class = self.cached_class(
+                            class_source.key, class_manifest,
+                            lambda: built_classes.get(class_source.key) or self.definition2class(
+                                class_source.definition_name, class_source.values, input_graph))
+                        if definition_class:
+                            crateo_classes[definition_class_name] = definition_class
+                        if self.lookup_url and (lookup := definition_lookup(self.lookup_url, class_source.values)):
+                            lookups[definition_class_name] = lookup
+                            # crateo_classes[self.expand_context(definition_class_name, input_graph)] = \
+                            #     definition_class
+        finally:
+            if class_builder:
+                class_builder.shutdown()
+
+        # Classes from this run are reused by the next, unless built after a probe error
+        self.class_cache = {class_key: built_class for class_key, built_class in class_manifest.items()
+                            if class_key not in self.unverified_classes}
+        self.class_cache_environment = environment_hash
 
         # root_dataset_types = [root_dataset_id]  # Don't include Dataset class
         root_dataset_types = [dataset_class_id, root_dataset_id]  # Include both root dataset class and Dataset class
@@ -451,7 +1164,7 @@ class JSONSchema2CrateO:
         #         }
         # }
 
-        crateo_profile["inputGroups"] = INPUT_GROUPS
+        crateo_profile["inputGroups"] = bundled_resource("INPUT_GROUPS")
 
         # Use short class names
         crateo_profile["enabledClasses"] = [root_dataset_id] + [class_name
@@ -461,6 +1174,8 @@ class JSONSchema2CrateO:
         #                                                         for class_name in ENABLED_CLASSES]
 
         crateo_profile["classes"] = crateo_classes
+        if lookups:
+            crateo_profile["lookup"] = lookups
 
         return crateo_profile
 
@@ -474,7 +1189,12 @@ class JSONSchema2CrateO:
 
         assert self.output_crateo_profile_path, 'No output_crateo_profile_path provided'
 
-        with open(self.output_crateo_profile_path, 'w') as output_crateo_profile_file:
-            output_crateo_profile_file.write(json.dumps(self.output_crateo_profile, indent='\t'))
+        with self.stats.phase('write'):
+            serialization.dump(self.output_crateo_profile, self.output_crateo_profile_path, compact=self.compact)
+
+        if self.incremental:
+            write_manifest(manifest_path_for(self.output_crateo_profile_path),
+                           self.class_cache_environment,
+                           self.class_cache)
 
 
@@ -1,33 +1,377 @@
+import argparse
+import contextlib
+import json
 import os
 import sys
+from typing import Dict, List, Optional
 
 from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.artifacts import DEFAULT_MAX_BYTES, ArtifactStore
+from jsonschema2crateo.cache import DEFAULT_CACHE_DIR, DEFAULT_TTL, DEFAULT_NEGATIVE_TTL, ResolutionCache
+from jsonschema2crateo.fetch import Mirror, get_mirror
+from jsonschema2crateo.resolver import DEFAULT_PREFETCH_WORKERS
+from jsonschema2crateo.vocabulary import BIOSCHEMAS_URL, VocabularyNotFound, VocabularyStore, get_vocabulary
 
 # DEFAULT_PROFILE = './test_data/ComputationalTool_v1.1-DRAFT.json'
 DEFAULT_PROFILE = 'https://raw.githubusercontent.com/Australian-Text-Analytics-Platform/bioschemas_specifications/' \
                   'ATAP_Jupyter_Enhancements_proposed/ComputationalTool/jsonld/ComputationalTool_v1.1-DRAFT.json'
 
-def main():
-    # print(os.path.abspath(os.curdir))
-    if len(sys.argv) < 3:
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add resolution cache options shared by all commands"""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Directory for the resolution cache, downloaded JSONschemas and BioSchemas '
+                             f'vocabulary, and generated profiles (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-file',
+                        help='Persistent URL resolution cache (default: <cache-dir>/resolution_cache.sqlite)')
+    parser.add_argument('--no-cache', action='store_true', help='Only cache URL resolutions in memory for this run')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL / 86400,
+                        help='Days before a successful URL resolution is re-checked')
+    parser.add_argument('--cache-negative-ttl', type=float, default=DEFAULT_NEGATIVE_TTL / 86400,
+                        help='Days before a failed URL resolution is re-checked')
+    parser.add_argument('--offline', action='store_true',
+                        help='Never access the network. Resolve identifiers from the cache and local BioSchemas only')
+    parser.add_argument('--bioschemas', default=BIOSCHEMAS_URL, metavar='PATH_OR_URL',
+                        help=f'BioSchemas vocabulary (bioschemas.json), e.g. a local copy for offline use '
+                             f'(default: {BIOSCHEMAS_URL})')
+    parser.add_argument('--prefetch-workers', type=int, default=DEFAULT_PREFETCH_WORKERS,
+                        help='Number of concurrent URL probes made before translation. 0 to probe one at a time '
+                             'during translation')
+
+
+# Addresses listening on every interface, which clients can't connect to
+WILDCARD_HOSTS = ['', '0.0.0.0', '::']
+
+
+def add_lookup_url_argument(parser: argparse.ArgumentParser,
+                            default_help: str = 'none, no lookup section is added to profiles',
+                            ) -> None:
+    """Add the option wiring ontology-valued classes of translated profiles to a /lookup endpoint"""
+    parser.add_argument('--lookup-url',
+                        help=f'URL of the /lookup endpoint of a translation service (see "serve"). Classes of '
+                             f'definitions taking their values from an ontology, e.g. EdamOperation, are looked up '
+                             f'there by Crate-O (default: {default_help})')
+
+
+def add_artifact_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add options for the store of previously generated profiles"""
+    parser.add_argument('--no-artifact-cache', action='store_true',
+                        help='Always translate, rather than copying the profile previously generated from the same '
+                             'input and settings from <cache-dir>/artifacts')
+    parser.add_argument('--artifact-cache-size', type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2,
+                        help='Megabytes of previously generated profiles kept. Least recently used are removed first')
+
+
+def resolution_cache_from_args(args: argparse.Namespace) -> ResolutionCache:
+    return ResolutionCache(
+        path=None if args.no_cache else args.cache_file or os.path.join(args.cache_dir, 'resolution_cache.sqlite'),
+        ttl=args.cache_ttl * 86400,
+        negative_ttl=args.cache_negative_ttl * 86400,
+    )
+
+
+def vocabulary_from_args(args: argparse.Namespace) -> VocabularyStore:
+    return get_vocabulary(args.bioschemas, cache_dir=args.cache_dir)
+
+
+def mirror_from_args(args: argparse.Namespace) -> Mirror:
+    return get_mirror(os.path.join(args.cache_dir, 'mirror'))
+
+
+def artifact_store_from_args(args: argparse.Namespace) -> Optional[ArtifactStore]:
+    if args.no_artifact_cache:
+        return None
+    return ArtifactStore(os.path.join(args.cache_dir, 'artifacts'), max_bytes=int(args.artifact_cache_size * 1024 ** 2))
+
+
+def translate_main(argv: List[str]) -> int:
+    """Translate a single JSONschema into a Crate-O profile"""
+    parser = argparse.ArgumentParser(prog='python -m jsonschema2crateo',
+                                     description='Convert a BioSchemas JSON Schema into a Crate-O profile. '
+                                                 'Use "batch" as the first argument to translate many inputs, '
+                                                 '"merge" to combine several inputs into one profile, '
+                                                 '"validate" to check RO-Crates against a profile, '
+                                                 'or "serve" to run a translation service.')
+    parser.add_argument('input_json_schema_path', nargs='?', default=DEFAULT_PROFILE,
+                        help='Input JSONschema file or URL')
+    parser.add_argument('output_crateo_profile_path', nargs='?',
+                        help='Output Crate-O profile file (default: ../temp/test_output.json)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only rebuild classes whose source definitions changed since the last run, using the '
+                             'manifest stored alongside the output profile')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse the input @graph incrementally to limit memory use on very large inputs')
+    parser.add_argument('--class-workers', type=int, default=0,
+                        help='Number of pool workers building the classes of the input concurrently. The output is '
+                             'the same as when building them one at a time (default: 0, one at a time)')
+    parser.add_argument('--class-processes', action='store_true',
+                        help='Build classes in a process pool rather than a thread pool, for inputs with many '
+                             'definitions')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running, regenerating the output profile whenever the input changes')
+    parser.add_argument('--poll-interval', type=float, default=None,
+                        help='Seconds between checks for changes in watch mode '
+                             '(default: 1 for files, 30 for URLs, which are checked with conditional GETs)')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help='Seconds to wait for a burst of edits to finish before regenerating in watch mode')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write the output profile without indentation, for machine consumers')
+    parser.add_argument('--profile-report', nargs='?', const='-', metavar='REPORT_FILE',
+                        help='Write per-phase timings, expand_context outcomes, URL probe latencies and peak memory '
+                             'as JSON to REPORT_FILE, or to standard output if no file is given')
+    add_lookup_url_argument(parser)
+    add_cache_arguments(parser)
+    add_artifact_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.profile_report == '-':
+        # Progress messages go to standard error, so that standard output only holds the report
+        with contextlib.redirect_stdout(sys.stderr):
+            profile_report = translate_from_args(args)
+        print(json.dumps(profile_report, indent='\t'))
+    else:
+        profile_report = translate_from_args(args)
+        if profile_report:
+            with open(args.profile_report, 'w') as profile_report_file:
+                json.dump(profile_report, profile_report_file, indent='\t')
+    return 0
+
+
+def translate_from_args(args: argparse.Namespace) -> Optional[Dict]:
+    """
+    Translate a single JSONschema as set by the translate_main arguments, printing progress messages
+    :return: Optional[Dict], profile report if requested by --profile-report
+    """
+    output_crateo_profile_path = args.output_crateo_profile_path
+    if not output_crateo_profile_path:
         os.makedirs('../temp', exist_ok=True)
         output_crateo_profile_path = '../temp/test_output.json'
-    else:
-        output_crateo_profile_path = sys.argv[2]
 
-    if len(sys.argv) < 2:
-        input_json_schema_path = DEFAULT_PROFILE
-    else:
-        input_json_schema_path = sys.argv[1]
+    input_json_schema_path = args.input_json_schema_path
 
     print(f'Creating Crate-O profile "{output_crateo_profile_path}" from JSONschema "{input_json_schema_path}')
 
-    JSONSchema2CrateO(
-        input_json_schema_path,
-        output_crateo_profile_path
+    resolution_cache = resolution_cache_from_args(args)
+    converter = JSONSchema2CrateO(
+        None if args.watch else input_json_schema_path,
+        None if args.watch else output_crateo_profile_path,
+        vocabulary=vocabulary_from_args(args),
+        resolution_cache=resolution_cache,
+        offline=args.offline,
+        prefetch_workers=args.prefetch_workers,
+        incremental=args.incremental,
+        stream=args.stream,
+        compact=args.compact,
+        artifact_store=None if args.watch else artifact_store_from_args(args),
+        mirror=mirror_from_args(args),
+        class_workers=args.class_workers,
+        class_processes=args.class_processes,
+        lookup_url=args.lookup_url,
     )
 
+    if args.watch:
+        from jsonschema2crateo.watch import watch
+
+        print(f'Watching "{input_json_schema_path}" for changes. Press Ctrl+C to stop.')
+        converter.output_crateo_profile_path = output_crateo_profile_path
+        watch(converter, input_json_schema_path, poll_interval=args.poll_interval, debounce=args.debounce)
+    elif converter.artifact_hit:
+        print('Input and settings unchanged. Copied the previously generated profile')
+    elif args.incremental:
+        print(f'Classes: {converter.reused_classes} reused, {converter.rebuilt_classes} rebuilt')
+    print(f'Resolution cache: {resolution_cache.report()}')
+
     print('Finished.')
 
+    if not args.profile_report:
+        return None
+    profile_report = converter.stats.report()
+    profile_report["resolution_cache"] = resolution_cache.stats()
+    return profile_report
+
+
+def batch_main(argv: List[str]) -> int:
+    """Translate many JSONschemas into Crate-O profiles in one process"""
+    from jsonschema2crateo.batch import summarise, translate_batch
+
+    parser = argparse.ArgumentParser(prog='python -m jsonschema2crateo batch',
+                                     description='Translate a directory, glob, manifest file or list of '
+                                                 'JSONschemas into Crate-O profiles')
+    parser.add_argument('sources', nargs='+',
+                        help='Input directories, glob patterns, JSONschema files/URLs or manifest files')
+    parser.add_argument('-o', '--output-dir', required=True, help='Directory for output Crate-O profiles')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Number of pool workers')
+    parser.add_argument('--processes', action='store_true', help='Use a process pool instead of a thread pool')
+    add_cache_arguments(parser)
+    add_artifact_arguments(parser)
+    args = parser.parse_args(argv)
+
+    resolution_cache = resolution_cache_from_args(args)
+    results = translate_batch(args.sources, args.output_dir, workers=args.workers, use_processes=args.processes,
+                              vocabulary=vocabulary_from_args(args), resolution_cache=resolution_cache,
+                              offline=args.offline,
+                              prefetch_workers=args.prefetch_workers,
+                              artifact_store=artifact_store_from_args(args),
+                              mirror=mirror_from_args(args))
+    print(summarise(results))
+    if not args.processes:  # Counters from worker processes aren't collected
+        print(f'Resolution cache: {resolution_cache.report()}')
+
+    return 1 if any(result.error for result in results) else 0
+
+
+def merge_main(argv: List[str]) -> int:
+    """Translate several JSONschemas into a single Crate-O profile"""
+    parser = argparse.ArgumentParser(prog='python -m jsonschema2crateo merge',
+                                     description='Combine several BioSchemas JSONschemas (e.g. ComputationalTool and '
+                                                 'Dataset) into one Crate-O profile. Where specs define the same '
+                                                 'class, the first spec given wins and inputs only defined by later '
+                                                 'specs are added to it')
+    parser.add_argument('input_json_schema_paths', nargs='+', help='Input JSONschema files or URLs, in priority order')
+    parser.add_argument('-o', '--output', required=True, help='Output Crate-O profile file')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write the output profile without indentation, for machine consumers')
+    add_lookup_url_argument(parser)
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    print(f'Creating Crate-O profile "{args.output}" from JSONschemas {args.input_json_schema_paths}')
+
+    resolution_cache = resolution_cache_from_args(args)
+    converter = JSONSchema2CrateO(
+        vocabulary=vocabulary_from_args(args),
+        resolution_cache=resolution_cache,
+        offline=args.offline,
+        prefetch_workers=args.prefetch_workers,
+        compact=args.compact,
+        mirror=mirror_from_args(args),
+        lookup_url=args.lookup_url,
+    )
+
+    input_json_schemas = []
+    for input_json_schema_path in args.input_json_schema_paths:
+        converter.load(input_json_schema_path)
+        input_json_schemas.append(converter.input_json_schema)
+        if args.prefetch_workers:
+            converter.prefetch(max_workers=args.prefetch_workers)
+
+    converter.output_crateo_profile = converter.translate_merged(input_json_schemas)
+    converter.write(args.output)
+
+    print(f'Classes: {len(converter.output_crateo_profile["classes"])} merged, '
+          f'{converter.shared_classes} shared between specs')
+    print(f'Resolution cache: {resolution_cache.report()}')
+    print('Finished.')
+    return 0
+
+
+def validate_main(argv: List[str]) -> int:
+    """Validate RO-Crate metadata files against a Crate-O profile"""
+    from jsonschema2crateo.validate import ProfileValidator, validate_crates
+
+    parser = argparse.ArgumentParser(prog='python -m jsonschema2crateo validate',
+                                     description='Check that RO-Crate metadata files conform to a Crate-O profile')
+    parser.add_argument('crateo_profile_path', help='Crate-O profile file')
+    parser.add_argument('sources', nargs='+',
+                        help='RO-Crate metadata files, glob patterns, or directories searched recursively for '
+                             'ro-crate-metadata.json')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Number of pool workers')
+    parser.add_argument('--processes', action='store_true',
+                        help='Use a process pool instead of a thread pool, to validate large corpora in parallel')
+    parser.add_argument('--quiet', action='store_true', help='Only report crates which are invalid or unreadable')
+    args = parser.parse_args(argv)
+
+    validator = ProfileValidator.from_file(args.crateo_profile_path)
+
+    crates = invalid_crates = 0
+    for result in validate_crates(args.sources, validator, workers=args.workers, use_processes=args.processes):
+        crates += 1
+        status = 'FAILED' if result.error else 'INVALID' if result.issues else 'OK'
+        if status != 'OK':
+            invalid_crates += 1
+        elif args.quiet:
+            continue
+
+        print(f'{status}\t{result.seconds:.3f}s\t{result.path}')
+        if result.error:
+            print(f'\t{result.error}')
+        for issue in result.issues:
+            print(f'\t{issue}')
+
+    print(f'{crates - invalid_crates} of {crates} crates valid')
+    return 1 if invalid_crates else 0
+
+
+def service_lookup_url(host: str,
+                       port: int,
+                       lookup_url: Optional[str] = None,
+                       ontology_paths: Optional[List[str]] = None,
+                       ) -> Optional[str]:
+    """
+    Return the URL of the /lookup endpoint wired into profiles translated by the service: lookup_url if given,
+    otherwise the service's own endpoint if it serves ontologies and listens on an address clients can connect to
+    :return: Optional[str], None to translate profiles without a lookup section
+    """
+    if lookup_url:
+        return lookup_url
+    if not ontology_paths or host in WILDCARD_HOSTS:
+        return None
+    return f'http://{f"[{host}]" if ":" in host else host}:{port}/lookup'
+
+
+def serve_main(argv: List[str]) -> int:
+    """Run a long-running translation service"""
+    from jsonschema2crateo.server import DEFAULT_HOST, DEFAULT_PORT, TranslationService, serve
+
+    parser = argparse.ArgumentParser(prog='python -m jsonschema2crateo serve',
+                                     description='Serve JSONschema to Crate-O profile translations over HTTP, '
+                                                 'keeping BioSchemas and caches warm between requests')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--ontology', action='append', default=[], metavar='ONTOLOGY_FILE',
+                        help='Ontology whose terms are served by /lookup as well as those of the BioSchemas '
+                             'vocabulary: a JSON-LD graph, or a CSV or TSV table such as EDAM.csv. May be repeated')
+    add_lookup_url_argument(parser, 'the /lookup endpoint of this service if --ontology is given and --host is not '
+                                    'a wildcard address, otherwise none')
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    service = TranslationService(
+        vocabulary=vocabulary_from_args(args),
+        resolution_cache=resolution_cache_from_args(args),
+        offline=args.offline,
+        prefetch_workers=args.prefetch_workers,
+        mirror=mirror_from_args(args),
+        ontology_paths=args.ontology,
+        lookup_url=service_lookup_url(args.host, args.port, args.lookup_url, args.ontology),
+    )
+    serve(service, args.host, args.port)
+
+    print(f'Resolution cache: {service.resolution_cache.report()}')
+    return 0
+
+
+COMMANDS = {
+    'batch': batch_main,
+    'merge': merge_main,
+    'validate': validate_main,
+    'serve': serve_main,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    try:
+        if argv and argv[0] in COMMANDS:
+            return COMMANDS[argv[0]](argv[1:])
+
+        return translate_main(argv)
+    except VocabularyNotFound as vocabulary_not_found:
+        print(f'Error: {vocabulary_not_found}', file=sys.stderr)
+        return 1
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Content-addressed store of output profiles, so that repeating a conversion of unchanged input costs a hash and a copy
+"""
+import glob
+import hashlib
+import os
+import shutil
+import threading
+from typing import List, Optional, Tuple
+
+from jsonschema2crateo.cache import DEFAULT_CACHE_DIR
+
+DEFAULT_ARTIFACT_DIR = os.path.join(DEFAULT_CACHE_DIR, 'artifacts')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+ARTIFACT_SUFFIX = '.json'
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """Return the sha256 digest of a file's content, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as input_file:
+        while chunk := input_file.read(DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Directory of output profiles named by the key of the conversion that produced them.
+    The modification time of each artifact records its last use, and the least recently used artifacts are evicted
+    once the store grows beyond max_bytes. Safe to share between threads and processes.
+    """
+
+    def __init__(self,
+                 directory: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ) -> None:
+        """
+        :param directory: Optional[str], directory holding the artifacts. Defaults to DEFAULT_ARTIFACT_DIR
+        :param max_bytes: int, total size of artifacts retained
+        """
+        self.directory: str = directory or DEFAULT_ARTIFACT_DIR
+        self.max_bytes: int = max_bytes
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stores: int = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{ARTIFACT_SUFFIX}')
+
+    def fetch(self,
+              key: str,
+              output_path: str,
+              ) -> bool:
+        """
+        Copy the artifact stored under key to output_path
+        :return: bool, True on a hit, False if there is no artifact for key
+        """
+        artifact_path = self.path_for(key)
+        try:
+            shutil.copyfile(artifact_path, output_path)
+            os.utime(artifact_path)  # Mark as recently used
+        except FileNotFoundError:
+            if not os.path.isfile(artifact_path):  # Otherwise output_path couldn't be written
+                with self._lock:
+                    self.misses += 1
+                return False
+            raise
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self,
+            key: str,
+            source_path: str,
+            ) -> None:
+        """
+        Store a copy of the output profile at source_path under key, evicting least recently used artifacts if the
+        store is full
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        artifact_path = self.path_for(key)
+        temp_path = f'{artifact_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, artifact_path)  # Readers never see a partial artifact
+
+        with self._lock:
+            self.stores += 1
+        self.evict()
+
+    def artifacts(self) -> List[Tuple[float, int, str]]:
+        """Return (last used time, size, path) of every artifact, least recently used first"""
+        artifacts = []
+        for artifact_path in glob.glob(os.path.join(glob.escape(self.directory), f'*{ARTIFACT_SUFFIX}')):
+            try:
+                stat = os.stat(artifact_path)
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            artifacts.append((stat.st_mtime, stat.st_size, artifact_path))
+        return sorted(artifacts)
+
+    def size(self) -> int:
+        """Return total size of stored artifacts in bytes"""
+        return sum(size for _last_used, size, _artifact_path in self.artifacts())
+
+    def evict(self) -> None:
+        """Remove least recently used artifacts until the store is no larger than max_bytes"""
+        artifacts = self.artifacts()
+        total_size = sum(size for _last_used, size, _artifact_path in artifacts)
+        for _last_used, size, artifact_path in artifacts:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(artifact_path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def clear(self) -> None:
+        """Remove all artifacts"""
+        for _last_used, _size, artifact_path in self.artifacts():
+            try:
+                os.remove(artifact_path)
+            except FileNotFoundError:
+                pass
+
+    def report(self) -> str:
+        """Return a one line summary of store counters"""
+        return f'{self.hits} hits, {self.misses} misses, {self.stores} stored'
+
+    def __getstate__(self):
+        # Counters and lock aren't shared with worker processes
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(**state)
@@ -0,0 +1,187 @@
+"""
+Batch translation of many BioSchemas JSONschema specs into Crate-O profiles in a single process
+"""
+import functools
+import glob
+import os
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.artifacts import ArtifactStore
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.fetch import Mirror
+from jsonschema2crateo.resolver import DEFAULT_PREFETCH_WORKERS
+from jsonschema2crateo.vocabulary import VocabularyStore
+
+OUTPUT_SUFFIX = '_crate-o_profile.json'
+
+# State shared by all translations in a process pool worker. Thread pools are given their state directly, so that
+# concurrent batches in one process don't share it
+_worker_state: Dict = {}
+
+
+class BatchResult(NamedTuple):
+    """Outcome of translating a single input"""
+    input_path: str
+    output_path: str
+    error: Optional[str]
+    seconds: float
+
+
+def collect_inputs(source: str) -> List[str]:
+    """
+    Expand an input source into a list of JSONschema paths or URLs
+    :param source: str, directory (searched recursively for *.json), glob pattern, JSON file, URL or manifest file
+        listing one path or URL per line ('#' comments and blank lines ignored)
+    :return: List[str], input paths or URLs
+    """
+    if re.match(r'http(s)?://', source):
+        return [source]
+
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '**', '*.json'), recursive=True))
+
+    if glob.has_magic(source):
+        return sorted(glob.glob(source, recursive=True))
+
+    if source.lower().endswith('.json'):
+        return [source]
+
+    # Manifest file. Relative paths are relative to the manifest location
+    manifest_dir = os.path.dirname(source)
+    input_paths = []
+    with open(source, 'r') as manifest_file:
+        for line in manifest_file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not re.match(r'http(s)?://', line) and not os.path.isabs(line):
+                line = os.path.join(manifest_dir, line)
+            input_paths.append(line)
+
+    return input_paths
+
+
+def output_path_for(input_path: str,
+                    output_dir: str,
+                    base_dir: Optional[str] = None,
+                    ) -> str:
+    """
+    Derive output profile path for an input, mirroring any directory structure below base_dir
+    """
+    if base_dir and not re.match(r'http(s)?://', input_path):
+        relative_dir = os.path.dirname(os.path.relpath(input_path, base_dir))
+    else:
+        relative_dir = ''
+
+    stem = os.path.splitext(os.path.basename(input_path.rstrip('/')))[0]
+    return os.path.join(output_dir, relative_dir, f'{stem}{OUTPUT_SUFFIX}')
+
+
+def _init_worker(shared_state: Dict) -> None:
+    """Initialise state shared by every translation run in this worker process"""
+    _worker_state.update(shared_state)
+
+
+def _translate_in_worker(input_path: str,
+                         output_path: str,
+                         ) -> BatchResult:
+    return _translate_one(_worker_state, input_path, output_path)
+
+
+def _translate_one(shared_state: Dict,
+                   input_path: str,
+                   output_path: str,
+                   ) -> BatchResult:
+    """Translate one input using state shared by the batch, capturing any failure"""
+    start_time = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        JSONSchema2CrateO(input_path, output_path, **shared_state)
+        error = None
+    except Exception as exception:
+        error = f'{type(exception).__name__}: {exception}'
+
+    return BatchResult(input_path, output_path, error, time.perf_counter() - start_time)
+
+
+def translate_batch(sources: Iterable[str],
+                    output_dir: str,
+                    workers: Optional[int] = None,
+                    use_processes: bool = False,
+                    bioschemas: Optional[Dict] = None,
+                    vocabulary: Optional[VocabularyStore] = None,
+                    resolution_cache: Optional[ResolutionCache] = None,
+                    offline: bool = False,
+                    prefetch_workers: int = DEFAULT_PREFETCH_WORKERS,
+                    artifact_store: Optional[ArtifactStore] = None,
+                    mirror: Optional[Mirror] = None,
+                    ) -> List[BatchResult]:
+    """
+    Translate every input found in sources, sharing one BioSchemas graph and resolution cache.
+    Unless bioschemas is supplied, the BioSchemas graph is taken from the process-wide vocabulary store on first use
+    :param sources: Iterable[str], directories, glob patterns, files, URLs or manifest files
+    :param output_dir: str, directory for output profiles
+    :param workers: Optional[int], number of pool workers (default chosen by concurrent.futures)
+    :param use_processes: bool, use a process pool instead of a thread pool. Worker processes share a file-backed
+        resolution cache, but each works on its own copy of an in-memory one
+    :param bioschemas: Optional[Dict], pre-loaded BioSchemas graph
+    :param vocabulary: Optional[VocabularyStore], store to load the BioSchemas graph from. Defaults to the
+        process-wide store
+    :param resolution_cache: Optional[ResolutionCache], cache of URL probe results. Defaults to a new in-memory cache
+    :param offline: bool, never access the network
+    :param prefetch_workers: int, number of concurrent URL probes made before each translation
+    :param artifact_store: Optional[ArtifactStore], store of previously generated profiles to copy unchanged inputs'
+        profiles from
+    :param mirror: Optional[Mirror], local mirror remote inputs are fetched through. Defaults to the process-wide
+        mirror
+    :return: List[BatchResult], one result per input in input order
+    """
+    jobs = []
+    for source in sources:
+        base_dir = source if os.path.isdir(source) else None
+        jobs += [(input_path, output_path_for(input_path, output_dir, base_dir))
+                 for input_path in collect_inputs(source)]
+
+    if resolution_cache is None:
+        resolution_cache = ResolutionCache()
+
+    shared_state = {
+        "bioschemas": bioschemas,
+        "vocabulary": vocabulary,
+        "resolution_cache": resolution_cache,
+        "offline": offline,
+        "prefetch_workers": prefetch_workers,
+        "artifact_store": artifact_store,
+        "mirror": mirror,
+    }
+
+    executor: Executor
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared_state,))
+        translate_one = _translate_in_worker
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        translate_one = functools.partial(_translate_one, shared_state)
+
+    results: List[Optional[BatchResult]] = [None] * len(jobs)
+    with executor:
+        futures = {executor.submit(translate_one, input_path, output_path): job_index
+                   for job_index, (input_path, output_path) in enumerate(jobs)}
+        for future in as_completed(futures):
+            result = future.result()
+            print(f'{"FAILED" if result.error else "OK"}\t{result.seconds:.2f}s\t{result.input_path}')
+            results[futures[future]] = result
+
+    return results
+
+
+def summarise(results: List[BatchResult]) -> str:
+    """Return a human readable per-file summary of batch results"""
+    failures = [result for result in results if result.error]
+    lines = [f'{len(results) - len(failures)} of {len(results)} profiles translated successfully']
+    lines += [f'FAILED: {result.input_path}: {result.error}' for result in failures]
+    return '\n'.join(lines)
@@ -0,0 +1,161 @@
+"""
+Persistent cache of URL probe results used when guessing the context of unresolved identifiers
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get('JSONSCHEMA2CRATEO_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'jsonschema2crateo'))
+DEFAULT_RESOLUTION_CACHE_PATH = os.path.join(DEFAULT_CACHE_DIR, 'resolution_cache.sqlite')
+
+DEFAULT_TTL = 30 * 24 * 60 * 60  # Successful probes are trusted for 30 days
+DEFAULT_NEGATIVE_TTL = 7 * 24 * 60 * 60  # Failed probes are retried after 7 days
+DEFAULT_MAX_ENTRIES = 100000
+
+IN_MEMORY = ':memory:'
+
+
+class ResolutionCache:
+    """
+    Cache of URL probe results (True if the URL resolved, False otherwise) keyed by candidate URL.
+    Backed by SQLite so that it persists between runs and can be shared between processes.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ) -> None:
+        """
+        :param path: Optional[str], SQLite database path. None for a non-persistent in-memory cache
+        :param ttl: float, seconds before a successful probe result expires
+        :param negative_ttl: float, seconds before a failed probe result expires
+        :param max_entries: int, maximum number of entries retained. Oldest entries are evicted first
+        """
+        self.path: str = path or IN_MEMORY
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+        self.max_entries: int = max_entries
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.expired: int = 0
+        self.stores: int = 0
+
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.path != IN_MEMORY:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        if self.path != IN_MEMORY:
+            connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS url_probes ('
+                           'url TEXT PRIMARY KEY, exists_flag INTEGER NOT NULL, checked_at REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS url_probes_checked_at ON url_probes (checked_at)')
+        connection.commit()
+        return connection
+
+    def get(self, url: str) -> Optional[bool]:
+        """
+        Return cached probe result for url, or None if not cached or expired
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT exists_flag, checked_at FROM url_probes WHERE url = ?',
+                                           (url,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            exists = bool(row[0])
+            if time.time() - row[1] > (self.ttl if exists else self.negative_ttl):
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return exists
+
+    def put(self, url: str, exists: bool) -> None:
+        """
+        Store probe result for url, evicting the oldest entries if the cache is full
+        """
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO url_probes (url, exists_flag, checked_at) '
+                                     'VALUES (?, ?, ?)',
+                                     (url, int(exists), time.time()))
+            self.stores += 1
+
+            excess = self._connection.execute('SELECT COUNT(*) FROM url_probes').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._connection.execute('DELETE FROM url_probes WHERE url IN '
+                                         '(SELECT url FROM url_probes ORDER BY checked_at LIMIT ?)',
+                                         (excess,))
+            self._connection.commit()
+
+    def missing(self, urls: List[str]) -> List[str]:
+        """
+        Return those urls with no current cached result, without updating hit/miss counters
+        """
+        now = time.time()
+        missing_urls = []
+        with self._lock:
+            for url in urls:
+                row = self._connection.execute('SELECT exists_flag, checked_at FROM url_probes WHERE url = ?',
+                                               (url,)).fetchone()
+                if row is None or now - row[1] > (self.ttl if row[0] else self.negative_ttl):
+                    missing_urls.append(url)
+
+        return missing_urls
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM url_probes').fetchone()[0]
+
+    def entries(self) -> Dict[str, bool]:
+        """Return all cached probe results, including expired ones"""
+        with self._lock:
+            return {url: bool(exists_flag)
+                    for url, exists_flag in self._connection.execute('SELECT url, exists_flag FROM url_probes')}
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "stores": self.stores,
+        }
+
+    def report(self) -> str:
+        """Return a one line summary of cache counters"""
+        return f'{self.hits} hits, {self.misses} misses ({self.expired} expired), {self.stores} stored'
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __getstate__(self) -> Dict:
+        # Connections can't be pickled. In-memory caches are copied, file caches are re-opened
+        state = {key: value for key, value in self.__dict__.items() if key not in ['_lock', '_connection']}
+        if self.path == IN_MEMORY:
+            state['_entries'] = self._connection.execute(
+                'SELECT url, exists_flag, checked_at FROM url_probes').fetchall()
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        entries = state.pop('_entries', [])
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+        if entries:
+            self._connection.executemany('INSERT OR REPLACE INTO url_probes (url, exists_flag, checked_at) '
+                                         'VALUES (?, ?, ?)', entries)
+            self._connection.commit()
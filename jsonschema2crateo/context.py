@@ -0,0 +1,234 @@
+"""
+JSON-LD @context resolution. Array, nested and remote contexts are resolved once and compiled into tables of prefixes
+and terms, shared by every input of a run with the same @context
+"""
+import json
+import re
+import threading
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+from jsonschema2crateo import serialization
+from jsonschema2crateo.fetch import Mirror, get_mirror
+
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60  # Seconds before a mirrored remote context is revalidated. Contexts rarely change
+
+MAX_REMOTE_CONTEXTS = 32  # Remote contexts included by one @context, as a limit on runaway inclusion
+
+# Characters ending the IRI of a simple term definition which can be used as a prefix (JSON-LD 1.1 gen-delims)
+PREFIX_DELIMITERS = (':', '/', '?', '#', '[', ']', '@')
+
+
+class CompiledContext:
+    """
+    Tables of a resolved JSON-LD @context. Terms whose IRI can prefix compact IRIs, e.g. "schema": "http://schema.org/",
+    are only in prefixes. Other term definitions, e.g. "input": "https://discovery.biothings.io/view/bioschemas/input",
+    are in terms
+    """
+
+    def __init__(self) -> None:
+        self.prefixes: Dict[str, str] = {}  # prefix -> IRI, in order of definition
+        self.terms: Dict[str, str] = {}  # term -> IRI
+        self.vocab: Optional[str] = None  # IRI prepended to other plain terms
+        self.remote_contexts: List[str] = []  # URLs of the remote contexts included
+
+    def expand_term(self, term: str) -> Optional[str]:
+        """Return the IRI of a plain term, from its term definition or @vocab, or None if it isn't defined"""
+        if (iri := self.terms.get(term)) is not None:
+            return iri
+        if self.vocab is not None:
+            return f'{self.vocab}{term}'
+        return None
+
+
+class ContextResolver:
+    """
+    Compiles @context values, fetching remote contexts through a mirror. Compiled contexts are cached by content,
+    and remote contexts by URL, so each is only resolved once. Safe to share between threads
+    """
+
+    def __init__(self,
+                 mirror: Optional[Mirror] = None,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 ) -> None:
+        """
+        :param mirror: Optional[Mirror], local mirror remote contexts are fetched through. Defaults to the
+            process-wide mirror in DEFAULT_MIRROR_DIR
+        :param max_age: float, seconds before a mirrored remote context is revalidated
+        """
+        self.mirror: Mirror = mirror if mirror is not None else get_mirror()
+        self.max_age: float = max_age
+        self._compiled: Dict[str, CompiledContext] = {}
+        self._remote: Dict[str, Union[Dict, List, str, None]] = {}
+        self._lock = threading.RLock()
+
+    def compile(self,
+                context: Union[Dict, List, str, None],
+                offline: bool = False,
+                base_url: Optional[str] = None,
+                ) -> CompiledContext:
+        """
+        Resolve a @context value into prefix and term tables. Don't modify the result, which is shared
+        :param context: Union[Dict, List, str, None], @context of a JSON-LD document: a local context, the URL of
+            a remote context, or an array of them applied in order
+        :param offline: bool, don't access the network. Remote contexts must already be in the mirror
+        :param base_url: Optional[str], URL of the document, which relative remote context URLs are resolved against
+        :return: CompiledContext
+        """
+        context_key = json.dumps([context, base_url])
+        with self._lock:
+            if (compiled_context := self._compiled.get(context_key)) is None:
+                compiled_context = CompiledContext()
+                self._process(compiled_context, context, base_url, [], offline)
+                self._compiled[context_key] = compiled_context
+            return compiled_context
+
+    def remote_context(self,
+                       url: str,
+                       offline: bool = False,
+                       ) -> Union[Dict, List, str, None]:
+        """Return the @context of the remote context document at url"""
+        with self._lock:
+            if url not in self._remote:
+                document = serialization.loads(self.mirror.read(url, offline=offline, max_age=self.max_age))
+                if type(document) != dict or "@context" not in document:
+                    raise Exception(f'Remote context {url} has no @context')
+                self._remote[url] = document["@context"]
+            return self._remote[url]
+
+    def _process(self,
+                 compiled_context: CompiledContext,
+                 context: Union[Dict, List, str, None],
+                 base_url: Optional[str],
+                 remote_stack: List[str],
+                 offline: bool,
+                 ) -> None:
+        """
+        Apply the local contexts in a @context value to compiled_context in order
+        :param remote_stack: List[str], URLs of the remote contexts being processed, to detect recursive inclusion
+        """
+        for local_context in (context if type(context) == list else [context]):
+            if local_context is None:  # Reset to an empty context
+                compiled_context.prefixes, compiled_context.terms, compiled_context.vocab = {}, {}, None
+
+            elif type(local_context) == str:
+                url = urljoin(base_url, local_context) if base_url else local_context
+                if not re.match(r'http(s)?://', url):
+                    raise Exception(f'Unsupported @context reference "{local_context}"')
+                if url in remote_stack:
+                    raise Exception(f'Recursive inclusion of remote context {url}')
+                if len(compiled_context.remote_contexts) >= MAX_REMOTE_CONTEXTS:
+                    raise Exception(f'More than {MAX_REMOTE_CONTEXTS} remote contexts included')
+
+                compiled_context.remote_contexts.append(url)
+                self._process(compiled_context, self.remote_context(url, offline), url, remote_stack + [url],
+                              offline)
+
+            elif type(local_context) == dict:
+                LocalContext(compiled_context, local_context).define_all()
+
+            else:
+                raise Exception(f'Invalid @context {local_context!r}')
+
+
+class LocalContext:
+    """
+    Definitions of one local context (a JSON object in a @context), added to a compiled context. Terms may refer to
+    each other in any order, so they are defined as they are needed
+    """
+
+    def __init__(self,
+                 compiled_context: CompiledContext,
+                 local_context: Dict,
+                 ) -> None:
+        self.compiled_context: CompiledContext = compiled_context
+        self.local_context: Dict = local_context
+        self.defined: Dict[str, bool] = {}  # True once a term is defined, False while its IRI is being expanded
+
+    def define_all(self) -> None:
+        if "@vocab" in self.local_context:
+            vocab = self.local_context["@vocab"]
+            self.compiled_context.vocab = None if vocab is None else self.expand_iri(vocab)
+
+        for term in self.local_context:
+            if not term.startswith('@'):  # Other keywords, e.g. @version or @language, don't define IRIs
+                self.define(term)
+
+    def define(self, term: str) -> None:
+        """Add the definition of term to the compiled context, after the definitions its IRI depends on"""
+        if self.defined.get(term):
+            return
+        if term in self.defined:
+            raise Exception(f'Cyclic IRI mapping of term "{term}" in @context')
+        self.defined[term] = False
+
+        compiled_context = self.compiled_context
+        compiled_context.prefixes.pop(term, None)  # Redefined, or undefined by null
+        compiled_context.terms.pop(term, None)
+
+        term_definition = self.local_context[term]
+        if type(term_definition) == dict:
+            is_prefix = bool(term_definition.get("@prefix"))
+            if "@id" in term_definition:
+                iri = term_definition["@id"] and self.expand_iri(term_definition["@id"])  # null: not expanded
+            elif ':' not in term:
+                iri = compiled_context.expand_term(term)  # Relative to @vocab
+            else:
+                iri = None
+        elif type(term_definition) == str:
+            is_prefix = None  # Depends on the IRI
+            iri = self.expand_iri(term_definition)
+        elif term_definition is None:  # Undefined
+            iri = is_prefix = None
+        else:
+            raise Exception(f'Invalid definition of term "{term}" in @context')
+
+        # Keyword aliases, e.g. "type": "@type", and compact IRI or IRI terms aren't looked up as plain terms
+        if iri is not None and not iri.startswith('@') and ':' not in term and '/' not in term:
+            if is_prefix or (is_prefix is None and iri.endswith(PREFIX_DELIMITERS)):
+                compiled_context.prefixes[term] = iri
+            else:
+                compiled_context.terms[term] = iri
+
+        self.defined[term] = True
+
+    def expand_iri(self, value: str) -> str:
+        """Expand a term, compact IRI or vocabulary-relative IRI used in the local context"""
+        if value.startswith('@'):  # Keyword
+            return value
+
+        prefix, separator, suffix = value.partition(':')
+        if separator:
+            if suffix.startswith('//') or prefix == '_':  # Absolute IRI or blank node
+                return value
+            if prefix in self.local_context and not prefix.startswith('@'):
+                self.define(prefix)
+            compiled_context = self.compiled_context
+            if (prefix_iri := compiled_context.prefixes.get(prefix, compiled_context.terms.get(prefix))) is not None:
+                return f'{prefix_iri}{suffix}'
+            return value  # IRI with a scheme not defined as a prefix, e.g. urn:
+
+        if value in self.local_context:
+            self.define(value)
+        compiled_context = self.compiled_context
+        if (iri := compiled_context.prefixes.get(value, compiled_context.terms.get(value))) is not None:
+            return iri
+        if compiled_context.vocab is not None:
+            return f'{compiled_context.vocab}{value}'
+        return value
+
+
+_resolvers: Dict[str, ContextResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_context_resolver(mirror: Optional[Mirror] = None) -> ContextResolver:
+    """
+    Return the process-wide context resolver fetching through mirror, so that every converter in a run shares its
+    compiled contexts
+    """
+    mirror = mirror if mirror is not None else get_mirror()
+    with _resolvers_lock:
+        if mirror.directory not in _resolvers:
+            _resolvers[mirror.directory] = ContextResolver(mirror)
+        return _resolvers[mirror.directory]
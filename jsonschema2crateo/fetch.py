@@ -0,0 +1,249 @@
+"""
+Shared HTTP fetch layer keeping a local mirror of remote documents, revalidated with conditional requests
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from jsonschema2crateo.cache import DEFAULT_CACHE_DIR
+
+if TYPE_CHECKING:  # requests is only imported once a session is needed, to keep imports fast
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIRROR_DIR = os.path.join(DEFAULT_CACHE_DIR, 'mirror')
+
+DEFAULT_TIMEOUT = (10, 60)  # Seconds to connect, and between bytes received
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # Retries wait 0.5s, 1s, 2s, ...
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+DEFAULT_POOL_SIZE = 10
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+METADATA_SUFFIX = '.meta.json'
+
+
+def new_fetch_session(retries: int = DEFAULT_RETRIES,
+                      backoff: float = DEFAULT_BACKOFF,
+                      pool_size: int = DEFAULT_POOL_SIZE,
+                      ) -> 'requests.Session':
+    """
+    Return a keep-alive HTTP session which retries connection errors and transient server errors with exponential
+    backoff, and accepts gzip compressed responses
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                  allowed_methods=['GET', 'HEAD'], raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip'
+    return session
+
+
+class MirrorEntry(NamedTuple):
+    """Local copy of a remote document"""
+    path: str
+    version_key: str  # Identifies the version of the content, from its ETag, Last-Modified or download time
+    changed: bool  # True if new content was downloaded by this fetch
+
+
+class Mirror:
+    """
+    Directory of local copies of remote documents. A copy older than max_age is revalidated with a conditional GET
+    (If-None-Match/If-Modified-Since), so an unchanged document costs a 304 response rather than a download. If it
+    can't be revalidated because of a network or server error, the local copy is used anyway.
+    Safe to share between threads and processes.
+    """
+
+    def __init__(self,
+                 directory: Optional[str] = None,
+                 max_age: float = 0,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 session: Optional['requests.Session'] = None,
+                 ) -> None:
+        """
+        :param directory: Optional[str], directory for local copies. Defaults to DEFAULT_MIRROR_DIR
+        :param max_age: float, seconds a local copy is used without revalidation. 0 to revalidate on every fetch
+        :param timeout: Union[float, Tuple[float, float]], seconds to wait to connect and between bytes received
+        :param session: Optional[requests.Session], HTTP session. Defaults to a new pooled session with retries
+        """
+        self.directory: str = directory or DEFAULT_MIRROR_DIR
+        self.max_age: float = max_age
+        self.timeout: Union[float, Tuple[float, float]] = timeout
+        self._session: Optional['requests.Session'] = session
+
+        self.downloads: int = 0
+        self.not_modified: int = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """Pooled HTTP session, created on first use"""
+        if self._session is None:
+            self._session = new_fetch_session()
+        return self._session
+
+    def path_for(self, url: str) -> str:
+        """Return path of the local copy of url"""
+        url_hash = hashlib.sha256(url.encode('utf8')).hexdigest()[:16]
+        file_name = re.sub(r'[^\w.-]', '_', os.path.basename(urlsplit(url).path)) or 'index'
+        return os.path.join(self.directory, f'{url_hash}-{file_name}')
+
+    def metadata(self, url: str) -> Dict:
+        """Return validators and timestamps recorded for the local copy of url, or {} if there isn't one"""
+        path = self.path_for(url)
+        try:
+            with open(f'{path}{METADATA_SUFFIX}', 'r') as metadata_file:
+                metadata = json.load(metadata_file)
+        except (OSError, ValueError):
+            return {}
+        return metadata if os.path.isfile(path) else {}
+
+    def version_key(self, url: str, metadata: Optional[Dict] = None) -> Optional[str]:
+        """
+        Return the key identifying the version of the local copy of url, from its ETag, Last-Modified or download time,
+        without revalidating it
+        :param url: str, http(s) URL
+        :param metadata: Optional[Dict], metadata of the local copy, read if not given
+        :return: Optional[str], None if there is no local copy
+        """
+        metadata = self.metadata(url) if metadata is None else metadata
+        if not metadata:
+            return None
+        version = metadata.get("etag") or metadata.get("last_modified") or metadata.get("downloaded_at")
+        return f'{url}|{version}'
+
+    def fetch(self,
+              url: str,
+              offline: bool = False,
+              max_age: Optional[float] = None,
+              ) -> MirrorEntry:
+        """
+        Make sure the local copy of url exists and is fresh
+        :param url: str, http(s) URL
+        :param offline: bool, don't access the network. Raise FileNotFoundError if there is no local copy
+        :param max_age: Optional[float], seconds a local copy is used without revalidation. Defaults to self.max_age
+        :return: MirrorEntry, local copy
+        """
+        assert re.match(r'http(s)?://', url), f'Not a URL: {url}'
+        max_age = self.max_age if max_age is None else max_age
+
+        with self._lock_for(url):
+            metadata = self.metadata(url)
+            changed = False
+
+            if not metadata:
+                if offline:
+                    raise FileNotFoundError(f'No local copy of {url} available in offline mode')
+                metadata, changed = self._download(url, {})
+            elif not offline and time.time() - metadata.get("checked_at", 0) >= max_age:
+                import requests
+
+                try:
+                    metadata, changed = self._download(url, metadata)
+                except requests.RequestException as request_exception:
+                    logger.warning('Could not revalidate %s, using the local copy checked at %s: %s', url,
+                                   time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(metadata.get("checked_at", 0))),
+                                   request_exception)
+
+        return MirrorEntry(self.path_for(url), self.version_key(url, metadata), changed)
+
+    def read(self,
+             url: str,
+             offline: bool = False,
+             max_age: Optional[float] = None,
+             ) -> bytes:
+        """Return the content of url from a fresh local copy"""
+        with open(self.fetch(url, offline, max_age).path, 'rb') as mirrored_file:
+            return mirrored_file.read()
+
+    def _lock_for(self, url: str) -> threading.Lock:
+        """Lock preventing concurrent downloads of the same URL by threads in this process"""
+        with self._locks_lock:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def _download(self,
+                  url: str,
+                  metadata: Dict,
+                  ) -> Tuple[Dict, bool]:
+        """
+        Download url to its local copy, using a conditional request if metadata is available
+        :return: Tuple[Dict, bool], updated metadata, True if new content was downloaded
+        """
+        headers = {}
+        if etag := metadata.get("etag"):
+            headers['If-None-Match'] = etag
+        if last_modified := metadata.get("last_modified"):
+            headers['If-Modified-Since'] = last_modified
+
+        path = self.path_for(url)
+        os.makedirs(self.directory, exist_ok=True)
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and metadata:
+                self.not_modified += 1
+                changed = False
+            else:
+                response.raise_for_status()
+
+                temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                with open(temp_path, 'wb') as temp_file:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):  # Decompressed if gzip encoded
+                        temp_file.write(chunk)
+                os.replace(temp_path, path)
+
+                self.downloads += 1
+                changed = True
+                metadata = {
+                    "url": url,
+                    "etag": response.headers.get('ETag'),
+                    "last_modified": response.headers.get('Last-Modified'),
+                    "downloaded_at": time.time(),
+                }
+
+        metadata["checked_at"] = time.time()
+        temp_metadata_path = f'{path}{METADATA_SUFFIX}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_metadata_path, 'w') as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(temp_metadata_path, f'{path}{METADATA_SUFFIX}')
+
+        return metadata, changed
+
+    def report(self) -> str:
+        """Return a one line summary of mirror counters"""
+        return f'{self.downloads} downloaded, {self.not_modified} not modified'
+
+    def __getstate__(self) -> Dict:
+        # Only configuration is pickled. Each process opens its own session
+        return {"directory": self.directory, "max_age": self.max_age, "timeout": self.timeout}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+
+_mirrors: Dict[str, Mirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_mirror(directory: str = DEFAULT_MIRROR_DIR) -> Mirror:
+    """
+    Return the process-wide mirror for directory, so that every converter shares its HTTP session
+    """
+    with _mirrors_lock:
+        if directory not in _mirrors:
+            _mirrors[directory] = Mirror(directory)
+        return _mirrors[directory]
@@ -0,0 +1,60 @@
+"""
+Index of JSON-LD graph nodes for constant time lookup by rdfs:label, @id and context prefix
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+
+class GraphIndex:
+    """
+    Index of a JSON-LD @graph. Where several nodes share a label or @id, the first one in the graph is indexed,
+    matching a first-match linear scan of the graph
+    """
+
+    def __init__(self, graph: Iterable[Dict] = ()) -> None:
+        self.nodes: List[Dict] = []
+        self.by_label: Dict[str, Dict] = {}
+        self.by_id: Dict[str, Dict] = {}
+        self.by_prefix: Dict[str, Dict[str, Dict]] = {}  # prefix -> term -> node, for compact "prefix:term" @ids
+
+        for node in graph:
+            self.add(node)
+
+    @classmethod
+    def of(cls, lookup_graph: Union['GraphIndex', List[Dict]]) -> 'GraphIndex':
+        """Return lookup_graph if it is already indexed, otherwise index it"""
+        if isinstance(lookup_graph, GraphIndex):
+            return lookup_graph
+        return cls(lookup_graph)
+
+    def add(self, node: Dict) -> None:
+        """Add a graph node to the index"""
+        self.nodes.append(node)
+
+        if (label := node.get("rdfs:label")) is not None:
+            self.by_label.setdefault(label, node)
+
+        if (node_id := node.get("@id")) is not None:
+            self.by_id.setdefault(node_id, node)
+
+            prefix, separator, term = node_id.partition(':')
+            if separator and not term.startswith('//'):
+                self.by_prefix.setdefault(prefix, {}).setdefault(term, node)
+
+    def id_for_label(self, label: str) -> Optional[str]:
+        """Return the @id of the first node with the given rdfs:label, or None"""
+        if node := self.by_label.get(label):
+            return node["@id"]
+        return None
+
+    def terms(self, prefix: str) -> Dict[str, Dict]:
+        """Return nodes with compact @ids using prefix, keyed by term"""
+        return self.by_prefix.get(prefix, {})
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.by_id
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
@@ -0,0 +1,74 @@
+"""
+Content hashing and class manifests for incremental re-translation
+"""
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from jsonschema2crateo.model import plain
+
+MANIFEST_SUFFIX = '.manifest.json'
+MANIFEST_FORMAT = 1
+
+
+def content_hash(*values) -> str:
+    """
+    Return a hash of JSON-serialisable values. Dict key order is significant because it determines input order
+    """
+    return hashlib.sha256(
+        json.dumps(values, separators=(',', ':'), ensure_ascii=False).encode('utf8')
+    ).hexdigest()
+
+
+def without_definitions(subgraph: Dict) -> Dict:
+    """Return a copy of a @graph entry without its $validation definitions, which are hashed separately"""
+    subgraph = dict(subgraph)
+    if input_validation := subgraph.get("$validation"):
+        subgraph["$validation"] = {key: value for key, value in input_validation.items() if key != "definitions"}
+    return subgraph
+
+
+def manifest_path_for(output_crateo_profile_path: str) -> str:
+    """Return path of the manifest stored alongside an output profile"""
+    return f'{output_crateo_profile_path}{MANIFEST_SUFFIX}'
+
+
+def read_manifest(manifest_path: str) -> Tuple[Optional[str], Dict[str, Tuple[str, Dict]]]:
+    """
+    Read classes from a manifest written by a previous run
+    :param manifest_path: str, manifest file path
+    :return: Tuple[Optional[str], Dict[str, Tuple[str, Dict]]], hash of the environment the classes were built in,
+        and (class_name, crateo_class) by source content hash. (None, {}) if the manifest is missing or unreadable
+    """
+    try:
+        with open(manifest_path, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None, {}
+
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return None, {}
+
+    return manifest.get("environment"), {class_key: (class_name, crateo_class)
+                                         for class_key, (class_name, crateo_class)
+                                         in manifest.get("classes", {}).items()}
+
+
+def write_manifest(manifest_path: str,
+                   environment_hash: str,
+                   classes: Dict[str, Tuple[str, Dict]],
+                   ) -> None:
+    """
+    Write classes built by this run to a manifest for the next run
+    """
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "environment": environment_hash,
+        "classes": classes,
+    }
+
+    temp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as manifest_file:
+        json.dump(plain(manifest), manifest_file)
+    os.replace(temp_path, manifest_path)
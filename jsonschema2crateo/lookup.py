@@ -0,0 +1,385 @@
+"""
+Search index of vocabulary terms for autocompletion in Crate-O: classes and properties of the BioSchemas graph, and
+terms of referenced ontologies such as EDAM supplied as local files. Terms are indexed once by label, label tokens and
+trigrams, so that each keystroke is answered by a few binary searches and set intersections rather than a scan
+"""
+import bisect
+import glob
+import hashlib
+import os
+import pickle
+import re
+from array import array
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.parse import urlencode
+
+from jsonschema2crateo import serialization
+
+DEFAULT_LIMIT = 10  # Terms returned by a lookup
+MAX_LIMIT = 100
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+# Properties of JSON-LD ontology nodes holding alternative labels
+SYNONYM_PROPERTIES = (
+    "skos:altLabel",
+    "oboInOwl:hasExactSynonym",
+    "oboInOwl:hasNarrowSynonym",
+    "oboInOwl:hasBroadSynonym",
+    "oboInOwl:hasRelatedSynonym",
+)
+
+# Columns of ontology tables, as in the CSV and TSV downloads of EDAM from BioPortal. Multiple values are separated
+# by TABLE_VALUE_SEPARATOR
+TABLE_COLUMNS = {
+    "id": "Class ID",
+    "label": "Preferred Label",
+    "synonyms": "Synonyms",
+    "description": "Definitions",
+    "parents": "Parents",
+    "obsolete": "Obsolete",
+}
+TABLE_VALUE_SEPARATOR = '|'
+
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+CAMEL_CASE_PATTERN = re.compile(r'([a-z0-9])([A-Z])')
+HTML_TAG_PATTERN = re.compile(r'\<.*?\>')
+
+MAX_CHARACTER = chr(0x10FFFF)  # Sorts after every character, to find the end of a range of keys with a prefix
+
+
+class Term(NamedTuple):
+    """A vocabulary term which can be looked up"""
+    id: str  # Full IRI
+    label: str
+    description: str = ''
+    synonyms: Tuple[str, ...] = ()
+    parents: Tuple[str, ...] = ()  # IRIs of superclasses
+
+    def to_entity(self) -> Dict:
+        """Return the term as an RO-Crate entity, which Crate-O can add to a crate"""
+        entity = {"@id": self.id, "@type": "DefinedTerm", "name": self.label}
+        if self.description:
+            entity["description"] = self.description
+        return entity
+
+
+def normalise(text: str) -> str:
+    """Return text in lower case with punctuation and runs of whitespace replaced by single spaces"""
+    return NON_WORD_PATTERN.sub(' ', text.casefold()).strip()
+
+
+def tokenise(text: str) -> List[str]:
+    """Return the words of text in lower case, with camel case split, e.g. ["computational", "tool"]"""
+    return normalise(CAMEL_CASE_PATTERN.sub(r'\1 \2', text)).split()
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    return frozenset(text[start:start + 3] for start in range(len(text) - 2))
+
+
+class LookupIndex:
+    """
+    Immutable search index of terms. Matches are ranked: exact label, label prefix, prefixes of the words of the
+    label or synonyms, then substrings of the label or synonyms. Within each rank, shorter labels come first
+    """
+
+    def __init__(self, terms: Iterable[Term] = ()) -> None:
+        """
+        :param terms: Iterable[Term], terms to index. Where several have the same @id, the first is kept
+        """
+        unique_terms = {}
+        for term in terms:
+            unique_terms.setdefault(term.id, term)
+
+        # Terms are numbered in rank order within a match type, so sorted term numbers are ranked results
+        self.terms: List[Term] = sorted(unique_terms.values(),
+                                        key=lambda term: (len(term.label), term.label.casefold(), term.id))
+        self.by_id: Dict[str, int] = {term.id: term_number for term_number, term in enumerate(self.terms)}
+
+        labels = []  # (normalised label, term number)
+        tokens = []  # (word of label or synonym, term number)
+        self._texts: List[str] = []  # Normalised label and synonyms of each term, for substring matches
+        trigram_terms: Dict[str, List[int]] = {}
+        self._children: Dict[str, List[int]] = {}  # Parent IRI -> term numbers of direct subclasses
+        for term_number, term in enumerate(self.terms):
+            names = (term.label,) + term.synonyms
+            labels.append((normalise(term.label), term_number))
+            tokens.extend((token, term_number)
+                          for token in dict.fromkeys(token for name in names for token in tokenise(name)))
+
+            text = '\n'.join(normalise(name) for name in names)
+            self._texts.append(text)
+            for trigram in trigrams(text):
+                trigram_terms.setdefault(trigram, []).append(term_number)
+
+            for parent in term.parents:
+                self._children.setdefault(parent, []).append(term_number)
+
+        labels.sort()
+        tokens.sort()
+        self._labels: List[str] = [label for label, _term_number in labels]
+        self._label_terms: array = array('I', (term_number for _label, term_number in labels))
+        self._tokens: List[str] = [token for token, _term_number in tokens]
+        self._token_terms: array = array('I', (term_number for _token, term_number in tokens))
+        self._trigram_terms: Dict[str, array] = {trigram: array('I', term_numbers)
+                                                 for trigram, term_numbers in trigram_terms.items()}
+        # Descendants of each class looked up, computed on first use. Concurrent lookups may both compute them
+        self._descendants: Dict[str, FrozenSet[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __getstate__(self) -> Dict:
+        state = dict(self.__dict__)
+        state["_descendants"] = {}
+        return state
+
+    def search(self,
+               query: str,
+               limit: int = DEFAULT_LIMIT,
+               children_of: Sequence[str] = (),
+               ) -> List[Term]:
+        """
+        Return the best matches for a partially typed query
+        :param query: str, text typed so far
+        :param limit: int, maximum number of terms returned
+        :param children_of: Sequence[str], only return subclasses (direct or not) of these classes, if any
+        :return: List[Term], in rank order
+        """
+        normalised_query = normalise(query)
+        if not normalised_query or limit <= 0:
+            return []
+        allowed_terms = self.descendants(children_of) if children_of else None
+
+        matches: Dict[int, None] = {}  # Ordered set of term numbers
+
+        def add_matches(term_numbers: Iterable[int]) -> bool:
+            """Add ranked term numbers to matches, returning True once there are enough"""
+            for term_number in term_numbers:
+                if len(matches) >= limit:
+                    return True
+                if allowed_terms is None or term_number in allowed_terms:
+                    matches.setdefault(term_number)
+            return len(matches) >= limit
+
+        # Exact label, then label prefix
+        start, end = self._prefix_range(self._labels, normalised_query)
+        exact_end = bisect.bisect_right(self._labels, normalised_query, start, end)
+        if (add_matches(sorted(self._label_terms[start:exact_end]))
+                or add_matches(sorted(self._label_terms[exact_end:end]))):
+            return self._terms(matches)
+
+        # Every word of the query is the start of a word of the label or a synonym
+        query_tokens = normalised_query.split()
+        token_matches = None
+        for query_token in sorted(query_tokens, key=len, reverse=True):  # Longest, and so fewest matches, first
+            start, end = self._prefix_range(self._tokens, query_token)
+            token_matches = (set(self._token_terms[start:end]) if token_matches is None
+                             else token_matches.intersection(self._token_terms[start:end]))
+            if not token_matches:
+                break
+        if add_matches(sorted(token_matches)):
+            return self._terms(matches)
+
+        # Anywhere in the label or a synonym
+        if len(normalised_query) >= 3:
+            substring_matches = None
+            for trigram in sorted(trigrams(normalised_query),
+                                  key=lambda trigram: len(self._trigram_terms.get(trigram, ()))):
+                trigram_terms = self._trigram_terms.get(trigram, ())
+                substring_matches = (set(trigram_terms) if substring_matches is None
+                                     else substring_matches.intersection(trigram_terms))
+                if not substring_matches:
+                    break
+            add_matches(term_number
+                        for term_number in sorted(substring_matches)
+                        if normalised_query in self._texts[term_number])
+
+        return self._terms(matches)
+
+    def descendants(self, class_ids: Sequence[str]) -> FrozenSet[int]:
+        """Return the numbers of the terms which are subclasses of any of class_ids, directly or not"""
+        descendants = frozenset()
+        for class_id in class_ids:
+            if (class_descendants := self._descendants.get(class_id)) is None:
+                found = set()
+                pending = [class_id]
+                while pending:
+                    for term_number in self._children.get(pending.pop(), ()):
+                        if term_number not in found:
+                            found.add(term_number)
+                            pending.append(self.terms[term_number].id)
+                class_descendants = self._descendants[class_id] = frozenset(found)
+            descendants |= class_descendants
+        return descendants
+
+    def _terms(self, term_numbers: Iterable[int]) -> List[Term]:
+        return [self.terms[term_number] for term_number in term_numbers]
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+        """Return the start and end of the range of sorted keys beginning with prefix"""
+        start = bisect.bisect_left(keys, prefix)
+        return start, bisect.bisect_left(keys, f'{prefix}{MAX_CHARACTER}', start)
+
+
+def _literal(value: Union[str, Dict, List, None]) -> Optional[str]:
+    """Return the first string of a JSON-LD literal value, e.g. {"@value": "Sequence alignment", "@language": "en"}"""
+    if type(value) == list:
+        value = value[0] if value else None
+    if type(value) == dict:
+        value = value.get("@value")
+    return value if type(value) == str else None
+
+
+def _literals(value: Union[str, Dict, List, None]) -> Tuple[str, ...]:
+    values = value if type(value) == list else [value]
+    return tuple(literal for literal in map(_literal, values) if literal)
+
+
+def _references(value: Union[str, Dict, List, None]) -> List[str]:
+    """Return the @ids of a JSON-LD node reference or list of them"""
+    values = value if type(value) == list else [value]
+    return [value["@id"] if type(value) == dict else value
+            for value in values
+            if type(value) == str or (type(value) == dict and "@id" in value)]
+
+
+def terms_from_graph(document: Dict, offline: bool = False) -> Iterator[Term]:
+    """
+    Generate the labelled nodes of a JSON-LD document, e.g. bioschemas.json or an ontology converted to JSON-LD, as
+    terms. Compact @ids are expanded with the document's @context
+    :param document: Dict, JSON-LD document with a @graph
+    :param offline: bool, don't access the network to fetch remote contexts
+    """
+    from jsonschema2crateo.context import get_context_resolver
+
+    compiled_context = get_context_resolver().compile(document.get("@context", {}), offline=offline)
+    prefixes = dict(compiled_context.terms, **compiled_context.prefixes)
+
+    def expand(identifier: str) -> str:
+        prefix, separator, suffix = identifier.partition(':')
+        if separator and prefix in prefixes and not suffix.startswith('//'):
+            return f'{prefixes[prefix]}{suffix}'
+        return identifier
+
+    for node in document.get("@graph", []):
+        if (label := _literal(node.get("rdfs:label"))) and type(node.get("@id")) == str:
+            yield Term(
+                id=expand(node["@id"]),
+                label=label,
+                description=HTML_TAG_PATTERN.sub('', _literal(node.get("rdfs:comment")) or ''),
+                synonyms=tuple(synonym
+                               for synonym_property in SYNONYM_PROPERTIES
+                               for synonym in _literals(node.get(synonym_property))),
+                parents=tuple(expand(parent) for parent in _references(node.get("rdfs:subClassOf"))),
+            )
+
+
+def terms_from_table(path: str) -> Iterator[Term]:
+    """
+    Generate the terms of an ontology table with the columns in TABLE_COLUMNS, e.g. EDAM.csv or EDAM.tsv. Obsolete
+    terms are left out
+    :param path: str, path of a CSV file, or TSV file if it has a .tsv extension
+    """
+    import csv  # Only needed for tables
+
+    def values(row: Dict, column: str) -> Tuple[str, ...]:
+        return tuple(value for value in (row.get(TABLE_COLUMNS[column]) or '').split(TABLE_VALUE_SEPARATOR) if value)
+
+    with open(path, 'r', newline='', encoding='utf8') as table_file:
+        for row in csv.DictReader(table_file, delimiter='\t' if path.lower().endswith('.tsv') else ','):
+            if (row.get(TABLE_COLUMNS["obsolete"]) or '').upper() == 'TRUE':
+                continue
+            if (term_id := row.get(TABLE_COLUMNS["id"])) and (label := row.get(TABLE_COLUMNS["label"])):
+                yield Term(
+                    id=term_id,
+                    label=label,
+                    description=(values(row, "description") or ('',))[0],
+                    synonyms=values(row, "synonyms"),
+                    parents=values(row, "parents"),
+                )
+
+
+def read_ontology(path: str, offline: bool = False) -> List[Term]:
+    """
+    Read the terms of an ontology file: a JSON-LD graph, or a CSV or TSV table (see terms_from_table)
+    """
+    if path.lower().endswith(('.csv', '.tsv')):
+        return list(terms_from_table(path))
+
+    with open(path, 'rb') as ontology_file:
+        return list(terms_from_graph(serialization.load(ontology_file), offline))
+
+
+def load_lookup_index(graph: Dict,
+                      ontology_paths: Sequence[str] = (),
+                      cache_dir: Optional[str] = None,
+                      version_key: Optional[str] = None,
+                      offline: bool = False,
+                      ) -> LookupIndex:
+    """
+    Build the lookup index of a vocabulary graph and ontology files, or read it from a copy built earlier
+    :param graph: Dict, JSON-LD vocabulary, e.g. the BioSchemas graph
+    :param ontology_paths: Sequence[str], ontology files read by read_ontology()
+    :param cache_dir: Optional[str], directory for a pickled copy of the index. Not kept if None
+    :param version_key: Optional[str], key identifying the version of graph, e.g. VocabularyStore.version_key.
+        The index is only kept in cache_dir if the version of graph is known
+    :param offline: bool, don't access the network to fetch remote contexts
+    :return: LookupIndex
+    """
+    pickle_path = None
+    if cache_dir and version_key:
+        source_keys = [version_key]
+        for ontology_path in ontology_paths:
+            stat = os.stat(ontology_path)
+            source_keys.append(f'{os.path.abspath(ontology_path)}|{stat.st_mtime_ns}|{stat.st_size}')
+        key_hash = hashlib.sha1('\n'.join(source_keys).encode('utf8')).hexdigest()
+        pickle_path = os.path.join(cache_dir, f'lookup_index.{key_hash}.pickle')
+
+        if os.path.isfile(pickle_path):
+            try:
+                with open(pickle_path, 'rb') as pickle_file:
+                    return pickle.load(pickle_file)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                pass  # Corrupt or incompatible. Rebuild it
+
+    terms = list(terms_from_graph(graph, offline))
+    for ontology_path in ontology_paths:
+        terms += read_ontology(ontology_path, offline)
+    lookup_index = LookupIndex(terms)
+
+    if pickle_path:
+        from jsonschema2crateo.vocabulary import _atomic_write
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            for stale_pickle_path in glob.glob(os.path.join(glob.escape(cache_dir), 'lookup_index.*.pickle')):
+                os.remove(stale_pickle_path)
+            _atomic_write(pickle_path, pickle.dumps(lookup_index, protocol=PICKLE_PROTOCOL))
+        except OSError:
+            pass  # Cache directory not writable. Carry on without the pre-built copy
+
+    return lookup_index
+
+
+def definition_lookup(lookup_url: str, definition_values: Dict) -> Optional[Dict]:
+    """
+    Return the Crate-O lookup configuration of a class built from a definition with a "vocabulary", e.g.
+    {"children_of": "http://edamontology.org/operation_0004"}, so that its values are chosen from the terms served at
+    lookup_url. The query typed by the user is appended to the URL
+    :param lookup_url: str, URL of a /lookup endpoint (see server.py)
+    :param definition_values: Dict, JSONschema definition
+    :return: Optional[Dict], None if the definition doesn't take its values from an ontology
+    """
+    vocabulary = definition_values.get("vocabulary")
+    if type(vocabulary) != dict or not ("children_of" in vocabulary or "ontology" in vocabulary):
+        return None
+
+    children_of = vocabulary.get("children_of", [])
+    if type(children_of) == str:
+        children_of = [children_of]
+
+    query_parameters = urlencode([("children_of", class_id) for class_id in children_of] + [("q", '')])
+    return {"url": f'{lookup_url}?{query_parameters}'}
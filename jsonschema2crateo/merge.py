@@ -0,0 +1,93 @@
+"""
+Merge of Crate-O profiles translated from several JSONschemas into a single profile
+"""
+from typing import Dict, List
+
+MERGED_NAME_SEPARATOR = ' + '
+MERGED_DESCRIPTION_SEPARATOR = '\n\n'
+
+
+def merge_class(crateo_class: Dict,
+                other_class: Dict,
+                ) -> Dict:
+    """
+    Return a copy of crateo_class with the inputs of other_class it doesn't already have, by name, appended.
+    Everything else is taken from crateo_class
+    :param crateo_class: Dict, class from an earlier profile
+    :param other_class: Dict, class with the same name from a later profile
+    :return: Dict, merged class
+    """
+    input_names = set(crateo_input["name"] for crateo_input in crateo_class.get("inputs", []))
+    new_inputs = [crateo_input
+                  for crateo_input in other_class.get("inputs", [])
+                  if crateo_input["name"] not in input_names]
+    if not new_inputs:
+        return crateo_class
+
+    return dict(crateo_class, inputs=crateo_class.get("inputs", []) + new_inputs)
+
+
+def merge_profiles(crateo_profiles: List[Dict]) -> Dict:
+    """
+    Merge Crate-O profiles into one, deterministically for a given order of profiles:
+    - classes are kept in order of first appearance. Where several profiles define a class, the definition from the
+      first is kept, with the inputs only defined by later profiles appended in order
+    - each profile's root dataset class becomes a root dataset of the merged profile, and is enabled ahead of the
+      other enabled classes
+    - metadata names and descriptions are joined, and input groups are taken from the first profile
+    - where several profiles configure a lookup for a class, the first is kept
+    Input profiles are not modified.
+    :param crateo_profiles: List[Dict], profiles translated from single JSONschemas
+    :return: Dict, merged profile
+    """
+    assert crateo_profiles, 'No crateo_profiles provided'
+
+    root_dataset_types = {}
+    for crateo_profile in crateo_profiles:
+        for root_dataset in crateo_profile.get("rootDatasets", {}).values():
+            # The root class is listed last, after the Dataset class. None if a spec has no $validation
+            root_dataset_id = root_dataset["type"][-1]
+            if root_dataset_id and root_dataset_id not in root_dataset_types:
+                root_dataset_types[root_dataset_id] = root_dataset["type"]
+
+    crateo_classes = {}
+    for crateo_profile in crateo_profiles:
+        for class_name, crateo_class in crateo_profile["classes"].items():
+            if existing_class := crateo_classes.get(class_name):
+                crateo_classes[class_name] = merge_class(existing_class, crateo_class)
+            else:
+                crateo_classes[class_name] = crateo_class
+
+    metadata_list = [crateo_profile["metadata"] for crateo_profile in crateo_profiles if "metadata" in crateo_profile]
+    merged_profile = {}
+    if metadata_list:
+        merged_profile["metadata"] = {
+            "name": MERGED_NAME_SEPARATOR.join(metadata["name"] for metadata in metadata_list),
+            "description": MERGED_DESCRIPTION_SEPARATOR.join(metadata["description"] for metadata in metadata_list),
+            "version": metadata_list[0]["version"],
+        }
+
+    merged_profile["rootDatasets"] = {
+        root_dataset_id: {
+            "type": root_types
+        }
+        for root_dataset_id, root_types in root_dataset_types.items()
+    }
+    merged_profile["inputGroups"] = crateo_profiles[0]["inputGroups"]
+    merged_profile["enabledClasses"] = list(dict.fromkeys(
+        list(root_dataset_types.keys()) +
+        [class_name
+         for crateo_profile in crateo_profiles
+         for class_name in crateo_profile["enabledClasses"]
+         if class_name]
+    ))
+    merged_profile["classes"] = crateo_classes
+
+    lookups = {}
+    for crateo_profile in crateo_profiles:
+        for class_name, lookup in crateo_profile.get("lookup", {}).items():
+            lookups.setdefault(class_name, lookup)
+    if lookups:
+        merged_profile["lookup"] = lookups
+
+    return merged_profile
@@ -0,0 +1,159 @@
+"""
+Compact model of a Crate-O profile, built by the translator and serialised at the end.
+Inputs and classes are slotted objects rather than dicts, identifiers are interned, and the type names of each distinct
+property definition are one shared tuple. Model objects read like the dicts they are serialised as. The model is kept
+for profiles which are only written; profiles returned to callers are converted with plain()
+"""
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class CrateOInput(Mapping):
+    """Crate-O class input"""
+    __slots__ = ('id', 'name', 'label', 'help', 'required', 'multiple', 'type')
+
+    def __init__(self,
+                 id: str,
+                 name: str,
+                 label: str,
+                 help: str,
+                 required: bool,
+                 multiple: bool,
+                 type: Tuple[str, ...],
+                 ) -> None:
+        """
+        :param type: Tuple[str, ...], type names, shared by every input with the same property definition
+        """
+        self.id: str = sys.intern(id)
+        self.name: str = sys.intern(name)
+        self.label: str = label
+        self.help: str = help
+        self.required: bool = required
+        self.multiple: bool = multiple
+        self.type: Tuple[str, ...] = type
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        if key == 'type':
+            return list(self.type)  # Callers get their own list, as with a dict input
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "label": self.label,
+            "help": self.help,
+            "required": self.required,
+            "multiple": self.multiple,
+            "type": list(self.type),
+        }
+
+    def __repr__(self) -> str:
+        return f'CrateOInput({self.to_dict()!r})'
+
+
+class CrateOClass(Mapping):
+    """Crate-O class definition"""
+    __slots__ = ('definition', 'subClassOf', 'inputs')
+
+    def __init__(self,
+                 subClassOf: Optional[List[str]],
+                 inputs: List[CrateOInput],
+                 definition: str = "override",
+                 ) -> None:
+        """
+        :param subClassOf: Optional[List[str]], superclass identifiers. None to leave out of the class definition
+        :param inputs: List[CrateOInput]
+        :param definition: str, Crate-O class definition mode
+        """
+        self.definition: str = definition
+        self.subClassOf: Optional[List[str]] = subClassOf
+        self.inputs: List[CrateOInput] = inputs
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__ or (value := getattr(self, key)) is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self.__slots__ if getattr(self, key) is not None)
+
+    def __len__(self) -> int:
+        return len(self.__slots__) - (self.subClassOf is None)
+
+    def to_dict(self) -> Dict:
+        """Return the class as a dict. Inputs are left as CrateOInput objects"""
+        if self.subClassOf is None:
+            return {"definition": self.definition, "inputs": self.inputs}
+        return {"definition": self.definition, "subClassOf": self.subClassOf, "inputs": self.inputs}
+
+    def __repr__(self) -> str:
+        return f'CrateOClass({self.to_dict()!r})'
+
+
+class TypeReference:
+    """
+    A type found in a JSONschema type definition, with the definition it was found in. Conversion results are only
+    copied into dicts when needed by convert_type_def() callers
+    """
+    __slots__ = ('type', 'description', 'format', 'definition')
+
+    def __init__(self,
+                 type: str,
+                 definition: Optional[Dict] = None,
+                 description: Optional[str] = None,
+                 ) -> None:
+        """
+        :param type: str, Crate-O type name
+        :param definition: Optional[Dict], simple JSONschema type definition. None for a reference to a class
+        :param description: Optional[str], description replacing the one in the definition, e.g. inherited from an
+            enclosing oneOf/anyOf definition
+        """
+        if description is None and definition:
+            description = definition.get("description")
+
+        self.type: str = sys.intern(type)
+        self.definition: Optional[Dict] = definition
+        self.description: Optional[str] = description
+        self.format: Optional[str] = definition.get("format") if definition else None
+
+    def to_dict(self) -> Dict:
+        """Return the Crate-O type definition: a copy of the JSONschema type definition with the converted type"""
+        if self.definition is None:
+            return {"type": self.type}
+
+        result = dict(self.definition)
+        if "type" in result:
+            result.pop("@type", None)
+        result["type"] = self.type
+        if self.description is not None:
+            result["description"] = self.description
+        return result
+
+
+def plain(value: Any) -> Any:
+    """
+    Return a copy of a profile, or part of one, made only of dicts and lists. Much faster than letting the standard
+    library encoder convert each model object through serialization.default()
+    """
+    value_type = type(value)
+    if value_type is CrateOInput:
+        return value.to_dict()
+    if value_type is CrateOClass:
+        result = value.to_dict()
+        result["inputs"] = [crateo_input.to_dict() for crateo_input in value.inputs]
+        return result
+    if value_type is dict or isinstance(value, Mapping):
+        return {key: plain(item) for key, item in value.items()}
+    if value_type is list or value_type is tuple:
+        return [plain(item) for item in value]
+    return value
@@ -0,0 +1,135 @@
+"""
+Concurrent building of the classes of one JSONschema document: a thread pool for translations that wait on URL
+probes, or a process pool for CPU-bound translations of documents with many definitions. Classes are returned in the
+order of their sources, so the output is the same as building them one at a time
+"""
+import functools
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
+
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.context import CompiledContext
+from jsonschema2crateo.graph_index import GraphIndex
+from jsonschema2crateo.model import CrateOClass
+from jsonschema2crateo.vocabulary import VocabularyStore
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from jsonschema2crateo import JSONSchema2CrateO
+
+# Class sources sent to each process pool worker at a time. Single classes are too small to be worth a round trip
+PROCESS_CHUNK_SIZE = 8
+
+# State shared by all classes built in a process pool worker
+_worker_state: Dict = {}
+
+
+class ClassSource(NamedTuple):
+    """A class to build: an @graph entry with $validation, or one of its definitions"""
+    key: str  # Content hash, identifying the class in class manifests
+    definition_name: Optional[str]  # None for an @graph entry
+    values: Dict  # @graph entry or definition
+
+
+def build_class(converter: 'JSONSchema2CrateO',
+                input_graph: GraphIndex,
+                class_source: ClassSource,
+                ) -> Tuple[str, CrateOClass]:
+    """Build a class with converter, returning (crateo_class_name, crateo_class)"""
+    if class_source.definition_name is None:
+        return converter.subgraph2class(class_source.values, input_graph)
+    return converter.definition2class(class_source.definition_name, class_source.values, input_graph)
+
+
+def _init_worker(bioschemas: Optional[Dict],
+                 vocabulary: VocabularyStore,
+                 resolution_cache: ResolutionCache,
+                 offline: bool,
+                 compiled_context: CompiledContext,
+                 context: Dict,
+                 expanded_ids: Dict[str, str],
+                 input_graph: GraphIndex,
+                 ) -> None:
+    """Initialise a converter in the same state as the one in the parent process, for every class built here"""
+    from jsonschema2crateo import JSONSchema2CrateO
+
+    converter = JSONSchema2CrateO(bioschemas=bioschemas,
+                                  vocabulary=vocabulary,
+                                  resolution_cache=resolution_cache,
+                                  offline=offline,
+                                  prefetch_workers=0,
+                                  )
+    converter.set_context(compiled_context)
+    converter.context = context
+    converter.expanded_ids = expanded_ids
+    _worker_state['converter'] = converter
+    _worker_state['input_graph'] = input_graph
+
+
+def _build_class(class_source: ClassSource) -> Tuple[Tuple[str, CrateOClass], FrozenSet[str]]:
+    """Build a class in a process pool worker, returning it with the URLs whose probes failed with a network error"""
+    converter = _worker_state['converter']
+    converter.probe_errors.clear()
+    built_class = build_class(converter, _worker_state['input_graph'], class_source)
+    return built_class, frozenset(converter.probe_errors)
+
+
+class ClassBuilder:
+    """
+    Pool building classes for a converter. Threads share the converter and its caches. Processes each have their own
+    converter, set up with the context, expanded identifiers and BioSchemas graph of this one; URL probes they make
+    are only shared through a persistent resolution cache, and aren't counted in the converter's stats. Their probe
+    errors are added to the converter's, so that classes built after them aren't reused
+    """
+
+    def __init__(self,
+                 converter: 'JSONSchema2CrateO',
+                 input_graph: GraphIndex,
+                 workers: int,
+                 use_processes: bool = False,
+                 ) -> None:
+        """
+        :param converter: JSONSchema2CrateO, converter to build classes for
+        :param input_graph: GraphIndex, index of the whole @graph used for rdfs:label lookups
+        :param workers: int, number of pool workers
+        :param use_processes: bool, use a process pool rather than a thread pool
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # Only imported when used
+
+        self.converter: 'JSONSchema2CrateO' = converter
+        self.use_processes: bool = use_processes
+        if use_processes:
+            self.executor: 'Executor' = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(converter._bioschemas, converter.vocabulary, converter.resolution_cache, converter.offline,
+                          converter.compiled_context, converter.context, converter.expanded_ids, input_graph),
+            )
+            self.build = _build_class
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+            self.build = functools.partial(build_class, converter, input_graph)
+
+    def map(self, class_sources: List[ClassSource]) -> Iterator[Tuple[str, CrateOClass]]:
+        """Build classes concurrently, returning (crateo_class_name, crateo_class) in the order of class_sources"""
+        if not self.use_processes:
+            return self.executor.map(self.build, class_sources)
+
+        return self._record_probe_errors(self.executor.map(self.build, class_sources, chunksize=PROCESS_CHUNK_SIZE))
+
+    def _record_probe_errors(self,
+                             results: Iterator[Tuple[Tuple[str, CrateOClass], FrozenSet[str]]],
+                             ) -> Iterator[Tuple[str, CrateOClass]]:
+        """Add the probe errors of classes built by worker processes to the converter's"""
+        for built_class, probe_errors in results:
+            self.converter.probe_errors.update(probe_errors)
+            yield built_class
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'ClassBuilder':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
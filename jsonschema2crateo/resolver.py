@@ -0,0 +1,141 @@
+"""
+Concurrent resolution of candidate URLs for identifiers whose context has to be guessed
+"""
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.stats import TranslationStats
+
+if TYPE_CHECKING:  # requests is only imported once a session is needed, to keep imports fast
+    import requests
+
+DEFAULT_PREFETCH_WORKERS = 16
+DEFAULT_PER_HOST_LIMIT = 4
+
+PROPERTY_ID_EXCLUSIONS = ['identifier', '@id']
+
+
+def collect_identifiers(input_json_schema: Dict,
+                        property_mapping: Optional[Dict[str, str]] = None,
+                        ) -> List[str]:
+    """
+    Collect every identifier that translate() may need to expand, in the order translate() meets them:
+    rdfs:subClassOf identifiers, $validation properties, and properties and superclasses of definitions
+    :param input_json_schema: Dict, loaded JSONschema
+    :param property_mapping: Optional[Dict[str, str]], property name substitutions made before expansion
+    :return: List[str], unique identifiers
+    """
+    property_mapping = property_mapping or {}
+    identifiers = {}  # Ordered set
+
+    def add_properties(properties: Dict) -> None:
+        for property_name in properties:
+            if property_name not in PROPERTY_ID_EXCLUSIONS:
+                identifiers[property_mapping.get(property_name, property_name)] = None
+
+    for subgraph in input_json_schema.get("@graph", []):
+        rdfs_superclasses = subgraph.get("rdfs:subClassOf") or []
+        if type(rdfs_superclasses) == dict:
+            rdfs_superclasses = [rdfs_superclasses]
+        for rdfs_superclass in rdfs_superclasses:
+            identifiers[rdfs_superclass["@id"]] = None
+
+        if input_validation := subgraph.get("$validation"):
+            add_properties(input_validation.get("properties", {}))
+
+            for definition_values in input_validation.get("definitions", {}).values():
+                superclasses = definition_values.get("vocabulary", {}).get("children_of", [])
+                if type(superclasses) == str:
+                    superclasses = [superclasses]
+                for superclass in superclasses:
+                    identifiers[superclass] = None
+
+                add_properties(definition_values.get("properties", {})
+                               or definition_values.get("vocabulary", {}).get("property", {}))
+
+    return list(identifiers)
+
+
+def new_session(pool_size: int = DEFAULT_PREFETCH_WORKERS) -> 'requests.Session':
+    """
+    Return a keep-alive HTTP session with a connection pool large enough for pool_size concurrent requests
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def probe_url(session: 'requests.Session',
+              url: str,
+              timeout: float,
+              ) -> Optional[bool]:
+    """
+    Return True if url resolves with a 200 response, False if not, or None on a network error.
+    Uses a HEAD request, falling back to GET for servers which don't support HEAD.
+    """
+    import requests
+
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+        if response.status_code in [405, 501]:
+            with session.get(url, allow_redirects=True, timeout=timeout, stream=True) as response:
+                pass
+    except requests.RequestException:
+        return None
+
+    return response.status_code == 200
+
+
+def resolve_urls(urls: Iterable[str],
+                 resolution_cache: ResolutionCache,
+                 session: Optional['requests.Session'] = None,
+                 max_workers: int = DEFAULT_PREFETCH_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 timeout: float = 10,
+                 stats: Optional[TranslationStats] = None,
+                 ) -> Dict[str, Optional[bool]]:
+    """
+    Probe urls concurrently, storing results in resolution_cache
+    :param urls: Iterable[str], URLs to probe
+    :param resolution_cache: ResolutionCache, cache for probe results. Network errors aren't cached
+    :param session: Optional[requests.Session], shared session. A new pooled session is created if not supplied
+    :param max_workers: int, maximum number of concurrent requests
+    :param per_host_limit: int, maximum number of concurrent requests to any one host
+    :param timeout: float, seconds to wait for each response
+    :param stats: Optional[TranslationStats], stats to record probe outcomes and latencies in
+    :return: Dict[str, Optional[bool]], probe results by URL. None for network errors
+    """
+    urls = list(urls)
+    if not urls:
+        return {}
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    session = session or new_session(max_workers)
+    host_limits: Dict[str, threading.Semaphore] = {}
+    host_limits_lock = threading.Lock()
+
+    def probe(url: str) -> Optional[bool]:
+        with host_limits_lock:
+            host_limit = host_limits.setdefault(urlsplit(url).netloc, threading.Semaphore(per_host_limit))
+
+        with host_limit:
+            start_time = time.perf_counter()
+            exists = probe_url(session, url, timeout)
+            if stats:
+                stats.record_probe(exists, time.perf_counter() - start_time)
+
+        if exists is not None:
+            resolution_cache.put(url, exists)
+        return exists
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(urls, executor.map(probe, urls)))
@@ -0,0 +1,135 @@
+"""
+Pluggable JSON backend for parsing inputs and writing profiles, using orjson or ujson if installed
+"""
+import itertools
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, IO, Iterator, Optional, Tuple, Union
+
+from jsonschema2crateo.model import CrateOClass, CrateOInput, plain
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Available backends in order of preference
+BACKENDS = [backend for backend, module in [('orjson', orjson), ('ujson', ujson), ('json', json)] if module]
+
+# Backend used unless another is requested. Can be overridden with the JSONSCHEMA2CRATEO_JSON_BACKEND environment
+# variable, e.g. to compare backends
+DEFAULT_BACKEND = os.environ.get('JSONSCHEMA2CRATEO_JSON_BACKEND') or BACKENDS[0]
+
+INDENT = '\t'
+WRITE_BLOCK_CHUNKS = 4096  # Encoder chunks (mostly single tokens) joined for each write
+
+
+def _backend(backend: Optional[str]) -> str:
+    backend = backend or DEFAULT_BACKEND
+    assert backend in BACKENDS, f'JSON backend "{backend}" is not available. Use one of {BACKENDS}'
+    return backend
+
+
+def default(value: Any) -> Dict:
+    """
+    Encode values the JSON encoders don't support natively: mappings other than dicts, e.g. the classes and inputs of
+    a translated profile (see model.py), are encoded as JSON objects. Used by the C encoders of orjson, ujson and the
+    standard library. The indenting standard library encoder is faster on plain() copies (see PlainView)
+    """
+    if to_dict := getattr(value, 'to_dict', None):
+        return to_dict()
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class PlainView(dict):
+    """
+    Dict encoded by the indenting standard library encoder as a plain() copy of the mapping it holds. Its classes and
+    inputs are copied one at a time as they are encoded, so the whole profile is never copied
+    """
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key, value in super().items():
+            yield key, plain_view(value)
+
+
+def plain_view(value: Any) -> Any:
+    """Return value with the model objects it holds copied by plain() only once they are encoded"""
+    if type(value) is CrateOClass or type(value) is CrateOInput:
+        return plain(value)
+    if isinstance(value, Mapping):
+        return PlainView(value)
+    if type(value) is list or type(value) is tuple:
+        return [plain_view(item) for item in value]
+    return value
+
+
+def loads(data: Union[str, bytes],
+          backend: Optional[str] = None,
+          ) -> Any:
+    """
+    Parse a JSON document
+    :param data: Union[str, bytes], JSON text. bytes must be UTF-8 encoded
+    :param backend: Optional[str], one of BACKENDS. Defaults to DEFAULT_BACKEND
+    :return: Any, parsed document
+    """
+    backend = _backend(backend)
+    if backend == 'orjson':
+        return orjson.loads(data)
+    if backend == 'ujson':
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def load(input_file: IO,
+         backend: Optional[str] = None,
+         ) -> Any:
+    """Parse a JSON document from a file opened in text or binary mode"""
+    return loads(input_file.read(), backend)
+
+
+def write_chunks(chunks: Iterator[str],
+                 output_file: IO[str],
+                 ) -> None:
+    """Write encoded chunks to a file, joined into blocks of WRITE_BLOCK_CHUNKS to limit the number of writes"""
+    while block := ''.join(itertools.islice(chunks, WRITE_BLOCK_CHUNKS)):
+        output_file.write(block)
+
+
+def dump(content: Dict,
+         output_path: str,
+         compact: bool = False,
+         backend: Optional[str] = None,
+         ) -> None:
+    """
+    Write content to a JSON file
+    :param content: Dict, JSON-serialisable content, which may include model objects
+    :param output_path: str, output file path
+    :param compact: bool, write UTF-8 without indentation or whitespace for machine consumers, encoded in one pass
+        by the fastest backend. Otherwise the output is tab indented by the standard library encoder, because neither
+        orjson nor ujson can indent with tabs, and written as it is encoded rather than built as one string
+    :param backend: Optional[str], one of BACKENDS. Defaults to DEFAULT_BACKEND
+    """
+    if not compact:
+        with open(output_path, 'w') as output_file:
+            write_chunks(json.JSONEncoder(indent=INDENT).iterencode(plain_view(content)), output_file)
+        return
+
+    backend = _backend(backend)
+    with open(output_path, 'wb') as output_file:
+        if backend == 'orjson':
+            output_file.write(orjson.dumps(content, default=default))
+        elif backend == 'ujson':
+            output_file.write(ujson.dumps(content, ensure_ascii=False, escape_forward_slashes=False,
+                                          default=default).encode('utf8'))
+        else:
+            # The C encoder is only used for one-shot encoding without indentation
+            output_file.write(json.dumps(content, separators=(',', ':'), ensure_ascii=False,
+                                         default=default).encode('utf8'))
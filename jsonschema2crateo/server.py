@@ -0,0 +1,252 @@
+"""
+Long-running HTTP translation service keeping BioSchemas, resolution cache and HTTP session warm between requests
+
+Endpoints:
+    GET  /health                      Liveness check
+    GET  /stats                       Request and cache counters
+    GET  /translate?url=<spec URL>    Translate the JSONschema at an http(s) URL
+    POST /translate                   Translate the JSONschema in the request body
+    GET  /lookup?q=<text>             Vocabulary terms matching text, for autocompletion. Optional parameters:
+                                      children_of=<class IRI> (repeatable) and limit=<number of terms>
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from jsonschema2crateo import JSONSchema2CrateO, serialization
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.fetch import Mirror, get_mirror
+from jsonschema2crateo.lookup import DEFAULT_LIMIT, MAX_LIMIT, LookupIndex, load_lookup_index
+from jsonschema2crateo.resolver import DEFAULT_PREFETCH_WORKERS, new_session
+from jsonschema2crateo.vocabulary import VocabularyStore, get_vocabulary
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class TranslationService:
+    """
+    State shared by all requests: BioSchemas vocabulary, resolution cache, pooled HTTP session and the lookup index
+    of vocabulary terms
+    """
+
+    def __init__(self,
+                 vocabulary: Optional[VocabularyStore] = None,
+                 resolution_cache: Optional[ResolutionCache] = None,
+                 offline: bool = False,
+                 prefetch_workers: int = DEFAULT_PREFETCH_WORKERS,
+                 bioschemas: Optional[Dict] = None,
+                 mirror: Optional[Mirror] = None,
+                 ontology_paths: Sequence[str] = (),
+                 lookup_url: Optional[str] = None,
+                 ) -> None:
+        """
+        :param ontology_paths: Sequence[str], ontology files, e.g. EDAM.csv, whose terms are looked up as well as
+            those of the BioSchemas vocabulary
+        :param lookup_url: Optional[str], public URL of this service's /lookup endpoint, which classes of translated
+            profiles taking their values from an ontology are wired to
+        """
+        self.vocabulary: VocabularyStore = vocabulary if vocabulary is not None else get_vocabulary()
+        self.resolution_cache: ResolutionCache = resolution_cache if resolution_cache is not None else ResolutionCache()
+        self.offline: bool = offline
+        self.prefetch_workers: int = prefetch_workers
+        self.bioschemas: Optional[Dict] = bioschemas
+        self.mirror: Mirror = mirror if mirror is not None else get_mirror()
+        self.session = new_session(max(prefetch_workers, 1))
+        self.ontology_paths: Sequence[str] = ontology_paths
+        self.lookup_url: Optional[str] = lookup_url
+        self._lookup_index: Optional[LookupIndex] = None
+        self._lookup_lock = threading.Lock()
+
+        self.requests: int = 0
+        self.failures: int = 0
+        self.translate_seconds: float = 0.0
+        self._lock = threading.Lock()
+
+    def translate(self, input_json_schema: Dict) -> Dict:
+        """
+        Translate a parsed JSONschema into a Crate-O profile using the warm shared state
+        """
+        converter = JSONSchema2CrateO(
+            bioschemas=self.bioschemas,
+            vocabulary=self.vocabulary,
+            resolution_cache=self.resolution_cache,
+            offline=self.offline,
+            session=self.session,
+            lookup_url=self.lookup_url,
+        )
+        converter.set_input_json_schema(input_json_schema)
+        if self.prefetch_workers:
+            converter.prefetch(max_workers=self.prefetch_workers)
+
+        return converter.translate(converter.input_json_schema)
+
+    def translate_url(self, url: str) -> Dict:
+        """
+        Fetch a JSONschema from an http(s) URL through the mirror and translate it
+        """
+        if not re.match(r'http(s)?://', url):
+            raise ValueError(f'Only http(s) URLs can be translated: {url}')
+
+        return self.translate(serialization.loads(self.mirror.read(url, offline=self.offline)))
+
+    @property
+    def lookup_index(self) -> LookupIndex:
+        """Index of the terms of the BioSchemas vocabulary and ontology files, built on first use"""
+        with self._lookup_lock:
+            if self._lookup_index is None:
+                if self.bioschemas is not None:
+                    self._lookup_index = load_lookup_index(self.bioschemas, self.ontology_paths,
+                                                           offline=self.offline)
+                else:
+                    graph = self.vocabulary.load(self.offline)[0]
+                    self._lookup_index = load_lookup_index(graph, self.ontology_paths,
+                                                           cache_dir=self.vocabulary.cache_dir,
+                                                           version_key=self.vocabulary.version_key,
+                                                           offline=self.offline)
+            return self._lookup_index
+
+    def lookup(self, query_parameters: Dict[str, List[str]]) -> List[Dict]:
+        """
+        Return the terms matching the "q" query parameter as RO-Crate entities, best match first
+        :param query_parameters: Dict[str, List[str]], parsed query string
+        """
+        if not (queries := query_parameters.get('q')):
+            raise ValueError('Missing "q" query parameter')
+        try:
+            limit = min(int(query_parameters.get('limit', [DEFAULT_LIMIT])[0]), MAX_LIMIT)
+        except ValueError:
+            raise ValueError('"limit" must be a number')
+
+        return [term.to_entity()
+                for term in self.lookup_index.search(queries[0], limit, query_parameters.get('children_of', []))]
+
+    def record(self, seconds: float, failed: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.translate_seconds += seconds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "translate_seconds": round(self.translate_seconds, 6),
+                "resolution_cache": self.resolution_cache.stats(),
+                "bioschemas_loaded": self.bioschemas is not None or self.vocabulary.version_key is not None,
+                "lookup_terms": len(self._lookup_index) if self._lookup_index is not None else None,
+            }
+
+
+class TranslationRequestHandler(BaseHTTPRequestHandler):
+    """Request handler dispatching to the TranslationService of its server"""
+    server: 'TranslationServer'
+
+    def do_GET(self) -> None:
+        url_parts = urlsplit(self.path)
+
+        if url_parts.path == '/health':
+            self.send_json(200, {"status": "ok"})
+        elif url_parts.path == '/stats':
+            self.send_json(200, self.server.service.stats())
+        elif url_parts.path == '/translate':
+            if not (urls := parse_qs(url_parts.query).get('url')):
+                self.send_json(400, {"error": 'Missing "url" query parameter'})
+                return
+            self.run_translation(lambda: self.server.service.translate_url(urls[0]))
+        elif url_parts.path == '/lookup':
+            self.run_lookup(parse_qs(url_parts.query))
+        else:
+            self.send_json(404, {"error": f'Unknown path {url_parts.path}'})
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != '/translate':
+            self.send_json(404, {"error": f'Unknown path {self.path}'})
+            return
+
+        content_length = int(self.headers.get('Content-Length') or 0)
+        if not 0 < content_length <= MAX_BODY_SIZE:
+            self.send_json(400, {"error": 'Request body must contain a JSONschema'})
+            return
+
+        try:
+            input_json_schema = serialization.loads(self.rfile.read(content_length))
+        except ValueError as value_error:
+            self.send_json(400, {"error": f'Invalid JSON: {value_error}'})
+            return
+
+        self.run_translation(lambda: self.server.service.translate(input_json_schema))
+
+    def run_translation(self, translation) -> None:
+        """Run a translation, responding with the Crate-O profile and its timing"""
+        start_time = time.perf_counter()
+        try:
+            status, result = 200, translation()
+        except ValueError as value_error:
+            status, result = 400, {"error": str(value_error)}
+        except Exception as exception:
+            status, result = 500, {"error": f'{type(exception).__name__}: {exception}'}
+        seconds = time.perf_counter() - start_time
+
+        self.server.service.record(seconds, status != 200)
+        self.log_message('"%s" %d translated in %.3fs', self.requestline, status, seconds)
+        self.send_json(status, result, {'Server-Timing': f'translate;dur={seconds * 1000:.1f}'})
+
+    def run_lookup(self, query_parameters: Dict[str, List[str]]) -> None:
+        """Respond with the terms matching a lookup query. Lookups aren't counted as translation requests"""
+        start_time = time.perf_counter()
+        try:
+            status, result = 200, self.server.service.lookup(query_parameters)
+        except ValueError as value_error:
+            status, result = 400, {"error": str(value_error)}
+        except Exception as exception:
+            status, result = 500, {"error": f'{type(exception).__name__}: {exception}'}
+        seconds = time.perf_counter() - start_time
+
+        self.send_json(status, result, {'Server-Timing': f'lookup;dur={seconds * 1000:.1f}'})
+
+    def send_json(self,
+                  status: int,
+                  content: Union[Dict, List],
+                  headers: Optional[Dict[str, str]] = None,
+                  ) -> None:
+        body = json.dumps(content, indent='\t').encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header_name, header_value in (headers or {}).items():
+            self.send_header(header_name, header_value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TranslationServer(ThreadingHTTPServer):
+    """HTTP server handling each request in its own thread"""
+    daemon_threads = True
+
+    def __init__(self,
+                 server_address: Tuple[str, int],
+                 service: TranslationService,
+                 ) -> None:
+        super().__init__(server_address, TranslationRequestHandler)
+        self.service: TranslationService = service
+
+
+def serve(service: TranslationService,
+          host: str = DEFAULT_HOST,
+          port: int = DEFAULT_PORT,
+          ) -> None:
+    """Serve translation requests until interrupted"""
+    with TranslationServer((host, port), service) as server:
+        print(f'Serving Crate-O profile translations on http://{host}:{server.server_port}/')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
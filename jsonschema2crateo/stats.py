@@ -0,0 +1,105 @@
+"""
+Timers and counters for the phases of a translation, to show where the time of a slow run went
+"""
+import bisect
+import contextlib
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Upper bounds in seconds of the HTTP latency histogram buckets. Slower requests are counted in a final "inf" bucket
+HTTP_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Outcomes of JSONSchema2CrateO.expand_context
+EXPAND_CONTEXT_OUTCOMES = [
+    'url',  # Already a full URL
+    'cache_hit',  # Expanded earlier in this run
+    'label_hit',  # Matched the rdfs:label of an input @graph entry
+    'prefix_expansion',  # Expanded from a context prefix
+    'context_term',  # Expanded from a term definition or @vocab of the context
+    'bioschemas_hit',  # Found in the BioSchemas graph
+    'guess_resolved',  # Guessed from a context prefix whose URL resolves, according to the cache or an HTTP probe
+    'unresolved',  # No context found
+]
+
+
+def peak_memory() -> Optional[int]:
+    """Return the peak resident set size of this process in bytes, or None if it can't be determined"""
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024  # Bytes on macOS, KiB elsewhere
+
+
+class TranslationStats:
+    """
+    Wall clock and CPU time of each phase, expand_context outcomes, and URL probe counts and latencies.
+    Phase times are inclusive, so e.g. time in "convert_type_def" is also counted in "translate". Phases timed in
+    concurrent threads are added up, and their CPU times include the other threads
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.expand_context: Dict[str, int] = dict.fromkeys(EXPAND_CONTEXT_OUTCOMES, 0)
+        self.http_probes: Dict[str, int] = {"success": 0, "failure": 0, "error": 0}
+        self.http_latency: List[int] = [0] * (len(HTTP_LATENCY_BUCKETS) + 1)
+        self._lock = threading.Lock()  # Probes are recorded by prefetch threads, and phases by class pool threads
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Context manager adding the time spent in its block to phase name"""
+        start_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - start_time
+            cpu_seconds = time.process_time() - start_cpu_time
+            with self._lock:
+                phase = self.phases.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+                phase["calls"] += 1
+                phase["wall_seconds"] += wall_seconds
+                phase["cpu_seconds"] += cpu_seconds
+
+    def count(self, outcome: str) -> None:
+        """Count an expand_context outcome"""
+        with self._lock:
+            self.expand_context[outcome] += 1
+
+    def record_probe(self,
+                     exists: Optional[bool],
+                     seconds: float,
+                     ) -> None:
+        """
+        Record a URL probe
+        :param exists: Optional[bool], probe result. None for a network error
+        :param seconds: float, time taken
+        """
+        outcome = 'error' if exists is None else 'success' if exists else 'failure'
+        with self._lock:
+            self.http_probes[outcome] += 1
+            self.http_latency[bisect.bisect_left(HTTP_LATENCY_BUCKETS, seconds)] += 1
+
+    def report(self) -> Dict:
+        """Return all timers and counters as a JSON-serialisable dict"""
+        with self._lock:
+            return {
+                "phases": {name: {"calls": phase["calls"],
+                                  "wall_seconds": round(phase["wall_seconds"], 6),
+                                  "cpu_seconds": round(phase["cpu_seconds"], 6)}
+                           for name, phase in self.phases.items()},
+                "expand_context": dict(self.expand_context),
+                "http_probes": dict(self.http_probes),
+                "http_latency_seconds": {
+                    f'le_{bucket}' if bucket != float('inf') else 'inf': count
+                    for bucket, count in zip(HTTP_LATENCY_BUCKETS + [float('inf')], self.http_latency)
+                },
+                "peak_memory_bytes": peak_memory(),
+            }
@@ -0,0 +1,114 @@
+"""
+Incremental parsing of large JSON-LD documents, producing @graph entries one at a time
+"""
+import json
+from typing import Any, Dict, IO, Iterator
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+class JSONLDStream:
+    """
+    Parser for a JSON-LD document whose top level is an object, reading it in chunks and yielding @graph entries
+    as soon as each one is complete. All other top level members are collected in self.header.
+    Peak memory is one @graph entry plus the header, regardless of document size.
+    """
+
+    def __init__(self,
+                 input_file: IO[str],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 ) -> None:
+        self.input_file: IO[str] = input_file
+        self.chunk_size: int = chunk_size
+        self.header: Dict[str, Any] = {}
+
+        self._decoder = json.JSONDecoder()
+        self._buffer: str = ''
+        self._position: int = 0
+        self._eof: bool = False
+
+    def nodes(self) -> Iterator[Dict]:
+        """
+        Parse the document, yielding each @graph entry. self.header is complete once the generator is exhausted
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            return
+
+        while True:
+            key = self._value()
+            self._expect(':')
+
+            if key == '@graph' and self._peek() == '[':
+                self._expect('[')
+                if self._peek() != ']':
+                    while True:
+                        yield self._value()
+                        if self._delimiter(',]') == ']':
+                            break
+                else:
+                    self._expect(']')
+            else:
+                self.header[key] = self._value()
+
+            if self._delimiter(',}') == '}':
+                return
+
+    def _fill(self) -> bool:
+        """Read another chunk, discarding consumed input. Return False at end of file"""
+        if self._eof:
+            return False
+
+        chunk = self.input_file.read(self.chunk_size)
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        self._eof = not chunk
+        return bool(chunk)
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON-LD document')
+
+    def _expect(self, character: str) -> None:
+        if (next_character := self._peek()) != character:
+            raise ValueError(f'Expected "{character}" but found "{next_character}" in JSON-LD document')
+        self._position += 1
+
+    def _delimiter(self, characters: str) -> str:
+        """Consume and return the next character, which must be one of characters"""
+        if (next_character := self._peek()) not in characters:
+            raise ValueError(f'Expected one of "{characters}" but found "{next_character}" in JSON-LD document')
+        self._position += 1
+        return next_character
+
+    def _value(self) -> Any:
+        """Decode the next complete JSON value, reading more input until it is complete"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                # A value ending exactly at the end of the buffer (e.g. a number) may continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+
+            self._fill()
+
+
+def iter_graph(input_file: IO[str],
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               ) -> Iterator[Dict]:
+    """Yield each @graph entry of a JSON-LD document as it is parsed"""
+    return JSONLDStream(input_file, chunk_size).nodes()
+
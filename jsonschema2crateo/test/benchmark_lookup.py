@@ -0,0 +1,57 @@
+"""
+Benchmarks of vocabulary term lookups for autocompletion, over a synthetic ontology the size of EDAM and larger.
+Not collected by default. Run with:
+    python -m pytest jsonschema2crateo/test/benchmark_lookup.py
+"""
+import random
+from typing import List
+
+import pytest
+
+from jsonschema2crateo.lookup import LookupIndex, Term
+
+ONTOLOGY_SIZES = [10_000, 50_000]
+
+WORDS = ["sequence", "alignment", "protein", "structure", "analysis", "prediction", "genome", "assembly", "variant",
+         "calling", "expression", "pathway", "annotation", "phylogenetic", "tree", "mapping", "read", "quality",
+         "control", "visualisation", "clustering", "classification", "database", "search", "motif", "domain"]
+
+# Partially typed queries, as sent on each keystroke
+QUERIES = ["s", "se", "seq", "sequ", "sequence al", "prot str", "genome assembly", "lisat", "xyz"]
+
+
+def synthetic_terms(size: int) -> List[Term]:
+    """Terms with labels of 2 to 4 words, in a hierarchy 4 levels deep"""
+    term_random = random.Random(size)
+    terms = []
+    for term_number in range(size):
+        parent = f'http://example.org/operation_{term_number // 8}' if term_number else None
+        terms.append(Term(
+            id=f'http://example.org/operation_{term_number}',
+            label=' '.join(term_random.choice(WORDS) for _word in range(term_random.randint(2, 4))).capitalize(),
+            synonyms=(' '.join(term_random.sample(WORDS, 2)),),
+            parents=(parent,) if parent else (),
+        ))
+    return terms
+
+
+@pytest.fixture(params=ONTOLOGY_SIZES, scope='module')
+def lookup_index(request) -> LookupIndex:
+    return LookupIndex(synthetic_terms(request.param))
+
+
+@pytest.mark.parametrize("size", ONTOLOGY_SIZES)
+def test_build(benchmark, size):
+    terms = synthetic_terms(size)
+    assert len(benchmark(LookupIndex, terms)) == size
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search(benchmark, lookup_index, query):
+    results = benchmark(lookup_index.search, query)
+    assert len(results) <= 10
+
+
+def test_search_children_of(benchmark, lookup_index):
+    results = benchmark(lookup_index.search, "seq", children_of=['http://example.org/operation_3'])
+    assert all(result.id != 'http://example.org/operation_3' for result in results)
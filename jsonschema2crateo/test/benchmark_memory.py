@@ -0,0 +1,139 @@
+"""
+Memory benchmarks of translation and writing: peak traced memory, memory retained by the translated profile, and
+number of allocations, comparing the slotted profile model (see model.py) with the translator building nested dicts and
+lists.
+Not collected by default. Run with:
+    python -m pytest jsonschema2crateo/test/benchmark_memory.py
+"""
+import gc
+import json
+import os
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+import jsonschema2crateo
+from jsonschema2crateo import JSONSchema2CrateO, serialization
+from synthetic_spec import synthetic_bioschemas, synthetic_resolution_cache, synthetic_spec
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only count allocations made by the package, not by pytest or tracemalloc itself
+SNAPSHOT_FILTERS = [tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, '*'))]
+
+SPEC_SIZES = {
+    "wide": dict(subgraphs=4, properties_per_class=100, nesting_depth=2, definitions=25),
+    "large": dict(subgraphs=20, properties_per_class=100, nesting_depth=2, definitions=50),
+}
+
+
+def traced(function: Callable, *args) -> Tuple[object, Dict[str, int]]:
+    """
+    Call function, returning its result with the peak traced memory during the call, and the memory and number of
+    blocks allocated by package code during the call which are still held afterwards, i.e. retained by the result
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start_snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        tracemalloc.reset_peak()
+        result = function(*args)
+        gc.collect()
+        _current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS).compare_to(start_snapshot, 'filename')
+    finally:
+        tracemalloc.stop()
+
+    return result, {
+        "peak_bytes": peak_bytes,
+        "retained_bytes": sum(statistic.size_diff for statistic in statistics),
+        "retained_blocks": sum(statistic.count_diff for statistic in statistics),
+    }
+
+
+def report(request, capsys, measurements: Dict[str, int]) -> None:
+    with capsys.disabled():
+        print(f'\n{request.node.name}: ' + ', '.join(
+            f'{name} {value / 1024:.0f}KiB' if name.endswith('bytes') else f'{name} {value}'
+            for name, value in measurements.items()))
+
+
+@pytest.fixture(params=list(SPEC_SIZES.keys()))
+def spec(request) -> Dict:
+    return synthetic_spec(**SPEC_SIZES[request.param])
+
+
+def new_converter(spec: Dict) -> JSONSchema2CrateO:
+    converter = JSONSchema2CrateO(bioschemas=synthetic_bioschemas(spec),
+                                  resolution_cache=synthetic_resolution_cache(spec),
+                                  offline=True,
+                                  )
+    converter.set_input_json_schema(spec)
+    return converter
+
+
+def translate(spec: Dict) -> Dict:
+    """
+    Translate with a new converter, which is discarded with its caches so that only the profile is retained. The
+    profile is kept in the model, as when written by the converter
+    """
+    return new_converter(spec)._translate(spec)
+
+
+def test_translate_model(request, capsys, spec):
+    # Fill process-wide caches, e.g. of property labels, and keep identifiers in the interned string table
+    _warm_crateo_profile = translate(spec)
+    _crateo_profile, measurements = traced(translate, spec)
+    report(request, capsys, measurements)
+
+
+def dict_input(id: str, name: str, label: str, help: str, required: bool, multiple: bool, type: Tuple[str, ...],
+               ) -> Dict:
+    """Input built as a dict, with its own type list, as before the profile model"""
+    return {"id": id, "name": name, "label": label, "help": help, "required": required, "multiple": multiple,
+            "type": list(type)}
+
+
+def dict_class(subClassOf: Optional[List[str]], inputs: List[Dict], definition: str = "override") -> Dict:
+    """Class built as a dict, as before the profile model"""
+    if subClassOf is None:
+        return {"definition": definition, "inputs": inputs}
+    return {"definition": definition, "subClassOf": subClassOf, "inputs": inputs}
+
+
+@pytest.fixture
+def dict_translator(monkeypatch) -> None:
+    """Translate with the dict-based classes and inputs of the translator before the profile model"""
+    monkeypatch.setattr(jsonschema2crateo, 'CrateOInput', dict_input)
+    monkeypatch.setattr(jsonschema2crateo, 'CrateOClass', dict_class)
+
+
+def test_translate_dicts(request, capsys, spec, dict_translator):
+    """Baseline: the same profile built as nested dicts and lists, with a type list for every input"""
+    _warm_crateo_profile = translate(spec)
+    _crateo_profile, measurements = traced(translate, spec)
+    report(request, capsys, measurements)
+
+
+def test_write_model(request, capsys, spec, tmp_path):
+    converter = new_converter(spec)
+    crateo_profile = converter._translate(spec)
+    output_crateo_profile_path = os.path.join(tmp_path, 'profile.json')
+
+    _result, measurements = traced(serialization.dump, crateo_profile, output_crateo_profile_path)
+    report(request, capsys, measurements)
+
+
+def test_write_dicts(request, capsys, spec, tmp_path, dict_translator):
+    """Baseline: the same profile built as nested dicts, written by the encoder as before the profile model"""
+    crateo_profile = translate(spec)
+    output_crateo_profile_path = os.path.join(tmp_path, 'profile.json')
+
+    def dump():
+        with open(output_crateo_profile_path, 'w') as output_file:
+            serialization.write_chunks(json.JSONEncoder(indent=serialization.INDENT).iterencode(crateo_profile),
+                                       output_file)
+
+    _result, measurements = traced(dump)
+    report(request, capsys, measurements)
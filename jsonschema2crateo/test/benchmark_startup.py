@@ -0,0 +1,27 @@
+"""
+Benchmarks of package import and CLI startup time, each measured in a fresh interpreter.
+Not collected by default. Run with:
+    python -m pytest jsonschema2crateo/test/benchmark_startup.py
+"""
+import os
+import subprocess
+import sys
+
+PACKAGE_PARENT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_python(*args: str) -> None:
+    subprocess.run([sys.executable, *args], cwd=PACKAGE_PARENT_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def test_interpreter(benchmark):
+    """Baseline: start and stop the interpreter"""
+    benchmark(run_python, '-c', 'pass')
+
+
+def test_import(benchmark):
+    benchmark(run_python, '-c', 'import jsonschema2crateo')
+
+
+def test_cli_help(benchmark):
+    benchmark(run_python, '-m', 'jsonschema2crateo', '--help')
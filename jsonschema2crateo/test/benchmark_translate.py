@@ -0,0 +1,224 @@
+"""
+Benchmarks of the JSONschema to Crate-O translation hot paths on synthetic BioSchemas-shaped specs.
+Not collected by default. Run with:
+    python -m pytest jsonschema2crateo/test/benchmark_translate.py
+Uses pytest-benchmark if it is installed (e.g. for --benchmark-autosave and --benchmark-compare), otherwise
+reports minimum and mean times of a fixed number of rounds (see conftest.py).
+Network access is replaced by a pre-populated resolution cache in offline mode and a synthetic BioSchemas graph.
+The conversion benchmarks time a new converter in every round, as expanded identifiers and converted types are
+memoised by the converter; test_translate_warm times repeated translations by one converter.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+
+from jsonschema2crateo import JSONSchema2CrateO, serialization
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.graph_index import GraphIndex
+from jsonschema2crateo.model import plain
+from synthetic_spec import synthetic_bioschemas, synthetic_resolution_cache, synthetic_spec
+
+SPEC_SIZES = {
+    "small": dict(subgraphs=1, properties_per_class=30, nesting_depth=2, definitions=10),
+    "wide": dict(subgraphs=4, properties_per_class=100, nesting_depth=2, definitions=25),
+    "deep": dict(subgraphs=1, properties_per_class=30, nesting_depth=6, definitions=10),
+}
+
+# Rounds of benchmarks which set up a new converter for each round
+COLD_ROUNDS = 5
+
+# Size of the generated profile used to compare JSON backends
+LARGE_SPEC_SIZE = dict(subgraphs=20, properties_per_class=100, nesting_depth=2, definitions=50)
+
+
+@pytest.fixture(params=list(SPEC_SIZES.keys()))
+def spec(request) -> Dict:
+    return synthetic_spec(**SPEC_SIZES[request.param])
+
+
+@pytest.fixture
+def new_converter(spec) -> Callable[[], JSONSchema2CrateO]:
+    """Factory of converters for spec with nothing memoised yet, sharing the resolution cache and BioSchemas graph"""
+    bioschemas = synthetic_bioschemas(spec)
+    resolution_cache = synthetic_resolution_cache(spec)
+
+    def new_converter() -> JSONSchema2CrateO:
+        converter = JSONSchema2CrateO(bioschemas=bioschemas,
+                                      resolution_cache=resolution_cache,
+                                      offline=True,
+                                      )
+        converter.set_input_json_schema(spec)
+        return converter
+
+    return new_converter
+
+
+@pytest.fixture
+def converter(new_converter) -> JSONSchema2CrateO:
+    return new_converter()
+
+
+def benchmark_cold(benchmark, new_converter: Callable[[], JSONSchema2CrateO], function: Callable) -> Any:
+    """Benchmark function(converter), with a new converter in each round so that its memo caches start empty"""
+    return benchmark.pedantic(function, setup=lambda: ((new_converter(),), {}), rounds=COLD_ROUNDS)
+
+
+def test_load(benchmark, converter, spec, tmp_path):
+    input_json_schema_path = os.path.join(tmp_path, 'synthetic_spec.json')
+    with open(input_json_schema_path, 'w') as input_json_schema_file:
+        json.dump(spec, input_json_schema_file)
+
+    benchmark(converter.load, input_json_schema_path)
+    assert converter.input_json_schema == spec
+
+
+def test_convert_type_def(benchmark, new_converter, spec):
+    lookup_graph = GraphIndex(spec["@graph"])
+    type_definitions = list(spec["@graph"][0]["$validation"]["properties"].values())
+
+    def convert_type_def(converter):
+        return converter.convert_type_def(type_definitions, lookup_graph)
+
+    assert benchmark_cold(benchmark, new_converter, convert_type_def)
+
+
+def test_property2input(benchmark, new_converter, spec):
+    lookup_graph = GraphIndex(spec["@graph"])
+    properties = spec["@graph"][0]["$validation"]["properties"]
+
+    def property2inputs(converter):
+        return [converter.property2input(property_name, property_values, lookup_graph)
+                for property_name, property_values in properties.items()]
+
+    assert len(benchmark_cold(benchmark, new_converter, property2inputs)) == len(properties)
+
+
+def test_definition2class(benchmark, new_converter, spec):
+    lookup_graph = GraphIndex(spec["@graph"])
+    definitions = spec["@graph"][0]["$validation"]["definitions"]
+
+    def definitions2classes(converter):
+        return [converter.definition2class(definition_name, definition_values, lookup_graph)
+                for definition_name, definition_values in definitions.items()]
+
+    assert len(benchmark_cold(benchmark, new_converter, definitions2classes)) == len(definitions)
+
+
+def test_translate(benchmark, new_converter, spec):
+    crateo_profile = benchmark_cold(benchmark, new_converter, lambda converter: converter.translate(spec))
+    assert len(crateo_profile["classes"]) >= len(spec["@graph"])
+
+
+def test_translate_warm(benchmark, converter, spec):
+    """Repeated translations by one converter, reusing the identifiers and types memoised by the first"""
+    crateo_profile = benchmark(converter.translate, spec)
+    assert len(crateo_profile["classes"]) >= len(spec["@graph"])
+
+
+def test_write(benchmark, converter, spec, tmp_path):
+    converter.output_crateo_profile = converter.translate(spec)
+    output_crateo_profile_path = os.path.join(tmp_path, 'synthetic_profile.json')
+
+    benchmark(converter.write, output_crateo_profile_path)
+    assert os.path.getsize(output_crateo_profile_path)
+
+
+@pytest.fixture(scope='module')
+def large_profile() -> Dict:
+    spec = synthetic_spec(**LARGE_SPEC_SIZE)
+    converter = JSONSchema2CrateO(bioschemas=synthetic_bioschemas(spec),
+                                  resolution_cache=synthetic_resolution_cache(spec),
+                                  offline=True,
+                                  )
+    converter.set_input_json_schema(spec)
+    return converter.translate(spec)
+
+
+def test_write_large_indented(benchmark, large_profile, tmp_path):
+    output_crateo_profile_path = os.path.join(tmp_path, 'large_profile.json')
+
+    benchmark(serialization.dump, large_profile, output_crateo_profile_path)
+    assert os.path.getsize(output_crateo_profile_path)
+
+
+def test_write_large_previous(benchmark, large_profile, tmp_path):
+    """Baseline: build the whole indented document as one string, then write it"""
+    output_crateo_profile_path = os.path.join(tmp_path, 'large_profile.json')
+
+    def previous_write():
+        with open(output_crateo_profile_path, 'w') as output_crateo_profile_file:
+            output_crateo_profile_file.write(json.dumps(plain(large_profile), indent='\t'))
+
+    benchmark(previous_write)
+    assert os.path.getsize(output_crateo_profile_path)
+
+
+@pytest.mark.parametrize("backend", serialization.BACKENDS)
+def test_write_large_compact(benchmark, large_profile, tmp_path, backend):
+    output_crateo_profile_path = os.path.join(tmp_path, 'large_profile.json')
+
+    benchmark(serialization.dump, large_profile, output_crateo_profile_path, compact=True, backend=backend)
+    assert os.path.getsize(output_crateo_profile_path)
+
+
+@pytest.mark.parametrize("backend", serialization.BACKENDS)
+def test_parse_large(benchmark, large_profile, backend):
+    text = json.dumps(plain(large_profile), indent='\t').encode('utf8')
+
+    assert benchmark(serialization.loads, text, backend) == large_profile
+
+
+# Seconds taken by each resolution cache lookup, standing in for URL probes made during translation without prefetching
+PROBE_LATENCY = 0.005
+
+# Size of the spec translated by each way of building classes, with identifiers to expand in every class
+CLASS_POOL_SPEC_SIZE = dict(subgraphs=2, properties_per_class=10, nesting_depth=2, definitions=25,
+                            distinct_definition_properties=True)
+
+# Keyword arguments of JSONSchema2CrateO for each way of building the classes of a document
+CLASS_POOLS = {
+    "sequential": dict(),
+    "threads": dict(class_workers=8),
+    "processes": dict(class_workers=4, class_processes=True),
+}
+
+
+class SlowResolutionCache(ResolutionCache):
+    """Resolution cache answering each lookup after PROBE_LATENCY"""
+
+    def get(self, url: str) -> Optional[bool]:
+        time.sleep(PROBE_LATENCY)
+        return super().get(url)
+
+
+def translate_new_converter(spec: Dict,
+                            resolution_cache: ResolutionCache,
+                            **kwargs,
+                            ) -> Dict:
+    """Translate with a new converter, so that no identifiers have been expanded yet"""
+    converter = JSONSchema2CrateO(bioschemas=synthetic_bioschemas(spec),
+                                  resolution_cache=resolution_cache,
+                                  offline=True,
+                                  **kwargs,
+                                  )
+    converter.set_input_json_schema(spec)
+    return converter.translate(spec)
+
+
+@pytest.mark.parametrize("probes", ["cached", "slow"])
+@pytest.mark.parametrize("class_pool", list(CLASS_POOLS.keys()))
+def test_translate_classes(benchmark, class_pool, probes):
+    spec = synthetic_spec(**CLASS_POOL_SPEC_SIZE)
+    resolution_cache = synthetic_resolution_cache(spec)
+    expected = json.dumps(plain(translate_new_converter(spec, resolution_cache)))
+    if probes == "slow":
+        slow_resolution_cache = SlowResolutionCache()
+        for url, exists in resolution_cache.entries().items():
+            slow_resolution_cache.put(url, exists)
+        resolution_cache = slow_resolution_cache
+
+    crateo_profile = benchmark(translate_new_converter, spec, resolution_cache, **CLASS_POOLS[class_pool])
+    assert json.dumps(plain(crateo_profile)) == expected  # Same classes and inputs in the same order
@@ -0,0 +1,139 @@
+"""
+Test data, converters and stand-in servers shared by the tests, and fixtures shared by the benchmarks
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import pytest
+import requests
+
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.cache import ResolutionCache
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'test_data')
+MINI_SPEC_PATH = os.path.join(TEST_DATA_DIR, 'MiniTool_v0.1-DRAFT.json')
+
+# Stand-in for the BioSchemas vocabulary, defining the only BioSchemas term of the MiniTool spec
+MINI_BIOSCHEMAS = {"@graph": [{"@id": "bioschemas:codeRepository"}]}
+
+# Results of every URL probe made when translating the MiniTool spec
+URL_PROBES = {
+    "http://schema.org/name": True,
+    "http://schema.org/author": True,
+    "http://schema.org/featureList": True,
+    "http://schema.org/isAccessibleForFree": True,
+    "http://schema.org/executionUrl": False,
+    "http://schema.org/affiliation": True,
+    "http://schema.org/url": True,
+}
+
+# Paths known by the stand-in vocabulary server
+KNOWN_TERMS = ['/name', '/author', '/featureList', '/isAccessibleForFree', '/affiliation', '/url']
+
+ROUNDS = 5
+
+
+def mini_resolution_cache(url_probes: Dict[str, bool] = URL_PROBES,
+                          cache_path: Optional[str] = None,
+                          ) -> ResolutionCache:
+    """
+    Resolution cache answering url_probes, so that translations run offline
+    :param cache_path: Optional[str], SQLite file for a persistent cache. In memory if not given
+    """
+    resolution_cache = ResolutionCache(cache_path)
+    for url, exists in url_probes.items():
+        resolution_cache.put(url, exists)
+    return resolution_cache
+
+
+def mini_converter(*args, **kwargs) -> JSONSchema2CrateO:
+    """
+    Converter translating offline, with MINI_BIOSCHEMAS as the vocabulary and URL_PROBES in its resolution cache.
+    Arguments are passed to JSONSchema2CrateO, and replace these defaults
+    """
+    kwargs.setdefault('bioschemas', MINI_BIOSCHEMAS)
+    kwargs.setdefault('offline', True)
+    if 'resolution_cache' not in kwargs:
+        kwargs['resolution_cache'] = mini_resolution_cache()
+    return JSONSchema2CrateO(*args, **kwargs)
+
+
+class UnreachableSession(requests.Session):
+    """Session failing every request with a network error"""
+
+    def request(self, method, url, *args, **kwargs):
+        raise requests.ConnectionError(url)
+
+
+@pytest.fixture
+def converter() -> JSONSchema2CrateO:
+    return mini_converter()
+
+
+class StandInVocabularyHandler(BaseHTTPRequestHandler):
+    """Stand-in vocabulary server which only knows KNOWN_TERMS"""
+    requested_paths = []
+
+    def do_HEAD(self):
+        self.requested_paths.append(self.path)
+        self.send_response(200 if self.path in KNOWN_TERMS else 404)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def vocabulary_server() -> Iterator[str]:
+    """URL of a stand-in vocabulary server, used as the schema prefix to answer URL probes locally"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInVocabularyHandler)
+    StandInVocabularyHandler.requested_paths = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+try:
+    import pytest_benchmark  # noqa: F401  Provides the benchmark fixture
+except ImportError:
+    class StandInBenchmark:
+        """Minimal stand-in for the pytest-benchmark fixture, printing minimum and mean times"""
+
+        def __init__(self, name: str, capsys) -> None:
+            self.name: str = name
+            self.capsys = capsys
+
+        def __call__(self, function: Callable, *args, **kwargs) -> Any:
+            return self.pedantic(function, args, kwargs, rounds=ROUNDS)
+
+        def pedantic(self,
+                     target: Callable,
+                     args: Tuple = (),
+                     kwargs: Optional[Dict] = None,
+                     setup: Optional[Callable[[], Optional[Tuple[Tuple, Dict]]]] = None,
+                     rounds: int = 1,
+                     ) -> Any:
+            """
+            Time rounds calls of target, calling setup untimed before each one
+            :param setup: Optional[Callable], returns the (args, kwargs) of the next call, or None to reuse args
+            """
+            timings = []
+            for _ in range(rounds):
+                if setup and (setup_arguments := setup()) is not None:
+                    args, kwargs = setup_arguments
+                start_time = time.perf_counter()
+                result = target(*args, **(kwargs or {}))
+                timings.append(time.perf_counter() - start_time)
+
+            with self.capsys.disabled():
+                print(f'\n{self.name}: min {min(timings) * 1000:.2f}ms, '
+                      f'mean {sum(timings) / len(timings) * 1000:.2f}ms ({rounds} rounds)')
+            return result
+
+    @pytest.fixture
+    def benchmark(request, capsys) -> StandInBenchmark:
+        return StandInBenchmark(request.node.name, capsys)
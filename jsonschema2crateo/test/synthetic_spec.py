@@ -0,0 +1,126 @@
+"""
+Generator for synthetic BioSchemas-shaped JSONschema specs of configurable size, for tests and benchmarks
+"""
+import random
+from typing import Dict, List
+
+from jsonschema2crateo import PROPERTY_MAPPING
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.resolver import collect_identifiers
+
+CONTEXT = {
+    "bioschemas": "https://discovery.biothings.io/view/bioschemas/",
+    "schema": "http://schema.org/",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+}
+
+
+def synthetic_type_definition(rng: random.Random,
+                              definition_names: List[str],
+                              nesting_depth: int,
+                              ) -> Dict:
+    """
+    Return a random property type definition with oneOf/anyOf nested nesting_depth deep
+    """
+    if nesting_depth <= 0:
+        simple_types = [
+            {"type": "string"},
+            {"type": "string", "format": "uri"},
+            {"type": "boolean"},
+            {"@type": "Date", "type": "string", "format": "date"},
+        ]
+        if definition_names and rng.random() < 0.5:
+            return {"$ref": f"#/definitions/{rng.choice(definition_names)}"}
+        return dict(rng.choice(simple_types))
+
+    return {
+        "description": f"A <b>synthetic</b> property nested {nesting_depth} deep. <a href=\"#\">More</a>",
+        rng.choice(["oneOf", "anyOf"]): [
+            synthetic_type_definition(rng, definition_names, nesting_depth - 1),
+            {
+                "type": "array",
+                "items": synthetic_type_definition(rng, definition_names, nesting_depth - 1),
+            },
+        ],
+    }
+
+
+def synthetic_spec(subgraphs: int = 1,
+                   properties_per_class: int = 30,
+                   nesting_depth: int = 2,
+                   definitions: int = 10,
+                   seed: int = 0,
+                   distinct_definition_properties: bool = False,
+                   ) -> Dict:
+    """
+    Generate a BioSchemas-shaped JSONschema
+    :param subgraphs: int, number of @graph entries with $validation
+    :param properties_per_class: int, number of properties in each subgraph and definition
+    :param nesting_depth: int, depth of nested oneOf/anyOf type definitions of subgraph properties
+    :param definitions: int, number of definitions in each subgraph
+    :param seed: int, random seed. The same arguments always generate the same spec
+    :param distinct_definition_properties: bool, give the properties of each definition names of their own, so that
+        each class has identifiers to expand, rather than all of them being expanded for the first class
+    :return: Dict, JSONschema
+    """
+    rng = random.Random(seed)
+    definition_names = [f'syntheticDefinition{definition_index}' for definition_index in range(definitions)]
+
+    graph = []
+    for subgraph_index in range(subgraphs):
+        property_names = [f'property{property_index}' for property_index in range(properties_per_class)]
+        graph.append({
+            "@id": f"bioschemas:SyntheticClass{subgraph_index}",
+            "@type": "rdfs:Class",
+            "rdfs:comment": f"<p>Synthetic class {subgraph_index} for benchmarking.</p>",
+            "rdfs:label": f"SyntheticClass{subgraph_index}",
+            "rdfs:subClassOf": {"@id": "schema:CreativeWork"},
+            "$validation": {
+                "$schema": "http://json-schema.org/draft-07/schema#",
+                "type": "object",
+                "properties": {
+                    property_name: synthetic_type_definition(rng, definition_names, nesting_depth)
+                    for property_name in property_names
+                },
+                "required": property_names[:2],
+                "definitions": {
+                    definition_name: {
+                        "@type": f"{definition_name[0].upper()}{definition_name[1:]}",
+                        "type": "object",
+                        "properties": {
+                            (f'{definition_name}{property_name[0].upper()}{property_name[1:]}'
+                             if distinct_definition_properties else property_name):
+                                synthetic_type_definition(rng, [], 0)
+                            for property_name in property_names
+                        },
+                        "vocabulary": {
+                            "children_of": "schema:Thing",
+                        },
+                    }
+                    for definition_name in definition_names
+                },
+            },
+        })
+
+    return {
+        "@context": dict(CONTEXT),
+        "@graph": graph,
+    }
+
+
+def synthetic_bioschemas(spec: Dict) -> Dict:
+    """Return a BioSchemas graph defining every other property of spec as a bioschemas term"""
+    property_names = collect_identifiers(spec, PROPERTY_MAPPING)
+    return {"@graph": [{"@id": f"bioschemas:{property_name}"} for property_name in property_names[::2]]}
+
+
+def synthetic_resolution_cache(spec: Dict) -> ResolutionCache:
+    """
+    Return an in-memory resolution cache answering every URL probe translate() makes for spec, standing in for
+    the network when used in offline mode
+    """
+    resolution_cache = ResolutionCache()
+    for identifier in collect_identifiers(spec, PROPERTY_MAPPING):
+        resolution_cache.put(f'{CONTEXT["schema"]}{identifier}', True)
+    return resolution_cache
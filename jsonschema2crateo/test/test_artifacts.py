@@ -0,0 +1,122 @@
+import glob
+import json
+import os
+
+import jsonschema2crateo
+from jsonschema2crateo.artifacts import ArtifactStore
+from jsonschema2crateo.vocabulary import VocabularyStore
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.fetch import METADATA_SUFFIX, Mirror
+from conftest import MINI_BIOSCHEMAS, MINI_SPEC_PATH, UnreachableSession, mini_converter
+
+
+def translate(output_crateo_profile_path, artifact_store, **kwargs):
+    return mini_converter(MINI_SPEC_PATH, str(output_crateo_profile_path), artifact_store=artifact_store, **kwargs)
+
+
+def test_artifact_reuse(tmp_path):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'))
+
+    first_converter = translate(tmp_path / 'first.json', artifact_store)
+    assert not first_converter.artifact_hit
+    assert first_converter.stats.expand_context["unresolved"] == 1  # executionUrl, which no probe finds
+    assert first_converter.stats.phases['translate']["calls"] == 1
+
+    second_converter = translate(tmp_path / 'second.json', artifact_store)
+    assert second_converter.artifact_hit
+    assert 'translate' not in second_converter.stats.phases
+    assert (tmp_path / 'second.json').read_bytes() == (tmp_path / 'first.json').read_bytes()
+    assert (artifact_store.hits, artifact_store.misses, artifact_store.stores) == (1, 1, 1)
+
+
+def test_artifact_key_covers_settings(tmp_path, monkeypatch):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'))
+    translate(tmp_path / 'indented.json', artifact_store)
+
+    assert not translate(tmp_path / 'compact.json', artifact_store, compact=True).artifact_hit
+
+    monkeypatch.setitem(jsonschema2crateo.TYPE_MAPPING, "number", "Number")
+    assert not translate(tmp_path / 'mapped.json', artifact_store).artifact_hit
+
+    monkeypatch.setattr(jsonschema2crateo, '__version__', '999')
+    assert not translate(tmp_path / 'upgraded.json', artifact_store).artifact_hit
+
+
+def test_artifact_key_covers_vocabulary(tmp_path):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'))
+    vocabulary_path = tmp_path / 'bioschemas.json'
+    vocabulary_path.write_text(json.dumps(MINI_BIOSCHEMAS))
+
+    def translate_with_vocabulary(output_crateo_profile_path):
+        return translate(output_crateo_profile_path, artifact_store, bioschemas=None,
+                         vocabulary=VocabularyStore(str(vocabulary_path), cache_dir=str(tmp_path / 'cache')))
+
+    translate_with_vocabulary(tmp_path / 'first.json')
+    second_converter = translate_with_vocabulary(tmp_path / 'second.json')
+    assert second_converter.artifact_hit
+    assert second_converter.vocabulary.version_key is None  # Found without loading the vocabulary
+
+    os.utime(vocabulary_path, (1, 1))  # New version of the vocabulary
+    assert not translate_with_vocabulary(tmp_path / 'updated.json').artifact_hit
+
+
+def test_probe_errors_not_stored(tmp_path):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'))
+    converter = translate(tmp_path / 'unreachable.json', artifact_store, resolution_cache=ResolutionCache(),
+                          offline=False, session=UnreachableSession())
+    assert converter.probe_errors
+    assert artifact_store.stores == 0
+
+    assert not translate(tmp_path / 'reachable.json', artifact_store).artifact_hit
+
+
+def test_vocabulary_not_loaded_on_hit(tmp_path):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'))
+    cache_dir = str(tmp_path / 'cache')
+    vocabulary_url = 'https://example.org/bioschemas.json'
+    vocabulary_path = Mirror(os.path.join(cache_dir, 'mirror')).path_for(vocabulary_url)
+    os.makedirs(os.path.dirname(vocabulary_path))
+    with open(vocabulary_path, 'w') as vocabulary_file:
+        json.dump(MINI_BIOSCHEMAS, vocabulary_file)
+    with open(f'{vocabulary_path}{METADATA_SUFFIX}', 'w') as metadata_file:
+        json.dump({"etag": '"1"', "checked_at": 0}, metadata_file)
+
+    def translate_with_vocabulary(output_crateo_profile_path):
+        return translate(output_crateo_profile_path, artifact_store, bioschemas=None,
+                         vocabulary=VocabularyStore(vocabulary_url, cache_dir=cache_dir))
+
+    translate_with_vocabulary(tmp_path / 'first.json')
+
+    # The stored profile is found from the version of the local copy, which isn't read
+    for pickle_path in glob.glob(os.path.join(cache_dir, '*.pickle')):
+        os.remove(pickle_path)
+    with open(vocabulary_path, 'w') as vocabulary_file:
+        vocabulary_file.write('Not JSON')
+    converter = translate_with_vocabulary(tmp_path / 'second.json')
+    assert converter.artifact_hit
+    assert converter.vocabulary.version_key is None
+
+
+def test_artifact_stream(tmp_path):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'))
+    translate(tmp_path / 'first.json', artifact_store)
+
+    assert translate(tmp_path / 'streamed.json', artifact_store, stream=True).artifact_hit
+
+
+def test_lru_eviction(tmp_path):
+    artifact_store = ArtifactStore(str(tmp_path / 'artifacts'), max_bytes=250)
+    profile_path = tmp_path / 'profile.json'
+    profile_path.write_text('x' * 100)
+
+    artifact_store.put('first', str(profile_path))
+    artifact_store.put('second', str(profile_path))
+    os.utime(artifact_store.path_for('first'), (1, 1))
+    os.utime(artifact_store.path_for('second'), (2, 2))
+    assert artifact_store.fetch('first', str(tmp_path / 'copy.json'))  # Now the most recently used
+
+    artifact_store.put('third', str(profile_path))
+    assert os.path.isfile(artifact_store.path_for('first'))
+    assert not os.path.isfile(artifact_store.path_for('second'))
+    assert os.path.isfile(artifact_store.path_for('third'))
+    assert artifact_store.size() == 200
@@ -0,0 +1,66 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from jsonschema2crateo import batch
+from jsonschema2crateo.batch import collect_inputs, output_path_for, summarise, translate_batch
+from conftest import MINI_BIOSCHEMAS, MINI_SPEC_PATH, TEST_DATA_DIR, mini_resolution_cache
+
+
+def test_collect_inputs_manifest(tmp_path):
+    manifest_path = tmp_path / 'manifest.txt'
+    manifest_path.write_text('# Profiles to build\n\nspec_a.json\nhttps://example.org/spec_b.json\n')
+
+    assert collect_inputs(str(manifest_path)) == [
+        os.path.join(str(tmp_path), 'spec_a.json'),
+        'https://example.org/spec_b.json',
+    ]
+
+
+def test_collect_inputs_directory():
+    assert collect_inputs(TEST_DATA_DIR) == [MINI_SPEC_PATH]
+
+
+def test_output_path_for(tmp_path):
+    assert output_path_for('/specs/tool/Tool_v1.0.json', str(tmp_path), '/specs') == \
+           os.path.join(str(tmp_path), 'tool', 'Tool_v1.0_crate-o_profile.json')
+
+
+def test_translate_batch(tmp_path):
+    missing_path = str(tmp_path / 'missing.json')
+    output_dir = str(tmp_path / 'output')
+    results = translate_batch([MINI_SPEC_PATH, missing_path],
+                              output_dir,
+                              workers=2,
+                              bioschemas=MINI_BIOSCHEMAS,
+                              resolution_cache=mini_resolution_cache(),
+                              offline=True,
+                              )
+
+    assert [result.input_path for result in results] == [MINI_SPEC_PATH, missing_path]
+    assert results[0].error is None
+    assert results[1].error.startswith('FileNotFoundError')
+    assert summarise(results).startswith('1 of 2 profiles translated successfully')
+
+    with open(results[0].output_path, 'r') as output_file:
+        output_crateo_profile = json.load(output_file)
+    assert output_crateo_profile["rootDatasets"]["Schema"]["type"] == ["Dataset", "MiniTool"]
+
+
+def test_concurrent_batches(tmp_path):
+    """Batches run from several threads of one process each use their own settings"""
+    resolution_caches = [mini_resolution_cache(), mini_resolution_cache()]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        batch_results = list(executor.map(
+            lambda batch_number: translate_batch([MINI_SPEC_PATH] * 4, str(tmp_path / str(batch_number)), workers=2,
+                                                 bioschemas=MINI_BIOSCHEMAS,
+                                                 resolution_cache=resolution_caches[batch_number],
+                                                 offline=True, prefetch_workers=0),
+            range(2)))
+
+    for batch_number, results in enumerate(batch_results):
+        assert [result.error for result in results] == [None] * 4
+        assert results[0].output_path.startswith(str(tmp_path / str(batch_number)))
+        assert resolution_caches[batch_number].hits > 0
+    assert batch._worker_state == {}  # Only used by process pool workers
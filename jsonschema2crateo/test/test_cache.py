@@ -0,0 +1,50 @@
+import pickle
+
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.cache import ResolutionCache
+
+
+def test_resolution_cache_persists(tmp_path):
+    cache_path = str(tmp_path / 'resolution_cache.sqlite')
+
+    resolution_cache = ResolutionCache(cache_path)
+    resolution_cache.put('http://schema.org/name', True)
+    resolution_cache.put('http://schema.org/notAProperty', False)
+    resolution_cache.close()
+
+    resolution_cache = ResolutionCache(cache_path)
+    assert resolution_cache.get('http://schema.org/name') is True
+    assert resolution_cache.get('http://schema.org/notAProperty') is False  # Negative result cached
+    assert resolution_cache.get('http://schema.org/unknown') is None
+    assert resolution_cache.stats() == {"hits": 2, "misses": 1, "expired": 0, "stores": 0}
+
+
+def test_resolution_cache_expiry_and_eviction():
+    resolution_cache = ResolutionCache(ttl=60, negative_ttl=-1, max_entries=2)
+    resolution_cache.put('http://example.org/a', True)
+    resolution_cache.put('http://example.org/b', False)
+    assert resolution_cache.get('http://example.org/a') is True
+    assert resolution_cache.get('http://example.org/b') is None  # Negative result already expired
+    assert resolution_cache.expired == 1
+
+    resolution_cache.put('http://example.org/c', True)
+    assert len(resolution_cache) == 2
+    assert 'http://example.org/a' not in resolution_cache.entries()  # Oldest entry evicted
+
+
+def test_resolution_cache_pickle():
+    resolution_cache = ResolutionCache()
+    resolution_cache.put('http://schema.org/name', True)
+
+    assert pickle.loads(pickle.dumps(resolution_cache)).get('http://schema.org/name') is True
+
+
+def test_offline_expand_context():
+    resolution_cache = ResolutionCache()
+    resolution_cache.put('http://schema.org/name', True)
+
+    converter = JSONSchema2CrateO(bioschemas={"@graph": []}, resolution_cache=resolution_cache, offline=True)
+    converter.context = {"schema": "http://schema.org/"}
+
+    assert converter.expand_context('name') == 'http://schema.org/name'
+    assert converter.expand_context('executionUrl') == 'executionUrl'  # Uncached URL not probed offline
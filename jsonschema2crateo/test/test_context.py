@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.context import ContextResolver
+from jsonschema2crateo.fetch import METADATA_SUFFIX, Mirror
+
+RO_CRATE_CONTEXT_URL = "https://w3id.org/ro/crate/1.1/context"
+RO_CRATE_CONTEXT = {
+    "@context": {
+        "@vocab": "http://schema.org/",
+        "type": "@type",
+        "id": "@id",
+        "name": "http://schema.org/name",
+        "author": {"@id": "http://schema.org/author", "@type": "@id"},
+        "Dataset": "http://schema.org/Dataset",
+        "dct": "http://purl.org/dc/terms/",
+    }
+}
+
+
+def add_to_mirror(mirror: Mirror, url: str, document: dict) -> None:
+    """Store a local copy of a remote context document, which can be read offline"""
+    os.makedirs(mirror.directory, exist_ok=True)
+    with open(mirror.path_for(url), 'w') as context_file:
+        json.dump(document, context_file)
+    with open(f'{mirror.path_for(url)}{METADATA_SUFFIX}', 'w') as metadata_file:
+        json.dump({"etag": '"test"', "checked_at": 0}, metadata_file)
+
+
+@pytest.fixture
+def mirror(tmp_path) -> Mirror:
+    """Mirror holding a copy of the RO-Crate context"""
+    mirror = Mirror(str(tmp_path / 'mirror'))
+    add_to_mirror(mirror, RO_CRATE_CONTEXT_URL, RO_CRATE_CONTEXT)
+    return mirror
+
+
+def test_flat_context():
+    context = {"schema": "http://schema.org/",
+               "bioschemas": "https://bioschemas.org/",
+               "dc": "http://purl.org/dc/terms",  # Not a prefix in JSON-LD 1.1, but can still be used as one
+               }
+    compiled_context = ContextResolver(Mirror()).compile(context)
+    assert compiled_context.prefixes == {"schema": "http://schema.org/", "bioschemas": "https://bioschemas.org/"}
+    assert compiled_context.terms == {"dc": "http://purl.org/dc/terms"}
+    assert compiled_context.expand_term("name") is None
+
+
+def test_remote_and_array_context(mirror):
+    resolver = ContextResolver(mirror)
+    context = [RO_CRATE_CONTEXT_URL, {"bioschemas": "https://bioschemas.org/", "input": "bioschemas:input"}]
+    compiled_context = resolver.compile(context, offline=True)
+
+    assert compiled_context.remote_contexts == [RO_CRATE_CONTEXT_URL]
+    assert compiled_context.vocab == "http://schema.org/"
+    assert compiled_context.prefixes == {"dct": "http://purl.org/dc/terms/", "bioschemas": "https://bioschemas.org/"}
+    assert compiled_context.expand_term("input") == "https://bioschemas.org/input"  # Defined in terms of a prefix
+    assert compiled_context.expand_term("author") == "http://schema.org/author"
+    assert compiled_context.expand_term("license") == "http://schema.org/license"  # From @vocab
+    assert "type" not in compiled_context.terms  # Keyword alias
+
+    assert resolver.compile(context, offline=True) is compiled_context  # Compiled once
+    assert resolver.compile([None, {"schema": "http://schema.org/"}]).vocab is None  # Reset by null
+
+
+def test_relative_remote_context(mirror):
+    compiled_context = ContextResolver(mirror).compile("context", offline=True,
+                                                       base_url="https://w3id.org/ro/crate/1.1/metadata")
+    assert compiled_context.remote_contexts == [RO_CRATE_CONTEXT_URL]
+
+
+def test_term_definition_order():
+    compiled_context = ContextResolver(Mirror()).compile({
+        "featureList": "bsc:featureList",  # Uses a prefix defined later
+        "bsc": "bioschemas:",
+        "bioschemas": "https://bioschemas.org/",
+    })
+    assert compiled_context.terms == {"featureList": "https://bioschemas.org/featureList"}
+    assert compiled_context.prefixes["bsc"] == "https://bioschemas.org/"
+
+    with pytest.raises(Exception, match='Cyclic IRI mapping'):
+        ContextResolver(Mirror()).compile({"a": "b:x", "b": "a:y"})
+
+
+def test_recursive_remote_context(tmp_path):
+    mirror = Mirror(str(tmp_path / 'mirror'))
+    url = "https://example.org/context"
+    add_to_mirror(mirror, url, {"@context": [url]})
+
+    with pytest.raises(Exception, match='Recursive inclusion'):
+        ContextResolver(mirror).compile(url, offline=True)
+
+
+def test_expand_context_with_terms(tmp_path, mirror):
+    converter = JSONSchema2CrateO(bioschemas={"@graph": []},
+                                  resolution_cache=ResolutionCache(str(tmp_path / 'resolution_cache.sqlite')),
+                                  mirror=mirror,
+                                  offline=True,
+                                  )
+    converter.set_input_json_schema({"@context": [RO_CRATE_CONTEXT_URL, {"bioschemas": "https://bioschemas.org/"}]})
+
+    assert converter.context == {"dct": "http://purl.org/dc/terms/", "bioschemas": "https://bioschemas.org/"}
+    assert converter.expand_context("dct:title") == "http://purl.org/dc/terms/title"
+    assert converter.expand_context("author") == "http://schema.org/author"
+    assert converter.expand_context("keywords") == "http://schema.org/keywords"
+    assert not converter.needs_guess("keywords")
+    assert converter.stats.expand_context["context_term"] == 2
+    assert converter.stats.expand_context["unresolved"] == 0
+
+    # Terms can prefix compact IRIs
+    converter.set_input_json_schema({"@context": {"dc": "http://purl.org/dc/terms"}})
+    assert converter.expand_context("dc:Title") == "http://purl.org/dc/termsTitle"
@@ -0,0 +1,134 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from jsonschema2crateo.fetch import METADATA_SUFFIX, Mirror, new_fetch_session
+from conftest import MINI_SPEC_PATH, UnreachableSession, mini_converter
+
+with open(MINI_SPEC_PATH, 'rb') as mini_spec_file:
+    MINI_SPEC = mini_spec_file.read()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Stand-in spec server supporting ETags and gzip, which fails the first request for /flaky.json"""
+    etag = '"v1"'
+    requests = []
+    flaky_failures = 0
+
+    def do_GET(self):
+        StandInHandler.requests.append((self.path, self.headers.get('If-None-Match'),
+                                        self.headers.get('Accept-Encoding')))
+
+        if self.path == '/flaky.json' and StandInHandler.flaky_failures < 1:
+            StandInHandler.flaky_failures += 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self.path not in ['/spec.json', '/flaky.json']:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = gzip.compress(MINI_SPEC)
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    StandInHandler.requests = []
+    StandInHandler.flaky_failures = 0
+    StandInHandler.etag = '"v1"'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_conditional_fetch(stand_in_server, tmp_path):
+    mirror = Mirror(str(tmp_path))
+    url = f'{stand_in_server}/spec.json'
+
+    first_entry = mirror.fetch(url)
+    assert first_entry.changed
+    with open(first_entry.path, 'rb') as mirrored_file:
+        assert mirrored_file.read() == MINI_SPEC  # Decompressed
+    assert StandInHandler.requests[0] == ('/spec.json', None, 'gzip')
+
+    second_entry = mirror.fetch(url)
+    assert not second_entry.changed
+    assert second_entry.version_key == first_entry.version_key
+    assert StandInHandler.requests[1] == ('/spec.json', '"v1"', 'gzip')
+    assert (mirror.downloads, mirror.not_modified) == (1, 1)
+
+    StandInHandler.etag = '"v2"'
+    third_entry = mirror.fetch(url)
+    assert third_entry.changed and third_entry.version_key != first_entry.version_key
+
+
+def test_max_age_and_offline(stand_in_server, tmp_path):
+    url = f'{stand_in_server}/spec.json'
+    with pytest.raises(FileNotFoundError):
+        Mirror(str(tmp_path)).fetch(url, offline=True)
+
+    mirror = Mirror(str(tmp_path), max_age=3600)
+    mirror.read(url)
+    assert mirror.read(url) == MINI_SPEC  # Fresh enough without revalidation
+    assert Mirror(str(tmp_path)).read(url, offline=True) == MINI_SPEC
+    assert len(StandInHandler.requests) == 1
+
+
+def test_retry(stand_in_server, tmp_path):
+    mirror = Mirror(str(tmp_path), session=new_fetch_session(backoff=0))
+
+    assert mirror.read(f'{stand_in_server}/flaky.json') == MINI_SPEC
+    assert [path for path, _etag, _encoding in StandInHandler.requests] == ['/flaky.json', '/flaky.json']
+
+
+def test_stale_copy_on_error(stand_in_server, tmp_path, caplog):
+    url = f'{stand_in_server}/spec.json'
+    first_entry = Mirror(str(tmp_path)).fetch(url)
+    with open(f'{first_entry.path}{METADATA_SUFFIX}', 'r') as metadata_file:
+        metadata = json.load(metadata_file)
+    metadata["checked_at"] = 0  # Older than max_age
+    with open(f'{first_entry.path}{METADATA_SUFFIX}', 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+    mirror = Mirror(str(tmp_path), max_age=3600, session=UnreachableSession())
+    assert mirror.read(url) == MINI_SPEC
+    assert f'Could not revalidate {url}' in caplog.text
+    assert mirror.fetch(url).version_key == first_entry.version_key
+
+    with pytest.raises(requests.ConnectionError):  # No copy to fall back on
+        mirror.fetch(f'{stand_in_server}/other.json')
+
+
+def test_load_through_mirror(stand_in_server, tmp_path):
+    mirror = Mirror(str(tmp_path))
+    converter = mini_converter(mirror=mirror, offline=False, prefetch_workers=0)
+    converter.load(f'{stand_in_server}/spec.json')
+    assert converter.input_json_schema == json.loads(MINI_SPEC)
+
+    converter.load(f'{stand_in_server}/spec.json')
+    assert mirror.not_modified == 1
@@ -0,0 +1,20 @@
+from jsonschema2crateo.graph_index import GraphIndex
+
+GRAPH = [
+    {"@id": "bioschemas:ComputationalTool", "rdfs:label": "ComputationalTool"},
+    {"@id": "bioschemas:codeRepository", "rdfs:label": "codeRepository"},
+    {"@id": "schema:codeRepository", "rdfs:label": "codeRepository"},
+    {"@id": "http://edamontology.org/operation_0004", "rdfs:label": "Operation"},
+]
+
+
+def test_graph_index():
+    graph_index = GraphIndex(GRAPH)
+
+    assert graph_index.id_for_label('codeRepository') == 'bioschemas:codeRepository'  # First match wins
+    assert graph_index.id_for_label('name') is None
+    assert 'schema:codeRepository' in graph_index
+    assert list(graph_index.terms('bioschemas')) == ['ComputationalTool', 'codeRepository']
+    assert graph_index.terms('http') == {}  # Full URLs aren't compact identifiers
+    assert GraphIndex.of(graph_index) is graph_index
+    assert len(GraphIndex.of(GRAPH)) == 4
@@ -0,0 +1,75 @@
+import json
+import os
+
+import jsonschema2crateo
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.incremental import content_hash, manifest_path_for
+from conftest import MINI_BIOSCHEMAS, MINI_SPEC_PATH, UnreachableSession, mini_converter
+
+
+def translate(input_json_schema_path, output_crateo_profile_path, incremental=True, **kwargs):
+    return mini_converter(input_json_schema_path, output_crateo_profile_path, incremental=incremental, **kwargs)
+
+
+def test_content_hash():
+    assert content_hash({"a": 1, "b": [2, 3]}) == content_hash({"a": 1, "b": [2, 3]})
+    assert content_hash({"a": 1, "b": [2, 3]}) != content_hash({"b": [2, 3], "a": 1})  # Order determines output
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_incremental_translation(tmp_path):
+    with open(MINI_SPEC_PATH, 'r') as input_json_schema_file:
+        input_json_schema = json.load(input_json_schema_file)
+    input_json_schema_path = tmp_path / 'spec.json'
+    input_json_schema_path.write_text(json.dumps(input_json_schema))
+    output_crateo_profile_path = tmp_path / 'profile.json'
+
+    converter = translate(str(input_json_schema_path), str(output_crateo_profile_path))
+    assert (converter.reused_classes, converter.rebuilt_classes) == (0, 4)
+    assert os.path.isfile(manifest_path_for(str(output_crateo_profile_path)))
+
+    # Unchanged spec reuses every class
+    converter = translate(str(input_json_schema_path), str(output_crateo_profile_path))
+    assert (converter.reused_classes, converter.rebuilt_classes) == (4, 0)
+
+    # Changing one definition only rebuilds that class, with the same output as a full rebuild
+    input_json_schema["@graph"][0]["$validation"]["definitions"]["organization"]["properties"]["url"] = {
+        "type": "string", "format": "uri"}
+    input_json_schema_path.write_text(json.dumps(input_json_schema))
+
+    converter = translate(str(input_json_schema_path), str(output_crateo_profile_path))
+    assert (converter.reused_classes, converter.rebuilt_classes) == (3, 1)
+
+    full_output_path = tmp_path / 'full_profile.json'
+    translate(str(input_json_schema_path), str(full_output_path), incremental=False)
+    assert output_crateo_profile_path.read_bytes() == full_output_path.read_bytes()
+
+
+def test_probe_errors_not_reused(tmp_path):
+    output_crateo_profile_path = str(tmp_path / 'profile.json')
+    converter = mini_converter(MINI_SPEC_PATH, output_crateo_profile_path, resolution_cache=ResolutionCache(),
+                               offline=False, session=UnreachableSession(), incremental=True)
+    assert converter.probe_errors
+    assert (converter.reused_classes, converter.rebuilt_classes) == (0, 4)
+    assert converter.class_cache == {}
+
+    # Classes are rebuilt once the URLs can be probed
+    converter = translate(MINI_SPEC_PATH, output_crateo_profile_path)
+    assert (converter.reused_classes, converter.rebuilt_classes) == (0, 4)
+    converter = translate(MINI_SPEC_PATH, output_crateo_profile_path)
+    assert (converter.reused_classes, converter.rebuilt_classes) == (4, 0)
+
+
+def test_environment_covers_versions(tmp_path, monkeypatch):
+    output_crateo_profile_path = str(tmp_path / 'profile.json')
+    translate(MINI_SPEC_PATH, output_crateo_profile_path)
+
+    # A new vocabulary rebuilds every class
+    bioschemas = {"@graph": MINI_BIOSCHEMAS["@graph"] + [{"@id": "bioschemas:other"}]}
+    converter = translate(MINI_SPEC_PATH, output_crateo_profile_path, bioschemas=bioschemas)
+    assert (converter.reused_classes, converter.rebuilt_classes) == (0, 4)
+
+    # So does a new version of the package
+    monkeypatch.setattr(jsonschema2crateo, '__version__', '999')
+    converter = translate(MINI_SPEC_PATH, output_crateo_profile_path, bioschemas=bioschemas)
+    assert (converter.reused_classes, converter.rebuilt_classes) == (0, 4)
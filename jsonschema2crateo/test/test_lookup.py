@@ -0,0 +1,110 @@
+import os
+import pickle
+
+from jsonschema2crateo.lookup import LookupIndex, Term, definition_lookup, load_lookup_index, read_ontology
+from jsonschema2crateo.merge import merge_profiles
+from conftest import MINI_SPEC_PATH, mini_converter
+
+EDAM = "http://edamontology.org/"
+EDAM_TABLE = f'''Class ID,Preferred Label,Synonyms,Definitions,Obsolete,Parents
+{EDAM}operation_0004,Operation,Computational method|Function,A function that processes data.,FALSE,
+{EDAM}operation_0292,Sequence alignment,Sequence alignment construction,Align sequences.,FALSE,{EDAM}operation_2928
+{EDAM}operation_2928,Alignment,,Compare two or more entities.,FALSE,{EDAM}operation_0004
+{EDAM}operation_0491,Pairwise sequence alignment,,Align exactly two sequences.,FALSE,{EDAM}operation_0292
+{EDAM}operation_0000,Sequence alignment (obsolete),,,TRUE,{EDAM}operation_0004
+{EDAM}topic_0080,Sequence analysis,,,FALSE,{EDAM}topic_0003
+'''
+
+BIOSCHEMAS = {
+    "@context": {"bioschemas": "https://bioschemas.org/", "schema": "http://schema.org/"},
+    "@graph": [
+        {"@id": "bioschemas:ComputationalTool", "rdfs:label": "ComputationalTool",
+         "rdfs:comment": "A <b>software</b> tool", "rdfs:subClassOf": {"@id": "schema:SoftwareApplication"}},
+        {"@id": "bioschemas:codeRepository"},  # Unlabelled nodes aren't terms
+    ]
+}
+
+
+def edam_table(tmp_path) -> str:
+    table_path = tmp_path / 'EDAM.csv'
+    table_path.write_text(EDAM_TABLE)
+    return str(table_path)
+
+
+def edam_terms(tmp_path):
+    return read_ontology(edam_table(tmp_path))
+
+
+def test_read_table(tmp_path):
+    terms = edam_terms(tmp_path)
+    assert len(terms) == 5  # Obsolete term left out
+    assert terms[1] == Term(f'{EDAM}operation_0292', "Sequence alignment", "Align sequences.",
+                            ("Sequence alignment construction",), (f'{EDAM}operation_2928',))
+
+
+def test_search_ranking(tmp_path):
+    lookup_index = LookupIndex(edam_terms(tmp_path))
+
+    def labels(*args, **kwargs):
+        return [term.label for term in lookup_index.search(*args, **kwargs)]
+
+    assert labels("alignment") == ["Alignment", "Sequence alignment", "Pairwise sequence alignment"]
+    assert labels("Seq") == ["Sequence analysis", "Sequence alignment", "Pairwise sequence alignment"]
+    assert labels("seq ali") == ["Sequence alignment", "Pairwise sequence alignment"]  # Prefixes of words
+    assert labels("function") == ["Operation"]  # Synonym
+    assert labels("wise seq") == ["Pairwise sequence alignment"]  # Substring
+    assert labels("seq", limit=1) == ["Sequence analysis"]
+    assert labels("") == labels("xyz") == []
+
+
+def test_search_children_of(tmp_path):
+    lookup_index = LookupIndex(edam_terms(tmp_path))
+    assert [term.label for term in lookup_index.search("seq", children_of=[f'{EDAM}operation_0004'])] == \
+           ["Sequence alignment", "Pairwise sequence alignment"]
+    assert lookup_index.search("seq", children_of=[f'{EDAM}operation_0491']) == []
+
+
+def test_terms_from_graph(tmp_path):
+    lookup_index = load_lookup_index(BIOSCHEMAS, [edam_table(tmp_path)])
+    assert len(lookup_index) == 6
+    assert lookup_index.search("tool")[0].to_entity() == {
+        "@id": "https://bioschemas.org/ComputationalTool",
+        "@type": "DefinedTerm",
+        "name": "ComputationalTool",
+        "description": "A software tool",
+    }
+    assert lookup_index.search("tool", children_of=["http://schema.org/SoftwareApplication"])
+
+
+def test_cached_index(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    load_lookup_index(BIOSCHEMAS, cache_dir=str(cache_dir), version_key='1')
+    pickle_paths = os.listdir(cache_dir)
+    assert len(pickle_paths) == 1
+
+    with open(cache_dir / pickle_paths[0], 'rb') as pickle_file:
+        assert len(pickle.load(pickle_file)) == 1
+    assert len(load_lookup_index({"@graph": []}, cache_dir=str(cache_dir), version_key='1')) == 1  # Reused
+
+    load_lookup_index({"@graph": []}, cache_dir=str(cache_dir), version_key='2')
+    assert os.listdir(cache_dir) != pickle_paths  # Replaced
+
+
+def test_profile_lookup():
+    assert definition_lookup('http://localhost:8000/lookup', {"type": "object"}) is None
+    assert definition_lookup('http://localhost:8000/lookup', {"vocabulary": {"property": {}}}) is None
+
+    converter = mini_converter(lookup_url='http://localhost:8000/lookup')
+    converter.load(MINI_SPEC_PATH)
+    crateo_profile = converter.translate(converter.input_json_schema)
+    lookup = {"EdamOperation": {
+        "url": 'http://localhost:8000/lookup?children_of=http%3A%2F%2Fedamontology.org%2Foperation_0004&q='
+    }}
+    assert crateo_profile["lookup"] == lookup
+    feature_list_input = next(crateo_input for crateo_input in crateo_profile["classes"]["MiniTool"]["inputs"]
+                              if crateo_input["name"] == "featureList")
+    assert feature_list_input["type"] == ["EdamOperation"]
+    assert merge_profiles([crateo_profile, crateo_profile])["lookup"] == lookup
+
+    converter.lookup_url = None
+    assert "lookup" not in converter.translate(converter.input_json_schema)
@@ -0,0 +1,123 @@
+import copy
+import json
+import os
+
+import pytest
+
+from jsonschema2crateo.__main__ import main
+from jsonschema2crateo.fetch import METADATA_SUFFIX
+from jsonschema2crateo.merge import merge_class, merge_profiles
+from jsonschema2crateo.vocabulary import VocabularyStore
+from conftest import MINI_BIOSCHEMAS, MINI_SPEC_PATH, URL_PROBES, mini_converter, mini_resolution_cache
+
+# The dataset spec of mini_specs() has a license property too
+MERGE_URL_PROBES = dict(URL_PROBES, **{"http://schema.org/license": True})
+
+
+def mini_specs():
+    with open(MINI_SPEC_PATH, 'r') as input_json_schema_file:
+        tool_spec = json.load(input_json_schema_file)
+
+    # Dataset spec sharing the person definition, with an organization definition defining an extra property
+    dataset_spec = copy.deepcopy(tool_spec)
+    subgraph = dataset_spec["@graph"][0]
+    subgraph.update({"@id": "bioschemas:MiniDataset", "rdfs:label": "MiniDataset", "rdfs:comment": "A dataset."})
+    validation = subgraph["$validation"]
+    validation["properties"] = {
+        "name": validation["properties"]["name"],
+        "author": validation["properties"]["author"],
+        "license": {"type": "string", "format": "uri"},
+    }
+    del validation["definitions"]["edamOperation"]
+    validation["definitions"]["organization"]["properties"]["url"] = {"type": "string", "format": "uri"}
+
+    return tool_spec, dataset_spec
+
+
+def new_converter():
+    return mini_converter(resolution_cache=mini_resolution_cache(MERGE_URL_PROBES))
+
+
+def test_translate_merged():
+    tool_spec, dataset_spec = mini_specs()
+    converter = new_converter()
+    crateo_profile = converter.translate_merged([tool_spec, dataset_spec])
+
+    assert list(crateo_profile["classes"].keys()) == [
+        "Dataset", "MiniTool", "Person", "Organization", "EdamOperation", "MiniDataset"]
+    assert crateo_profile["rootDatasets"] == {
+        "MiniTool": {"type": ["Dataset", "MiniTool"]},
+        "MiniDataset": {"type": ["Dataset", "MiniDataset"]},
+    }
+    assert crateo_profile["enabledClasses"][:3] == ["MiniTool", "MiniDataset", "Dataset"]
+    assert crateo_profile["metadata"]["name"] == "MiniTool + MiniDataset"
+
+    # First spec wins, with inputs only defined by the second appended
+    assert [crateo_input["name"] for crateo_input in crateo_profile["classes"]["Organization"]["inputs"]] == [
+        "name", "url"]
+
+    # Identical person definitions are only converted once
+    assert converter.shared_classes == 1
+    assert converter.rebuilt_classes == 6
+
+
+def test_translate_merged_single_spec():
+    tool_spec, _dataset_spec = mini_specs()
+    crateo_profile = new_converter().translate_merged([tool_spec])
+
+    converter = new_converter()
+    converter.set_input_json_schema(tool_spec)
+    assert crateo_profile["classes"] == converter.translate(tool_spec)["classes"]
+    assert crateo_profile["rootDatasets"] == {"MiniTool": {"type": ["Dataset", "MiniTool"]}}
+
+
+def test_translate_merged_order():
+    tool_spec, dataset_spec = mini_specs()
+    crateo_profile = new_converter().translate_merged([dataset_spec, tool_spec])
+
+    assert list(crateo_profile["rootDatasets"].keys()) == ["MiniDataset", "MiniTool"]
+    assert [crateo_input["name"] for crateo_input in crateo_profile["classes"]["Organization"]["inputs"]] == [
+        "name", "url"]
+    assert crateo_profile == new_converter().translate_merged([dataset_spec, tool_spec])
+
+
+def test_merge_class():
+    crateo_class = {"subClassOf": ["a"], "inputs": [{"name": "name", "help": "first"}]}
+    other_class = {"subClassOf": ["b"], "inputs": [{"name": "name", "help": "second"}, {"name": "url"}]}
+
+    merged_class = merge_class(crateo_class, other_class)
+    assert merged_class == {"subClassOf": ["a"], "inputs": [{"name": "name", "help": "first"}, {"name": "url"}]}
+    assert crateo_class == {"subClassOf": ["a"], "inputs": [{"name": "name", "help": "first"}]}  # Not modified
+    assert merge_class(crateo_class, {"inputs": []}) is crateo_class
+
+
+def test_merge_profiles_empty():
+    with pytest.raises(AssertionError):
+        merge_profiles([])
+
+
+def test_merge_command(tmp_path):
+    tool_spec, dataset_spec = mini_specs()
+    input_json_schema_paths = []
+    for spec_name, spec in [('tool', tool_spec), ('dataset', dataset_spec)]:
+        input_json_schema_paths.append(str(tmp_path / f'{spec_name}.json'))
+        with open(input_json_schema_paths[-1], 'w') as input_json_schema_file:
+            json.dump(spec, input_json_schema_file)
+    output_crateo_profile_path = tmp_path / 'merged.json'
+
+    # Populate the resolution cache and a local BioSchemas vocabulary so that the command runs offline
+    cache_dir = tmp_path / 'cache'
+    mini_resolution_cache(MERGE_URL_PROBES, str(cache_dir / 'resolution_cache.sqlite')).close()
+    bioschemas_path = VocabularyStore(cache_dir=str(cache_dir)).local_path
+    os.makedirs(os.path.dirname(bioschemas_path))
+    with open(bioschemas_path, 'w') as bioschemas_file:
+        json.dump(MINI_BIOSCHEMAS, bioschemas_file)
+    with open(f'{bioschemas_path}{METADATA_SUFFIX}', 'w') as metadata_file:
+        json.dump({"etag": '"test"', "checked_at": 0}, metadata_file)
+
+    assert main(['merge', *input_json_schema_paths, '-o', str(output_crateo_profile_path),
+                 '--cache-dir', str(cache_dir), '--offline']) == 0
+
+    with open(output_crateo_profile_path, 'r') as output_crateo_profile_file:
+        crateo_profile = json.load(output_crateo_profile_file)
+    assert list(crateo_profile["rootDatasets"].keys()) == ["MiniTool", "MiniDataset"]
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from jsonschema2crateo import serialization
+from jsonschema2crateo.model import CrateOClass, CrateOInput, TypeReference, plain
+
+INPUT_DICT = {
+    "id": "http://schema.org/name",
+    "name": "name",
+    "label": "Name",
+    "help": "The name of the item.",
+    "required": True,
+    "multiple": False,
+    "type": ["Text"],
+}
+
+
+def new_input() -> CrateOInput:
+    return CrateOInput(**dict(INPUT_DICT, type=("Text",)))
+
+
+def test_input_reads_like_dict():
+    crateo_input = new_input()
+    assert crateo_input == INPUT_DICT
+    assert list(crateo_input) == list(INPUT_DICT)  # Same key order as the serialised input
+    assert crateo_input["type"] == ["Text"]
+    assert crateo_input.get("format") is None
+    with pytest.raises(KeyError):
+        crateo_input["format"]
+
+    crateo_input["type"].append("URL")  # Callers get a copy, the shared tuple is unchanged
+    assert crateo_input.type == ("Text",)
+
+
+def test_class_reads_like_dict():
+    crateo_input = new_input()
+    assert CrateOClass(None, [crateo_input]) == {"definition": "override", "inputs": [INPUT_DICT]}
+    assert "subClassOf" not in CrateOClass(None, [])
+    assert list(CrateOClass(["http://schema.org/Thing"], [])) == ["definition", "subClassOf", "inputs"]
+
+
+def test_plain():
+    profile = {"classes": {"Person": CrateOClass(["http://schema.org/Thing"], [new_input()])}, "enabledClasses": []}
+    plain_profile = plain(profile)
+    assert type(plain_profile["classes"]["Person"]) is dict
+    assert type(plain_profile["classes"]["Person"]["inputs"][0]["type"]) is list
+    assert plain_profile == profile
+
+
+@pytest.mark.parametrize("backend", serialization.BACKENDS)
+def test_dump(tmp_path, backend):
+    profile = {"classes": {"Person": CrateOClass(None, [new_input()])}}
+    expected = {"classes": {"Person": {"definition": "override", "inputs": [INPUT_DICT]}}}
+    output_path = tmp_path / 'profile.json'
+
+    serialization.dump(profile, str(output_path))
+    assert output_path.read_text() == json.dumps(expected, indent='\t')
+
+    serialization.dump(profile, str(output_path), compact=True, backend=backend)
+    assert json.loads(output_path.read_bytes()) == expected
+    assert json.dumps(profile, default=serialization.default) == json.dumps(expected)
+
+
+def test_type_reference():
+    definition = {"@type": "string", "type": "string", "description": "A name", "format": "uri"}
+    type_reference = TypeReference("URL", definition)
+    assert (type_reference.description, type_reference.format) == ("A name", "uri")
+    assert type_reference.to_dict() == {"type": "URL", "description": "A name", "format": "uri"}
+    assert definition["type"] == "string"  # Definition not modified
+    assert TypeReference("Person").to_dict() == {"type": "Person"}
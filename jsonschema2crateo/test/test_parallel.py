@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.graph_index import GraphIndex
+from jsonschema2crateo.model import plain
+from jsonschema2crateo.parallel import ClassBuilder
+from jsonschema2crateo.vocabulary import VocabularyStore
+from synthetic_spec import synthetic_bioschemas, synthetic_resolution_cache, synthetic_spec
+
+SPEC = synthetic_spec(subgraphs=2, properties_per_class=10, definitions=6, distinct_definition_properties=True)
+
+
+def translate(**kwargs) -> JSONSchema2CrateO:
+    converter = JSONSchema2CrateO(bioschemas=synthetic_bioschemas(SPEC),
+                                  resolution_cache=synthetic_resolution_cache(SPEC),
+                                  offline=True,
+                                  **kwargs,
+                                  )
+    converter.set_input_json_schema(SPEC)
+    converter.output_crateo_profile = converter.translate(SPEC)
+    return converter
+
+
+@pytest.mark.parametrize("class_processes", [False, True])
+def test_same_output(class_processes):
+    expected = json.dumps(plain(translate().output_crateo_profile), indent='\t')
+    converter = translate(class_workers=3, class_processes=class_processes)
+
+    assert json.dumps(plain(converter.output_crateo_profile), indent='\t') == expected  # Including order
+    assert list(converter.output_crateo_profile["classes"])[:3] == ["Dataset", "SyntheticClass0",
+                                                                     "SyntheticDefinition0"]
+
+
+def test_classes_built_once():
+    sequential_converter = translate()
+    converter = translate(class_workers=3)
+    assert converter.rebuilt_classes == sequential_converter.rebuilt_classes == 2 + 2 * 6
+
+    # Reused classes aren't built again
+    converter.incremental = True
+    converter.translate(SPEC)
+    assert (converter.reused_classes, converter.rebuilt_classes) == (14, 14)
+
+
+def test_vocabulary_loaded_on_demand(tmp_path):
+    converter = JSONSchema2CrateO(vocabulary=VocabularyStore(str(tmp_path / 'missing.json')), offline=True)
+    converter.set_input_json_schema(SPEC)
+    with ClassBuilder(converter, GraphIndex(SPEC["@graph"]), workers=2):
+        pass
+    assert converter.vocabulary.version_key is None
+
+
+def test_worker_probe_errors():
+    # Every schema.org URL is refused
+    spec = json.loads(json.dumps(SPEC).replace('http://schema.org/', 'http://127.0.0.1:9/'))
+    converter = JSONSchema2CrateO(bioschemas=synthetic_bioschemas(spec), prefetch_workers=0, class_workers=3,
+                                  class_processes=True)
+    converter.set_input_json_schema(spec)
+    converter.translate(spec)
+
+    assert converter.probe_errors
+    assert len(converter.unverified_classes) == converter.rebuilt_classes
@@ -0,0 +1,64 @@
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.resolver import collect_identifiers, resolve_urls
+from jsonschema2crateo.stats import TranslationStats
+from conftest import KNOWN_TERMS, MINI_BIOSCHEMAS, MINI_SPEC_PATH, StandInVocabularyHandler
+
+
+def test_collect_identifiers():
+    converter = JSONSchema2CrateO(bioschemas={"@graph": []})
+    converter.load(MINI_SPEC_PATH)
+
+    assert collect_identifiers(converter.input_json_schema) == [
+        'schema:SoftwareApplication',
+        'name', 'codeRepository', 'author', 'featureList', 'isAccessibleForFree', 'executionUrl',
+        'affiliation',
+        'http://edamontology.org/operation_0004', 'url',
+    ]
+
+
+def test_resolve_urls(vocabulary_server):
+    resolution_cache = ResolutionCache()
+    stats = TranslationStats()
+    results = resolve_urls([f'{vocabulary_server}name', f'{vocabulary_server}executionUrl'], resolution_cache,
+                           stats=stats)
+
+    assert results == {f'{vocabulary_server}name': True, f'{vocabulary_server}executionUrl': False}
+    assert resolution_cache.entries() == results
+    assert stats.http_probes == {"success": 1, "failure": 1, "error": 0}
+    assert sum(stats.http_latency) == 2
+
+
+def test_prefetch(vocabulary_server):
+    converter = JSONSchema2CrateO(bioschemas=MINI_BIOSCHEMAS)
+    converter.load(MINI_SPEC_PATH)
+    converter.context["schema"] = vocabulary_server
+
+    converter.prefetch()
+    assert sorted(StandInVocabularyHandler.requested_paths) == sorted(KNOWN_TERMS + ['/executionUrl'])  # No codeRepository
+
+    # Translation runs purely against prefetched results
+    converter.offline = True
+    root_class = converter.translate(converter.input_json_schema)["classes"]["MiniTool"]
+    assert [crateo_input["id"] for crateo_input in root_class["inputs"]] == [
+        f'{vocabulary_server}name',
+        'https://discovery.biothings.io/view/bioschemas/codeRepository',
+        f'{vocabulary_server}author',
+        f'{vocabulary_server}featureList',
+        f'{vocabulary_server}isAccessibleForFree',
+        'executionUrl',
+    ]
+
+
+def test_empty_persistent_cache_filled(vocabulary_server, tmp_path):
+    cache_path = str(tmp_path / 'resolution_cache.sqlite')
+    resolution_cache = ResolutionCache(cache_path)
+    converter = JSONSchema2CrateO(bioschemas=MINI_BIOSCHEMAS, resolution_cache=resolution_cache)
+    assert converter.resolution_cache is resolution_cache  # Not replaced because it is empty
+
+    converter.load(MINI_SPEC_PATH)
+    converter.context["schema"] = vocabulary_server
+    converter.prefetch()
+    resolution_cache.close()
+
+    assert len(ResolutionCache(cache_path)) == len(KNOWN_TERMS) + 1  # Including executionUrl, which doesn't resolve
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from jsonschema2crateo import serialization
+
+CONTENT = {
+    "metadata": {"name": "MiniTool", "description": "Käse <b>&</b> \"quotes\" / slashes", "version": "0.0.0"},
+    "classes": {"Person": {"inputs": [{"id": "http://schema.org/name", "multiple": False, "type": ["Text"]}]}},
+    "numbers": [0, -1, 2.5, 10 ** 12],
+    "empty": {},
+}
+
+
+@pytest.mark.parametrize("backend", serialization.BACKENDS)
+def test_loads(backend):
+    text = json.dumps(CONTENT)
+    assert serialization.loads(text, backend) == CONTENT
+    assert serialization.loads(text.encode('utf8'), backend) == CONTENT
+
+
+def test_dump_indented(tmp_path):
+    output_path = tmp_path / 'profile.json'
+    serialization.WRITE_BLOCK_CHUNKS, write_block_chunks = 3, serialization.WRITE_BLOCK_CHUNKS  # Several writes
+    try:
+        serialization.dump(CONTENT, str(output_path))
+    finally:
+        serialization.WRITE_BLOCK_CHUNKS = write_block_chunks
+
+    assert output_path.read_text() == json.dumps(CONTENT, indent='\t')  # Same as previous output
+
+
+@pytest.mark.parametrize("backend", serialization.BACKENDS)
+def test_dump_compact(tmp_path, backend):
+    output_path = tmp_path / 'profile.json'
+    serialization.dump(CONTENT, str(output_path), compact=True, backend=backend)
+
+    compact_text = output_path.read_text(encoding='utf8')
+    assert json.loads(compact_text) == CONTENT
+    assert '\n' not in compact_text and '": ' not in compact_text
+
+
+def test_unavailable_backend():
+    with pytest.raises(AssertionError):
+        serialization.loads('{}', 'no_such_backend')
@@ -0,0 +1,105 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from jsonschema2crateo.__main__ import service_lookup_url
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.server import TranslationServer, TranslationService
+from conftest import MINI_BIOSCHEMAS, MINI_SPEC_PATH, StandInVocabularyHandler
+
+
+@pytest.fixture
+def server_url():
+    resolution_cache = ResolutionCache()
+    resolution_cache.put('http://schema.org/name', True)
+    service = TranslationService(bioschemas={"@graph": [{"@id": "bioschemas:codeRepository"},
+                                                        {"@id": "https://bioschemas.org/ComputationalTool",
+                                                         "rdfs:label": "ComputationalTool"}]},
+                                 resolution_cache=resolution_cache,
+                                 offline=True,
+                                 lookup_url='http://localhost/lookup')
+    server = TranslationServer(('127.0.0.1', 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(url, data=None):
+    with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+        return response.headers, json.loads(response.read())
+
+
+def test_translate_body(server_url):
+    with open(MINI_SPEC_PATH, 'rb') as input_json_schema_file:
+        input_json_schema = input_json_schema_file.read()
+
+    for _request in range(2):
+        headers, crateo_profile = get_json(f'{server_url}/translate', input_json_schema)
+        assert headers['Server-Timing'].startswith('translate;dur=')
+        assert crateo_profile["rootDatasets"]["Schema"]["type"] == ["Dataset", "MiniTool"]
+        assert crateo_profile["classes"]["MiniTool"]["inputs"][0]["id"] == 'http://schema.org/name'
+
+    _headers, stats = get_json(f'{server_url}/stats')
+    assert stats["requests"] == 2
+    assert stats["failures"] == 0
+    assert stats["resolution_cache"]["hits"] >= 1
+
+
+def test_translate_errors(server_url):
+    assert get_json(f'{server_url}/health')[1] == {"status": "ok"}
+
+    for url, data in [
+        (f'{server_url}/translate', b'not json'),
+        (f'{server_url}/translate?url={MINI_SPEC_PATH}', None),  # Local files can't be read through the service
+        (f'{server_url}/translate', None),
+    ]:
+        with pytest.raises(urllib.error.HTTPError) as http_error:
+            get_json(url, data)
+        assert http_error.value.code == 400
+
+
+def test_lookup(server_url):
+    headers, terms = get_json(f'{server_url}/lookup?q=comp')
+    assert headers['Server-Timing'].startswith('lookup;dur=')
+    assert terms == [{"@id": "https://bioschemas.org/ComputationalTool", "@type": "DefinedTerm",
+                      "name": "ComputationalTool"}]
+    assert get_json(f'{server_url}/lookup?q=comp&children_of=http://schema.org/Thing')[1] == []
+    assert get_json(f'{server_url}/stats')[1]["lookup_terms"] == 1
+
+    for query in ['', '?q=comp&limit=ten']:
+        with pytest.raises(urllib.error.HTTPError) as http_error:
+            get_json(f'{server_url}/lookup{query}')
+        assert http_error.value.code == 400
+
+    # Translated profiles are wired to the lookup endpoint
+    with open(MINI_SPEC_PATH, 'rb') as input_json_schema_file:
+        crateo_profile = get_json(f'{server_url}/translate', input_json_schema_file.read())[1]
+    assert crateo_profile["lookup"]["EdamOperation"]["url"].startswith('http://localhost/lookup?children_of=')
+
+
+def test_requests_share_resolutions(vocabulary_server):
+    resolution_cache = ResolutionCache()  # Empty
+    service = TranslationService(bioschemas=MINI_BIOSCHEMAS, resolution_cache=resolution_cache)
+    with open(MINI_SPEC_PATH, 'r') as input_json_schema_file:
+        input_json_schema = json.load(input_json_schema_file)
+    input_json_schema["@context"]["schema"] = vocabulary_server
+
+    crateo_profile = service.translate(input_json_schema)
+    probed_paths = list(StandInVocabularyHandler.requested_paths)
+    assert probed_paths and len(resolution_cache) == len(probed_paths)
+
+    assert service.translate(input_json_schema) == crateo_profile
+    assert StandInVocabularyHandler.requested_paths == probed_paths  # Resolved from the shared cache
+
+
+def test_service_lookup_url():
+    assert service_lookup_url('127.0.0.1', 8000) is None  # No ontology to look up
+    assert service_lookup_url('127.0.0.1', 8000, ontology_paths=['EDAM.csv']) == 'http://127.0.0.1:8000/lookup'
+    assert service_lookup_url('::1', 8000, ontology_paths=['EDAM.csv']) == 'http://[::1]:8000/lookup'
+    assert service_lookup_url('0.0.0.0', 8000, ontology_paths=['EDAM.csv']) is None  # Not an address to connect to
+    assert service_lookup_url('0.0.0.0', 8000, 'https://example.org/lookup') == 'https://example.org/lookup'
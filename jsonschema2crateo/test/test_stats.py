@@ -0,0 +1,50 @@
+import json
+
+from jsonschema2crateo.__main__ import main
+from jsonschema2crateo.stats import HTTP_LATENCY_BUCKETS, TranslationStats
+from conftest import MINI_BIOSCHEMAS, MINI_SPEC_PATH, mini_converter
+
+
+def test_phase():
+    stats = TranslationStats()
+    for _ in range(2):
+        with stats.phase('load'):
+            pass
+
+    assert stats.phases['load']["calls"] == 2
+    assert stats.phases['load']["wall_seconds"] >= 0
+
+
+def test_record_probe():
+    stats = TranslationStats()
+    stats.record_probe(True, 0.01)
+    stats.record_probe(False, 0.3)
+    stats.record_probe(None, 60)
+
+    assert stats.http_probes == {"success": 1, "failure": 1, "error": 1}
+    assert stats.http_latency[0] == 1  # <= 0.05s
+    assert stats.http_latency[HTTP_LATENCY_BUCKETS.index(0.5)] == 1
+    assert stats.http_latency[-1] == 1  # Slower than the largest bucket
+
+
+def test_translation_stats(tmp_path):
+    converter = mini_converter(MINI_SPEC_PATH, str(tmp_path / 'profile.json'))
+    report = converter.stats.report()
+
+    assert set(report["phases"]) >= {'load', 'bioschemas', 'translate', 'convert_type_def', 'write'}
+    assert report["expand_context"]["bioschemas_hit"] == 1  # codeRepository
+    assert report["expand_context"]["guess_resolved"] == 6  # Properties found in the resolution cache
+    assert report["expand_context"]["unresolved"] == 1  # executionUrl
+    assert report["http_probes"] == {"success": 0, "failure": 0, "error": 0}  # Offline
+    json.dumps(report)  # Serialisable
+
+
+def test_profile_report_on_stdout(tmp_path, capsys):
+    bioschemas_path = tmp_path / 'bioschemas.json'
+    bioschemas_path.write_text(json.dumps(MINI_BIOSCHEMAS))
+
+    assert main([MINI_SPEC_PATH, str(tmp_path / 'profile.json'), '--profile-report', '--offline',
+                 '--bioschemas', str(bioschemas_path), '--no-artifact-cache', '--cache-dir', str(tmp_path)]) == 0
+    output = capsys.readouterr()
+    assert json.loads(output.out)["http_probes"] == {"success": 0, "failure": 0, "error": 0}  # Only the report
+    assert 'Finished.' in output.err
@@ -0,0 +1,32 @@
+import io
+import json
+
+import pytest
+
+from jsonschema2crateo.streaming import JSONLDStream
+from conftest import MINI_SPEC_PATH
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_jsonld_stream(chunk_size):
+    document = {
+        "@graph": [{"@id": "ex:a", "count": 12345}, {"@id": "ex:b", "values": [1.5, "two", None, True]}],
+        "@context": {"ex": "http://example.org/"},
+        "version": 10,
+    }
+    input_stream = JSONLDStream(io.StringIO(json.dumps(document, indent=2)), chunk_size)
+
+    assert list(input_stream.nodes()) == document["@graph"]
+    assert input_stream.header == {"@context": {"ex": "http://example.org/"}, "version": 10}
+
+
+def test_jsonld_stream_truncated():
+    with pytest.raises(ValueError):
+        list(JSONLDStream(io.StringIO('{"@graph": [{"@id": "ex:a"}, {"@id"'), 4).nodes())
+
+
+def test_translate_stream(converter):
+    converter.load(MINI_SPEC_PATH)
+    crateo_profile = converter.translate(converter.input_json_schema)
+
+    assert converter.translate_stream(MINI_SPEC_PATH, chunk_size=16) == crateo_profile
@@ -0,0 +1,144 @@
+import json
+import os
+
+import pytest
+
+from jsonschema2crateo.__main__ import main
+from jsonschema2crateo.validate import ProfileValidator, collect_crates, local_name, validate_crates
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EXAMPLE_PROFILE_PATH = os.path.join(REPO_DIR, 'computationalTool_crate-o_profile.json')
+EXAMPLE_CRATE_PATH = os.path.join(REPO_DIR, 'ro-crate-metadata.json')
+
+PROFILE = {
+    "rootDatasets": {"Schema": {"type": ["Dataset", "MiniTool"]}},
+    "classes": {
+        "Dataset": {
+            "inputs": [
+                {"id": "http://schema.org/name", "name": "name", "required": True, "multiple": False,
+                 "type": ["Text"]},
+                {"id": "http://schema.org/hasPart", "name": "hasPart", "required": False, "multiple": True,
+                 "type": ["CreativeWork"]},
+            ]
+        },
+        "MiniTool": {
+            "subClassOf": ["http://schema.org/SoftwareApplication"],
+            "inputs": [
+                {"id": "http://schema.org/author", "name": "author", "required": True, "multiple": True,
+                 "type": ["Organization", "Person"]},
+                {"id": "http://schema.org/isAccessibleForFree", "name": "isAccessibleForFree", "required": False,
+                 "multiple": False, "type": ["Boolean"]},
+            ]
+        },
+        "Person": {
+            "inputs": [
+                {"id": "http://schema.org/name", "name": "name", "required": True, "multiple": False,
+                 "type": ["Text"]},
+            ]
+        },
+        "Researcher": {
+            "subClassOf": ["http://schema.org/Person"],
+            "inputs": [],
+        },
+    },
+}
+
+
+def crate(root_dataset: dict, *entities: dict) -> dict:
+    root_dataset = dict({"@id": "./", "@type": ["Dataset", "MiniTool"], "name": "Tool", "author": {"@id": "#alice"}},
+                        **root_dataset)
+    return {
+        "@context": "https://w3id.org/ro/crate/1.1/context",
+        "@graph": [
+            {"@id": "ro-crate-metadata.json", "@type": "CreativeWork", "about": {"@id": "./"}},
+            root_dataset,
+            {"@id": "#alice", "@type": "Person", "name": "Alice"},
+            *entities,
+        ]
+    }
+
+
+def issue_strings(crate_metadata: dict) -> list:
+    return [str(issue) for issue in ProfileValidator(PROFILE).validate(crate_metadata)]
+
+
+def test_local_name():
+    assert local_name("http://schema.org/Person") == "Person"
+    assert local_name("bioschemas:MiniTool") == "MiniTool"
+    assert local_name("Person") == "Person"
+
+
+def test_valid_crate():
+    assert issue_strings(crate({"hasPart": [{"@id": "README.md"}], "isAccessibleForFree": True},
+                               {"@id": "README.md", "@type": "File"})) == []
+
+
+def test_example_crate():
+    assert ProfileValidator.from_file(EXAMPLE_PROFILE_PATH).validate_file(EXAMPLE_CRATE_PATH).issues == []
+
+
+def test_invalid_crate():
+    assert issue_strings(crate({"name": ["Tool", "Other name"], "isAccessibleForFree": "yes"},
+                               {"@id": "#bob", "@type": "Person"})) == [
+        './: name: single value expected, got 2',
+        "./: isAccessibleForFree: expected Boolean, got str 'yes'",
+        '#bob: name: required property missing',
+    ]
+
+
+def test_reference_types():
+    assert issue_strings(crate({"author": [{"@id": "#carol"}, {"@id": "#readme"}, {"@id": "https://orcid.org/1"}]},
+                               {"@id": "#carol", "@type": "Researcher", "name": "Carol"},
+                               {"@id": "#readme", "@type": "File"})) == [
+        './: author: expected Organization or Person, got File',
+    ]
+
+
+def test_full_property_ids():
+    assert issue_strings(crate({"http://schema.org/isAccessibleForFree": 1})) == [
+        './: http://schema.org/isAccessibleForFree: expected Boolean, got int 1',
+    ]
+
+
+def test_root_dataset():
+    assert issue_strings(crate({"@type": "Dataset"})) == [
+        "./: root dataset types ['Dataset'] should include ['Dataset', 'MiniTool']",
+    ]
+    assert issue_strings({"@graph": []}) == ['./: root dataset missing']
+
+
+def test_rules_compiled_once():
+    validator = ProfileValidator(PROFILE)
+    validator.validate(crate({}))
+    rules = validator.rules_for(frozenset(["Dataset", "MiniTool"]))
+    assert validator.rules_for(frozenset(["Dataset", "MiniTool"])) is rules
+    assert set(rule.name for rule in rules[1]) == {"name", "author"}  # Required by either class
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_validate_crates(tmp_path, use_processes):
+    for crate_name, crate_metadata in [('valid', crate({})), ('invalid', crate({"name": None}))]:
+        os.makedirs(tmp_path / crate_name)
+        with open(tmp_path / crate_name / 'ro-crate-metadata.json', 'w') as crate_metadata_file:
+            json.dump(crate_metadata, crate_metadata_file)
+    (tmp_path / 'broken').mkdir()
+    (tmp_path / 'broken' / 'ro-crate-metadata.json').write_text('{')
+
+    assert collect_crates(str(tmp_path)) == [str(tmp_path / crate_name / 'ro-crate-metadata.json')
+                                             for crate_name in ['broken', 'invalid', 'valid']]
+
+    results = {os.path.basename(os.path.dirname(result.path)): result
+               for result in validate_crates([str(tmp_path)], ProfileValidator(PROFILE), workers=2,
+                                             use_processes=use_processes)}
+    assert results["valid"].issues == [] and results["valid"].error is None
+    assert [str(issue) for issue in results["invalid"].issues] == ['./: name: required property missing']
+    assert results["broken"].error
+
+
+def test_validate_command(tmp_path, capsys):
+    assert main(['validate', EXAMPLE_PROFILE_PATH, EXAMPLE_CRATE_PATH]) == 0
+
+    crate_metadata_path = tmp_path / 'ro-crate-metadata.json'
+    crate_metadata_path.write_text(json.dumps(crate({"@type": "Dataset"})))
+    assert main(['validate', EXAMPLE_PROFILE_PATH, str(crate_metadata_path)]) == 1
+    assert '0 of 1 crates valid' in capsys.readouterr().out
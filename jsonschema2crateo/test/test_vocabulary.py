@@ -0,0 +1,70 @@
+import json
+import os
+import pickle
+
+import pytest
+
+from jsonschema2crateo import JSONSchema2CrateO
+from jsonschema2crateo.__main__ import main
+from jsonschema2crateo.vocabulary import VocabularyNotFound, VocabularyStore, get_vocabulary
+from conftest import MINI_SPEC_PATH
+
+BIOSCHEMAS = {
+    "@graph": [
+        {"@id": "bioschemas:ComputationalTool", "rdfs:label": "ComputationalTool"},
+        {"@id": "bioschemas:codeRepository", "rdfs:label": "codeRepository"},
+    ]
+}
+
+
+def test_vocabulary_store_lazy_load(tmp_path):
+    source_path = tmp_path / 'bioschemas.json'
+    source_path.write_text(json.dumps(BIOSCHEMAS))
+    cache_dir = str(tmp_path / 'cache')
+
+    vocabulary = VocabularyStore(str(source_path), cache_dir)
+    converter = JSONSchema2CrateO(vocabulary=vocabulary)
+    assert vocabulary.version_key is None  # Nothing loaded until first use
+
+    assert converter.in_bioschemas('codeRepository')
+    assert converter.bioschemas == BIOSCHEMAS
+    pickle_paths = [path for path in os.listdir(cache_dir) if path.endswith('.pickle')]
+    assert len(pickle_paths) == 1
+
+    # Pre-indexed copy is used by a new store, and replaced when the source changes
+    assert VocabularyStore(str(source_path), cache_dir).index.by_id.keys() == {
+        "bioschemas:ComputationalTool", "bioschemas:codeRepository"}
+
+    source_path.write_text(json.dumps({"@graph": []}))
+    os.utime(source_path, ns=(0, 0))
+    assert len(VocabularyStore(str(source_path), cache_dir).index) == 0
+    assert [path for path in os.listdir(cache_dir) if path.endswith('.pickle')] != pickle_paths
+
+
+def test_vocabulary_store_shared(tmp_path):
+    assert get_vocabulary(cache_dir=str(tmp_path)) is get_vocabulary(cache_dir=str(tmp_path))
+
+    vocabulary = pickle.loads(pickle.dumps(get_vocabulary(cache_dir=str(tmp_path))))
+    assert vocabulary.cache_dir == str(tmp_path)
+
+
+def test_vocabulary_not_found_offline(tmp_path):
+    with pytest.raises(VocabularyNotFound, match='--bioschemas'):
+        VocabularyStore(cache_dir=str(tmp_path / 'cache')).load(offline=True)
+
+
+def test_local_vocabulary_option(tmp_path, capsys):
+    source_path = tmp_path / 'bioschemas.json'
+    source_path.write_text(json.dumps(BIOSCHEMAS))
+    output_crateo_profile_path = str(tmp_path / 'profile.json')
+    arguments = [MINI_SPEC_PATH, output_crateo_profile_path, '--offline', '--no-artifact-cache',
+                 '--cache-dir', str(tmp_path / 'cache')]
+
+    assert main(arguments) == 1  # Nothing downloaded to use offline
+    assert '--bioschemas' in capsys.readouterr().err
+
+    assert main(arguments + ['--bioschemas', str(source_path)]) == 0
+    with open(output_crateo_profile_path, 'r') as output_crateo_profile_file:
+        crateo_profile = json.load(output_crateo_profile_file)
+    assert crateo_profile["classes"]["MiniTool"]["inputs"][1]["id"] == \
+           'https://discovery.biothings.io/view/bioschemas/codeRepository'
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import requests
+
+from jsonschema2crateo.cache import ResolutionCache
+from jsonschema2crateo.watch import SourceWatcher, regenerate, watch
+from conftest import MINI_SPEC_PATH, URL_PROBES, mini_converter
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if condition():
+                return
+        except (OSError, ValueError, KeyError):
+            pass  # Output file missing or part written
+        assert time.monotonic() < deadline, 'Timed out'
+        time.sleep(0.02)
+
+
+def test_source_watcher(tmp_path):
+    source_path = tmp_path / 'spec.json'
+    source_path.write_text('{}')
+
+    watcher = SourceWatcher(str(source_path))
+    assert watcher.poll()  # First poll always reports a change
+    assert not watcher.poll()
+
+    source_path.write_text('{"@graph": []}')
+    assert watcher.poll()
+
+
+def test_watch(tmp_path, converter):
+    with open(MINI_SPEC_PATH, 'r') as input_json_schema_file:
+        input_json_schema = json.load(input_json_schema_file)
+    input_json_schema_path = tmp_path / 'spec.json'
+    input_json_schema_path.write_text(json.dumps(input_json_schema))
+    output_crateo_profile_path = tmp_path / 'profile.json'
+
+    converter.output_crateo_profile_path = str(output_crateo_profile_path)
+
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watch, args=(converter, str(input_json_schema_path)),
+                              kwargs={"poll_interval": 0.02, "debounce": 0.05, "stop_event": stop_event})
+    thread.start()
+    try:
+        wait_for(lambda: json.loads(output_crateo_profile_path.read_text())["metadata"]["name"] == "MiniTool")
+
+        input_json_schema["@graph"][0]["$validation"]["properties"]["name"]["description"] = "Tool name"
+        input_json_schema_path.write_text(json.dumps(input_json_schema))
+        wait_for(lambda: json.loads(output_crateo_profile_path.read_text())
+                 ["classes"]["MiniTool"]["inputs"][0]["help"] == "Tool name")
+        assert converter.reused_classes == 3  # Only the root class was rebuilt
+    finally:
+        stop_event.set()
+        thread.join()
+
+
+class FlakySession(requests.Session):
+    """Session answering URL_PROBES, or failing every request with a network error while not reachable"""
+    reachable = False
+
+    def request(self, method, url, *args, **kwargs):
+        if not self.reachable:
+            raise requests.ConnectionError(url)
+        response = requests.Response()
+        response.status_code = 200 if URL_PROBES.get(url) else 404
+        return response
+
+
+def test_regenerate_after_outage(tmp_path):
+    output_crateo_profile_path = tmp_path / 'profile.json'
+    session = FlakySession()
+    converter = mini_converter(resolution_cache=ResolutionCache(), offline=False, session=session, prefetch_workers=0,
+                               incremental=True)
+    converter.output_crateo_profile_path = str(output_crateo_profile_path)
+    watcher = SourceWatcher(MINI_SPEC_PATH)
+
+    def input_id():
+        return json.loads(output_crateo_profile_path.read_text())["classes"]["MiniTool"]["inputs"][0]["id"]
+
+    regenerate(converter, watcher)
+    assert input_id() == 'name'
+    assert 'name' not in converter.expanded_ids  # Left unexpanded by a network error, so not memoized
+
+    session.reachable = True
+    regenerate(converter, watcher)
+    assert input_id() == 'http://schema.org/name'
+    assert converter.rebuilt_classes == 4
+
+    regenerate(converter, watcher)
+    assert (converter.reused_classes, converter.rebuilt_classes) == (4, 0)
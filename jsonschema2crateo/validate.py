@@ -0,0 +1,338 @@
+"""
+Validation of RO-Crate metadata against Crate-O profiles, compiled once into per-class rule tables
+"""
+import glob
+import os
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from jsonschema2crateo import serialization
+
+CRATE_METADATA_FILE = 'ro-crate-metadata.json'
+
+# Crate-O input types which hold literal values rather than references to entities
+TEXT_TYPES = frozenset(["Text", "TextArea", "URL", "Date", "DateTime", "Time", "Select", "Value"])
+NUMBER_TYPES = frozenset(["Number", "Integer", "Float"])
+BOOLEAN_TYPES = frozenset(["Boolean"])
+
+# Superclasses of common RO-Crate entity types, which profiles don't usually define, e.g. "File" parts of a Dataset
+# whose hasPart input expects CreativeWork
+RO_CRATE_SUPERCLASSES = {
+    "File": ["MediaObject"],
+    "MediaObject": ["CreativeWork"],
+    "Dataset": ["CreativeWork"],
+    "SoftwareSourceCode": ["CreativeWork"],
+    "SoftwareApplication": ["CreativeWork"],
+    "ScholarlyArticle": ["Article"],
+    "Article": ["CreativeWork"],
+}
+
+LOCAL_NAME_PATTERN = re.compile(r'.*[/#:]')
+
+# State shared by all validations in a process pool worker. Thread pools use the validator they are given directly,
+# so that concurrent validations in one process don't share it
+_worker_state: Dict = {}
+
+
+def local_name(type_name: str) -> str:
+    """Return a type name without its URL or context prefix, e.g. "http://schema.org/Person" -> "Person" """
+    return LOCAL_NAME_PATTERN.sub('', type_name)
+
+
+def as_list(value) -> List:
+    """Return a JSON-LD value as a list of values"""
+    return value if type(value) == list else [value]
+
+
+class PropertyRule(NamedTuple):
+    """Constraints on one property of an entity, compiled from Crate-O inputs"""
+    name: str
+    types: FrozenSet[str]  # Local names of allowed types
+    multiple: bool
+    required: bool
+
+
+class ValidationIssue(NamedTuple):
+    """A way in which an entity doesn't conform to the profile"""
+    entity_id: str
+    property_name: Optional[str]
+    message: str
+
+    def __str__(self) -> str:
+        if self.property_name:
+            return f'{self.entity_id}: {self.property_name}: {self.message}'
+        return f'{self.entity_id}: {self.message}'
+
+
+class ValidationResult(NamedTuple):
+    """Outcome of validating one RO-Crate metadata file"""
+    path: str
+    issues: List[ValidationIssue]
+    error: Optional[str]  # Set if the file couldn't be read or parsed
+    seconds: float
+
+
+class ProfileValidator:
+    """
+    Validator of RO-Crate metadata against a Crate-O profile. The profile is compiled once into a table of property
+    rules per class, and the rules for each combination of entity types are merged on first use, so each entity is
+    checked with dictionary lookups rather than by re-reading the profile.
+    Checks required properties, single-valued properties holding several values, value types (including the types
+    of referenced entities and their superclasses) and the types of the root dataset.
+    Properties not defined by the profile, and entities of types it doesn't define, aren't checked
+    """
+
+    def __init__(self, crateo_profile: Dict) -> None:
+        """
+        :param crateo_profile: Dict, Crate-O profile
+        """
+        self.class_rules: Dict[str, Dict[str, PropertyRule]] = {}
+        self.superclasses: Dict[str, FrozenSet[str]] = {class_name: frozenset(superclasses)
+                                                        for class_name, superclasses in RO_CRATE_SUPERCLASSES.items()}
+        for class_name, crateo_class in crateo_profile.get("classes", {}).items():
+            self.class_rules[class_name] = self.compile_class(crateo_class)
+            self.superclasses[class_name] = self.superclasses.get(class_name, frozenset()) | frozenset(
+                local_name(superclass) for superclass in crateo_class.get("subClassOf", []))
+        self.ancestors: Dict[str, FrozenSet[str]] = {class_name: self.class_ancestors(class_name)
+                                                     for class_name in self.superclasses}
+
+        self.root_dataset_types: List[FrozenSet[str]] = [
+            frozenset(local_name(type_name) for type_name in root_dataset.get("type", []))
+            for root_dataset in crateo_profile.get("rootDatasets", {}).values()
+        ]
+
+        # Merged rules and required properties by entity types
+        self._type_rules: Dict[FrozenSet[str], Tuple[Dict[str, PropertyRule], List[PropertyRule]]] = {}
+
+    @classmethod
+    def from_file(cls, crateo_profile_path: str) -> 'ProfileValidator':
+        """Return a validator for the Crate-O profile at crateo_profile_path"""
+        with open(crateo_profile_path, 'rb') as crateo_profile_file:
+            return cls(serialization.load(crateo_profile_file))
+
+    @staticmethod
+    def compile_class(crateo_class: Dict) -> Dict[str, PropertyRule]:
+        """
+        Return property rules for a Crate-O class, keyed by both input name and full property id, so that crates
+        using either are checked
+        """
+        rules = {}
+        for crateo_input in crateo_class.get("inputs", []):
+            types = frozenset(local_name(type_name) for type_name in crateo_input.get("type", []))
+            rule = PropertyRule(name=crateo_input["name"],
+                                types=types,
+                                multiple=bool(crateo_input.get("multiple")),
+                                required=bool(crateo_input.get("required")),
+                                )
+            rules[rule.name] = rule
+            if (input_id := crateo_input.get("id")) and input_id != rule.name:
+                rules[input_id] = rule
+        return rules
+
+    def class_ancestors(self, class_name: str) -> FrozenSet[str]:
+        """Return class_name and its superclasses, following profile subClassOf and RO_CRATE_SUPERCLASSES"""
+        ancestors = set()
+        unvisited = [class_name]
+        while unvisited:
+            if (ancestor := unvisited.pop()) not in ancestors:
+                ancestors.add(ancestor)
+                unvisited += self.superclasses.get(ancestor, [])
+        return frozenset(ancestors)
+
+    def rules_for(self, entity_types: FrozenSet[str]) -> Tuple[Dict[str, PropertyRule], List[PropertyRule]]:
+        """
+        Return the property rules and required properties of an entity with entity_types. A property defined by
+        several of the types allows any of their value types, and is multiple or required if any of them says so
+        """
+        if (type_rules := self._type_rules.get(entity_types)) is not None:
+            return type_rules
+
+        rules = {}
+        for entity_type in sorted(entity_types):
+            for property_key, rule in self.class_rules.get(entity_type, {}).items():
+                if existing_rule := rules.get(property_key):
+                    rule = existing_rule._replace(types=existing_rule.types | rule.types,
+                                                  multiple=existing_rule.multiple or rule.multiple,
+                                                  required=existing_rule.required or rule.required,
+                                                  )
+                rules[property_key] = rule
+
+        # Each required property once, under its input name
+        required = [rule for property_key, rule in rules.items() if rule.required and property_key == rule.name]
+
+        self._type_rules[entity_types] = rules, required
+        return rules, required
+
+    def entity_types(self, entity: Dict) -> FrozenSet[str]:
+        return frozenset(local_name(type_name) for type_name in as_list(entity.get("@type", [])))
+
+    def value_issue(self,
+                    value,
+                    rule: PropertyRule,
+                    entities: Dict[str, Dict],
+                    ) -> Optional[str]:
+        """
+        Return a description of why value doesn't match the types allowed by rule, or None if it does
+        :param value: JSON-LD value
+        :param rule: PropertyRule
+        :param entities: Dict[str, Dict], crate entities by @id, to look up the types of referenced entities
+        """
+        if type(value) == dict:
+            if "@value" in value:
+                return self.value_issue(value["@value"], rule, entities)
+
+            if "@type" in value:
+                value_types = self.entity_types(value)
+            elif (referenced_entity := entities.get(value.get("@id"))) is not None:
+                value_types = self.entity_types(referenced_entity)
+            elif rule.types - NUMBER_TYPES - BOOLEAN_TYPES:
+                return None  # Reference to something outside the crate, e.g. a URL
+            else:
+                return f'expected {" or ".join(sorted(rule.types))}, got a reference'
+
+            if any(rule.types & self.ancestors.get(value_type, frozenset([value_type]))
+                   for value_type in value_types):
+                return None
+            return f'expected {" or ".join(sorted(rule.types))}, got {" or ".join(sorted(value_types)) or "untyped"}'
+
+        if type(value) == bool:
+            literal_types = BOOLEAN_TYPES
+        elif type(value) in [int, float]:
+            literal_types = NUMBER_TYPES
+        elif type(value) == str:
+            literal_types = TEXT_TYPES
+        else:
+            return f'unexpected value {value!r}'
+
+        if rule.types & literal_types:
+            return None
+        return f'expected {" or ".join(sorted(rule.types))}, got {type(value).__name__} {value!r}'
+
+    def validate_entity(self,
+                        entity: Dict,
+                        entities: Dict[str, Dict],
+                        ) -> List[ValidationIssue]:
+        """Return issues found in one entity"""
+        rules, required = self.rules_for(self.entity_types(entity))
+        if not rules:
+            return []
+
+        entity_id = entity.get("@id", '')
+        issues = []
+        for rule in required:
+            if entity.get(rule.name) in [None, '', []]:
+                issues.append(ValidationIssue(entity_id, rule.name, 'required property missing'))
+
+        for property_name, values in entity.items():
+            if not (rule := rules.get(property_name)):
+                continue  # JSON-LD keyword or property not defined by the profile
+
+            values = as_list(values)
+            if len(values) > 1 and not rule.multiple:
+                issues.append(ValidationIssue(entity_id, property_name, f'single value expected, got {len(values)}'))
+
+            for value in values:
+                if value is None:
+                    continue  # Reported as missing if required
+                if message := self.value_issue(value, rule, entities):
+                    issues.append(ValidationIssue(entity_id, property_name, message))
+
+        return issues
+
+    def validate(self, crate_metadata: Dict) -> List[ValidationIssue]:
+        """
+        Return issues found in RO-Crate metadata
+        :param crate_metadata: Dict, content of an ro-crate-metadata.json file
+        :return: List[ValidationIssue], empty if the crate conforms to the profile
+        """
+        graph = crate_metadata.get("@graph", [])
+        entities = {entity["@id"]: entity for entity in graph if "@id" in entity}
+
+        issues = []
+
+        # The metadata descriptor says which entity is the root dataset
+        root_dataset_id = (entities.get(CRATE_METADATA_FILE, {}).get("about") or {}).get("@id", './')
+        if (root_dataset := entities.get(root_dataset_id)) is None:
+            issues.append(ValidationIssue(root_dataset_id, None, 'root dataset missing'))
+        elif self.root_dataset_types:
+            root_types = self.entity_types(root_dataset)
+            if not any(root_dataset_types <= root_types for root_dataset_types in self.root_dataset_types):
+                expected_types = ' or '.join(str(sorted(root_dataset_types))
+                                             for root_dataset_types in self.root_dataset_types)
+                issues.append(ValidationIssue(root_dataset_id, None,
+                                              f'root dataset types {sorted(root_types)} should include '
+                                              f'{expected_types}'))
+
+        for entity in graph:
+            issues += self.validate_entity(entity, entities)
+
+        return issues
+
+    def validate_file(self, crate_metadata_path: str) -> ValidationResult:
+        """Validate an RO-Crate metadata file, capturing any failure to read it"""
+        start_time = time.perf_counter()
+        try:
+            with open(crate_metadata_path, 'rb') as crate_metadata_file:
+                issues = self.validate(serialization.load(crate_metadata_file))
+            error = None
+        except Exception as exception:
+            issues = []
+            error = f'{type(exception).__name__}: {exception}'
+
+        return ValidationResult(crate_metadata_path, issues, error, time.perf_counter() - start_time)
+
+
+def collect_crates(source: str) -> List[str]:
+    """
+    Expand a source into a list of RO-Crate metadata files
+    :param source: str, directory (searched recursively for ro-crate-metadata.json), glob pattern or file
+    :return: List[str], metadata file paths
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(glob.escape(source), '**', CRATE_METADATA_FILE), recursive=True))
+
+    if glob.has_magic(source):
+        return sorted(glob.glob(source, recursive=True))
+
+    return [source]
+
+
+def _init_worker(validator: ProfileValidator) -> None:
+    """Initialise state shared by every validation in this worker process"""
+    _worker_state['validator'] = validator
+
+
+def _validate_in_worker(crate_metadata_path: str) -> ValidationResult:
+    return _worker_state['validator'].validate_file(crate_metadata_path)
+
+
+def validate_crates(sources: Iterable[str],
+                    validator: ProfileValidator,
+                    workers: Optional[int] = None,
+                    use_processes: bool = False,
+                    ) -> Iterator[ValidationResult]:
+    """
+    Validate every RO-Crate metadata file found in sources, yielding results as they complete
+    :param sources: Iterable[str], directories, glob patterns or files
+    :param validator: ProfileValidator, compiled profile. Copied once to each worker process
+    :param workers: Optional[int], number of pool workers (default chosen by concurrent.futures)
+    :param use_processes: bool, use a process pool instead of a thread pool, so that validation runs in parallel
+        rather than only overlapping file reads
+    :return: Iterator[ValidationResult], one result per file in completion order
+    """
+    crate_metadata_paths = [crate_metadata_path for source in sources for crate_metadata_path in collect_crates(source)]
+
+    executor: Executor
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(validator,))
+        validate_one = _validate_in_worker
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        validate_one = validator.validate_file
+
+    with executor:
+        futures = [executor.submit(validate_one, crate_metadata_path) for crate_metadata_path in crate_metadata_paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,193 @@
+"""
+Process-wide, lazily loaded store for the BioSchemas vocabulary graph
+"""
+import glob
+import hashlib
+import os
+import pickle
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from jsonschema2crateo import serialization
+from jsonschema2crateo.cache import DEFAULT_CACHE_DIR
+from jsonschema2crateo.fetch import Mirror
+from jsonschema2crateo.graph_index import GraphIndex
+
+BIOSCHEMAS_URL = "https://raw.githubusercontent.com/BioSchemas/bioschemas-dde/main/bioschemas.json"
+
+DEFAULT_MAX_AGE = 24 * 60 * 60  # Seconds before a downloaded copy is revalidated against its source
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class VocabularyNotFound(FileNotFoundError):
+    """The BioSchemas vocabulary can't be loaded: its local source is missing, or it hasn't been downloaded and the
+    network can't be used"""
+
+
+class VocabularyStore:
+    """
+    BioSchemas vocabulary graph and its index, loaded on first use.
+    Remote sources are mirrored in cache_dir and revalidated with conditional requests once older than max_age.
+    The parsed graph and index are kept in cache_dir as a pickle keyed by source and ETag (or file modification
+    time for local sources), so a cold start doesn't have to re-parse the JSON-LD.
+    """
+
+    def __init__(self,
+                 source: str = BIOSCHEMAS_URL,
+                 cache_dir: Optional[str] = None,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 ) -> None:
+        """
+        :param source: str, URL or local path of the BioSchemas JSON-LD graph
+        :param cache_dir: Optional[str], directory for downloaded and pre-indexed copies. Defaults to DEFAULT_CACHE_DIR
+        :param max_age: float, seconds before a downloaded copy is revalidated
+        """
+        self.source: str = source
+        self.cache_dir: str = cache_dir or DEFAULT_CACHE_DIR
+        self.max_age: float = max_age
+        self.mirror: Mirror = Mirror(os.path.join(self.cache_dir, 'mirror'))
+
+        self.version_key: Optional[str] = None
+        self._graph: Optional[Dict] = None
+        self._index: Optional[GraphIndex] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_remote(self) -> bool:
+        return bool(re.match(r'http(s)?://', self.source))
+
+    @property
+    def local_path(self) -> str:
+        """Path of the JSON-LD file the vocabulary is parsed from"""
+        if self.is_remote:
+            return self.mirror.path_for(self.source)
+        return self.source
+
+    @property
+    def graph(self) -> Dict:
+        """BioSchemas JSON-LD document"""
+        return self.load()[0]
+
+    @property
+    def index(self) -> GraphIndex:
+        """Index of BioSchemas @graph nodes"""
+        return self.load()[1]
+
+    def load(self, offline: bool = False) -> Tuple[Dict, GraphIndex]:
+        """
+        Load the vocabulary if it hasn't already been loaded
+        :param offline: bool, don't access the network. Raise VocabularyNotFound if there is no local copy
+        :return: Tuple[Dict, GraphIndex], BioSchemas JSON-LD document and its index
+        """
+        with self._lock:
+            if self._graph is None:
+                try:
+                    version_key = self._refresh(offline)
+                except FileNotFoundError as file_not_found_error:
+                    raise VocabularyNotFound(
+                        f'BioSchemas vocabulary {self.source} not found at {self.local_path}. Download it by running '
+                        f'once without --offline, or give the path of a local copy with --bioschemas'
+                        if self.is_remote else
+                        f'BioSchemas vocabulary {self.source} not found. Check the path given with --bioschemas'
+                    ) from file_not_found_error
+                self._graph, self._index = self._read(version_key)
+                self.version_key = version_key
+            return self._graph, self._index
+
+    def invalidate(self) -> None:
+        """Discard the loaded vocabulary so that the next use reloads it"""
+        with self._lock:
+            self._graph = None
+            self._index = None
+            self.version_key = None
+
+    def __getstate__(self) -> Dict:
+        # Only configuration is pickled. Each process loads its own copy on first use
+        return {"source": self.source, "cache_dir": self.cache_dir, "max_age": self.max_age}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+    def _refresh(self, offline: bool) -> str:
+        """
+        Make sure the local copy exists and is fresh, returning a key identifying its version
+        """
+        if not self.is_remote:
+            return self._file_version_key()
+
+        return self.mirror.fetch(self.source, offline=offline, max_age=self.max_age).version_key
+
+    def local_version_key(self) -> Optional[str]:
+        """
+        Return the key identifying the version of the local copy without loading, parsing or revalidating it
+        :return: Optional[str], None if there is no local copy yet
+        """
+        if self.version_key is not None:
+            return self.version_key
+        if not self.is_remote:
+            try:
+                return self._file_version_key()
+            except OSError:
+                return None
+        return self.mirror.version_key(self.source)
+
+    def _file_version_key(self) -> str:
+        """Key identifying the version of a local source file, from its path, modification time and size"""
+        stat = os.stat(self.source)
+        return f'{os.path.abspath(self.source)}|{stat.st_mtime_ns}|{stat.st_size}'
+
+    def _read(self, version_key: str) -> Tuple[Dict, GraphIndex]:
+        """
+        Read the pre-indexed copy for version_key, creating it from the JSON-LD file if necessary
+        """
+        key_hash = hashlib.sha1(version_key.encode('utf8')).hexdigest()
+        pickle_stem = os.path.join(self.cache_dir, os.path.basename(self.local_path))
+        pickle_path = f'{pickle_stem}.{key_hash}.pickle'
+
+        if os.path.isfile(pickle_path):
+            try:
+                with open(pickle_path, 'rb') as pickle_file:
+                    return pickle.load(pickle_file)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                pass  # Corrupt or incompatible. Rebuild it
+
+        with open(self.local_path, 'rb') as bioschemas_spec_file:
+            graph = serialization.load(bioschemas_spec_file)
+        index = GraphIndex(graph["@graph"])
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for stale_pickle_path in glob.glob(f'{glob.escape(pickle_stem)}.*.pickle'):
+                os.remove(stale_pickle_path)
+            _atomic_write(pickle_path, pickle.dumps((graph, index), protocol=PICKLE_PROTOCOL))
+        except OSError:
+            pass  # Cache directory not writable. Carry on without the pre-indexed copy
+
+        return graph, index
+
+
+def _atomic_write(path: str, content: bytes) -> None:
+    """Write content to path via a temporary file so that concurrent readers never see a partial file"""
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(content)
+    os.replace(temp_path, path)
+
+
+_stores: Dict[Tuple[str, str], VocabularyStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vocabulary(source: str = BIOSCHEMAS_URL,
+                   cache_dir: Optional[str] = None,
+                   ) -> VocabularyStore:
+    """
+    Return the process-wide VocabularyStore for source and cache_dir. Nothing is loaded until it is first used
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    with _stores_lock:
+        if (store := _stores.get((source, cache_dir))) is None:
+            store = _stores[(source, cache_dir)] = VocabularyStore(source, cache_dir)
+        return store
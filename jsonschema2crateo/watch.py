@@ -0,0 +1,135 @@
+"""
+Watch an input JSONschema and regenerate its Crate-O profile whenever it changes
+"""
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from jsonschema2crateo import JSONSchema2CrateO, serialization
+
+DEFAULT_POLL_INTERVAL = 1.0  # Seconds between checks of a local file
+DEFAULT_REMOTE_POLL_INTERVAL = 30.0  # Seconds between conditional GETs of a remote URL
+DEFAULT_DEBOUNCE = 0.5  # Seconds without further changes before regenerating
+FETCH_TIMEOUT = 60
+
+
+class SourceWatcher:
+    """
+    Detect changes to a local file (by modification time and size) or a remote URL (by conditional GET using the
+    ETag and Last-Modified headers of the previous response)
+    """
+
+    def __init__(self,
+                 source: str,
+                 session: Optional[requests.Session] = None,
+                 ) -> None:
+        self.source: str = source
+        self.session: requests.Session = session or requests.Session()
+        self.is_remote: bool = bool(re.match(r'http(s)?://', source))
+
+        self.state: Optional[Tuple] = None
+        self.content: Optional[Dict] = None  # Last parsed remote content
+        self.validators: Dict[str, str] = {}
+
+    def poll(self) -> bool:
+        """
+        Return True if the source has changed since the last poll. The first poll always reports a change
+        """
+        state = self._remote_state() if self.is_remote else self._local_state()
+        changed = state != self.state
+        self.state = state
+        return changed
+
+    def _local_state(self) -> Optional[Tuple]:
+        try:
+            stat = os.stat(self.source)
+        except FileNotFoundError:
+            return None  # Possibly mid-save. Report as a change once it reappears
+        return stat.st_mtime_ns, stat.st_size
+
+    def _remote_state(self) -> Optional[Tuple]:
+        headers = {}
+        if etag := self.validators.get('ETag'):
+            headers['If-None-Match'] = etag
+        if last_modified := self.validators.get('Last-Modified'):
+            headers['If-Modified-Since'] = last_modified
+
+        response = self.session.get(self.source, headers=headers, timeout=FETCH_TIMEOUT)
+        if response.status_code == 304:
+            return self.state
+        response.raise_for_status()
+
+        self.validators = {header: response.headers[header]
+                           for header in ['ETag', 'Last-Modified'] if header in response.headers}
+        self.content = serialization.loads(response.content)
+        return ('content', response.content)
+
+
+def regenerate(converter: JSONSchema2CrateO,
+               watcher: SourceWatcher,
+               ) -> None:
+    """
+    Re-translate the watched source with a resident converter, reusing its caches and unchanged classes
+    """
+    converter.forget_probe_errors()  # The network may be back since the last regeneration
+    if watcher.is_remote:
+        converter.set_input_json_schema(watcher.content)
+    else:
+        converter.load(watcher.source)
+
+    if converter.prefetch_workers:
+        converter.prefetch(max_workers=converter.prefetch_workers)
+
+    converter.reused_classes = converter.rebuilt_classes = 0
+    converter.output_crateo_profile = converter.translate(converter.input_json_schema)
+    converter.write()
+
+
+def watch(converter: JSONSchema2CrateO,
+          input_json_schema_path: str,
+          poll_interval: Optional[float] = None,
+          debounce: float = DEFAULT_DEBOUNCE,
+          stop_event: Optional[threading.Event] = None,
+          ) -> None:
+    """
+    Regenerate converter's output profile whenever input_json_schema_path changes, until stop_event is set
+    :param converter: JSONSchema2CrateO, resident converter with output_crateo_profile_path set
+    :param input_json_schema_path: str, local path or URL of the input JSONschema
+    :param poll_interval: Optional[float], seconds between checks for changes. Defaults to DEFAULT_POLL_INTERVAL for
+        local files and DEFAULT_REMOTE_POLL_INTERVAL for URLs
+    :param debounce: float, seconds to wait for a burst of changes to finish before regenerating
+    :param stop_event: Optional[threading.Event], event to stop watching. Runs until interrupted if not supplied
+    """
+    assert converter.output_crateo_profile_path, 'No output_crateo_profile_path provided'
+
+    converter.incremental = True
+    stop_event = stop_event or threading.Event()
+    watcher = SourceWatcher(input_json_schema_path, converter.session)
+    if poll_interval is None:
+        poll_interval = DEFAULT_REMOTE_POLL_INTERVAL if watcher.is_remote else DEFAULT_POLL_INTERVAL
+
+    try:
+        while not stop_event.is_set():
+            try:
+                changed = watcher.poll()
+                if changed and not watcher.is_remote:
+                    # Wait for a burst of edits to settle
+                    while not stop_event.wait(debounce) and watcher.poll():
+                        pass
+
+                if changed and watcher.state is not None and not stop_event.is_set():
+                    start_time = time.perf_counter()
+                    regenerate(converter, watcher)
+                    print(f'Regenerated "{converter.output_crateo_profile_path}" in '
+                          f'{time.perf_counter() - start_time:.2f}s '
+                          f'({converter.reused_classes} classes reused, {converter.rebuilt_classes} rebuilt)')
+            except Exception as exception:  # Keep watching through invalid intermediate edits and network errors
+                print(f'Failed to regenerate from "{input_json_schema_path}": {type(exception).__name__}: {exception}')
+
+            stop_event.wait(poll_interval)
+    except KeyboardInterrupt:
+        pass